@@ -3,10 +3,34 @@ import os
 import dspy
 import json
 import argparse
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session
+import base64
+import atexit
+import time
+from flask import Flask, render_template, request, redirect, url_for, jsonify, session, g
+from dspy.utils.callback import BaseCallback
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-# No longer using FaissRM for retrieval
+from program_registry import ProgramRegistry
+from plan_cache import PlanCache
+from job_queue import JobQueue
+import db
+import metrics
+import migrations
+import plan_storage
+from exercise_index import get_exercise_index
+from semantic_index import find_similar_exercises
+from term_extractor import extract_terms
+from prompt_packer import PromptPacker, DEFAULT_TOKEN_BUDGET
+from equipment_index import get_equipment_index, exercises_doable_at_gym
+from llm_dispatch import LLMDispatcher, DEFAULT_TIMEOUT, DEFAULT_HEDGE_DELAY
+from local_planner import LocalPlanner
+from progress_analytics import progress_report, warm_progress_report, FORMULAS, MAX_E1RM_REPS
+from write_behind import GroupCommitWriter
+from summary_cache import SummaryCache
+from session_store import make_session_interface
+from read_cache import ReadCache, DEFAULT_MAX_ENTRIES
+from gym_import import GymImporter, normalize_gym
+# Semantic retrieval lives in semantic_index.py (FAISS when installed, numpy otherwise)
 
 app = Flask(__name__)
 app.secret_key = 'workout_vibe_secret_key'  # For session management
@@ -14,11 +38,21 @@ app.secret_key = 'workout_vibe_secret_key'  # For session management
 # Ensure data directory exists
 os.makedirs('data', exist_ok=True)
 
+# Session data stays on the server and the cookie only carries an id:
+# sqlite (default), memory, or cookie for Flask's signed cookie
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'sqlite')
+session_interface = make_session_interface(SESSION_BACKEND)
+if session_interface is not None:
+    app.session_interface = session_interface
+
+# Gym, equipment and recent-workout reads are served from memory until a write
+# to the table bumps its generation row (READ_CACHE_ENTRIES=0 turns this off)
+read_cache = ReadCache(int(os.environ.get('READ_CACHE_ENTRIES', DEFAULT_MAX_ENTRIES)))
+
 class ExerciseDB:
     def __init__(self, db_path='data/exercises.db'):
         """Initialize the database connection."""
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+        self.conn = db.open_connection(db_path)
         self.cursor = self.conn.cursor()
     
     def get_all_exercises(self):
@@ -43,40 +77,15 @@ class ExerciseDB:
 class GymDB:
     def __init__(self, db_path='data/gyms.db'):
         """Initialize the gym database connection."""
-        # Create the data directory if it doesn't exist
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+        # Reuse this thread's pooled connection; the schema is checked once per process
+        self.db_path = db_path
+        self.conn = db.get_connection(db_path)
         self.cursor = self.conn.cursor()
-        self._create_tables()
+        db.ensure_schema(db_path, self._create_tables)
     
     def _create_tables(self):
-        """Create the necessary tables if they don't exist."""
-        # Create gyms table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS gyms (
-            id INTEGER PRIMARY KEY,
-            name TEXT NOT NULL,
-            location TEXT,
-            description TEXT
-        )
-        ''')
-        
-        # Create equipment table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS equipment (
-            id INTEGER PRIMARY KEY,
-            gym_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            category TEXT NOT NULL,
-            quantity INTEGER DEFAULT 1,
-            description TEXT,
-            FOREIGN KEY (gym_id) REFERENCES gyms (id)
-        )
-        ''')
-        
-        self.conn.commit()
+        """Create or upgrade the schema through the shared migrations."""
+        migrations.migrate(self.conn, 'gyms')
     
     def add_gym(self, name: str, location: str = None, description: str = None) -> int:
         """Add a new gym to the database."""
@@ -99,6 +108,10 @@ class GymDB:
     
     def get_gym(self, gym_id: int) -> Optional[Dict]:
         """Get gym details by ID."""
+        return read_cache.get(self.conn, self.db_path, 'gyms', ('gym', gym_id),
+                              lambda: self._load_gym(gym_id))
+    
+    def _load_gym(self, gym_id: int) -> Optional[Dict]:
         self.cursor.execute('SELECT * FROM gyms WHERE id = ?', (gym_id,))
         gym = self.cursor.fetchone()
         if gym:
@@ -107,17 +120,45 @@ class GymDB:
     
     def get_all_gyms(self) -> List[Dict]:
         """Get all gyms."""
+        return read_cache.get(self.conn, self.db_path, 'gyms', ('all',), self._load_all_gyms)
+    
+    def _load_all_gyms(self) -> List[Dict]:
         self.cursor.execute('SELECT * FROM gyms ORDER BY name')
         return [dict(row) for row in self.cursor.fetchall()]
     
     def get_gym_equipment(self, gym_id: int) -> List[Dict]:
         """Get all equipment for a specific gym."""
+        return read_cache.get(self.conn, self.db_path, 'equipment', ('gym', gym_id),
+                              lambda: self._load_gym_equipment(gym_id))
+    
+    def _load_gym_equipment(self, gym_id: int) -> List[Dict]:
         self.cursor.execute('SELECT * FROM equipment WHERE gym_id = ? ORDER BY category, name', (gym_id,))
         return [dict(row) for row in self.cursor.fetchall()]
     
     def close(self):
-        """Close the database connection."""
-        self.conn.close()
+        """Release the pooled connection, rolling back any unfinished transaction."""
+        self.cursor.close()
+        if self.conn.in_transaction:
+            self.conn.rollback()
+
+# Model used for each provider the form offers
+PROVIDER_MODELS = {
+    'openai': 'openai/gpt-4o-mini',
+    'claude': 'anthropic/claude-3-opus-20240229',
+}
+
+# Seconds one provider gets per generation before failing over to the other
+LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', DEFAULT_TIMEOUT))
+# Start the other provider when the first is slower than its p95 (LLM_HEDGING=1)
+LLM_HEDGING = os.environ.get('LLM_HEDGING', '0') == '1'
+LLM_HEDGE_DELAY = float(os.environ.get('LLM_HEDGE_DELAY', DEFAULT_HEDGE_DELAY))
+
+# Formulaic requests are planned locally: auto (route them), off (always use the LLM)
+# or only (never call an LLM). With no API key configured every request is local.
+LOCAL_PLANNER = os.environ.get('LOCAL_PLANNER', 'auto')
+
+# Prompt tokens allowed for the exercise and equipment context
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET))
 
 # DSPy Classes for Workout Generation
 class Exercise(dspy.Signature):
@@ -127,14 +168,11 @@ class Exercise(dspy.Signature):
     muscle_group: str = dspy.OutputField()
     equipment: str = dspy.OutputField()
 
-class WorkoutRequest(dspy.Signature):
-    """A request for a workout."""
-    description: str = dspy.InputField()
-    gym_equipment: List[Dict] = dspy.InputField()
-    available_exercises: List[Dict] = dspy.InputField()
-
-class WorkoutPlan(dspy.Signature):
-    """A workout plan with exercises."""
+class GenerateWorkout(dspy.Signature):
+    """Design a workout plan for the request from the available exercises and gym equipment."""
+    request: str = dspy.InputField(desc="What the user asked for")
+    gym_equipment: str = dspy.InputField(desc="Gym equipment, one line per category: name xquantity")
+    available_exercises: str = dspy.InputField(desc="Candidate exercises as an id|name|muscle_group|equipment table")
     title: str = dspy.OutputField()
     description: str = dspy.OutputField()
     exercises: List[Dict[str, Any]] = dspy.OutputField()
@@ -142,126 +180,134 @@ class WorkoutPlan(dspy.Signature):
     rest_times: List[str] = dspy.OutputField()
     notes: str = dspy.OutputField()
 
+# A missing or unreadable semantic index is reported once, not on every request
+_semantic_search_warned = False
+
 class WorkoutGenerator(dspy.Module):
     """Module to generate a workout plan based on user input and available equipment."""
     
-    def __init__(self):
+    def __init__(self, token_budget=None):
         super().__init__()
-        self.generate_workout = dspy.ChainOfThought(
-            WorkoutRequest, WorkoutPlan
-        )
-        # Use ExerciseDB directly instead of a retriever
-        self.exercise_db = ExerciseDB()
+        self.generate_workout = dspy.ChainOfThought(GenerateWorkout)
+        self.packer = PromptPacker(token_budget or PROMPT_TOKEN_BUDGET)
     
-    def forward(self, description: str, gym_equipment: List[Dict]) -> WorkoutPlan:
+    def forward(self, description: str, gym_equipment: List[Dict]) -> dspy.Prediction:
         """Generate a workout plan based on user description and gym equipment."""
-        # Find relevant exercises using direct database queries
+        # Find relevant exercises using the in-memory catalog index
         # Extract potential muscle groups and equipment from description
-        relevant_exercises = self.find_exercises_for_workout(description)
+        with metrics.time_phase('retrieve_exercises'):
+            relevant_exercises = self.find_exercises_for_workout(description)
+            relevant_exercises = self.filter_for_gym(relevant_exercises, gym_equipment)
+        
+        # Fit the candidates and equipment into the prompt budget as compact tables
+        with metrics.time_phase('pack_context'):
+            packed = self.packer.pack(relevant_exercises, gym_equipment)
+        metrics.record_packed_context(packed)
         
         # Generate the workout plan
-        workout_request = WorkoutRequest(
-            description=description,
-            gym_equipment=gym_equipment,
-            available_exercises=relevant_exercises
-        )
-        workout_plan = self.generate_workout(workout_request)
+        with metrics.time_phase('chain_of_thought'):
+            workout_plan = self.generate_workout(
+                request=description,
+                gym_equipment=packed.equipment,
+                available_exercises=packed.exercises
+            )
         
         return workout_plan
     
+    def filter_for_gym(self, exercises, gym_equipment):
+        """Drop exercises the gym has no equipment for (unless that would drop them all)."""
+        if not gym_equipment:
+            return exercises
+        equipment_index = get_equipment_index()
+        available = equipment_index.availability(item['name'] for item in gym_equipment)
+        return equipment_index.filter(exercises, available) or exercises
+    
     def find_exercises_for_workout(self, description):
         """Find exercises that match the workout description."""
         # Extract potential muscle groups and equipment from description
-        muscle_groups = self._extract_muscle_groups(description)
-        equipment = self._extract_equipment(description)
-        
-        # Build query based on extracted terms
-        params = []
-        conditions = []
-        
-        if muscle_groups:
-            placeholders = ', '.join(['?'] * len(muscle_groups))
-            conditions.append(f"muscle_group IN ({placeholders})")
-            params.extend(muscle_groups)
-        
-        if equipment:
-            placeholders = ', '.join(['?'] * len(equipment))
-            conditions.append(f"equipment IN ({placeholders})")
-            params.extend(equipment)
-        
-        # If no specific conditions, return a diverse set
-        if not conditions:
-            # Get a variety of exercises across different muscle groups
+        muscle_groups, equipment = extract_terms(description)
+        
+        # If no specific terms, look for exercises close in meaning ("posterior chain day")
+        if not muscle_groups and not equipment:
+            try:
+                similar = find_similar_exercises(description)
+            except OSError as e:
+                global _semantic_search_warned
+                if not _semantic_search_warned:
+                    _semantic_search_warned = True
+                    app.logger.warning("Semantic exercise search unavailable: %s", e)
+                similar = []
+            if similar:
+                return similar
+            # Otherwise get a variety of exercises across different muscle groups
             return self._get_diverse_exercise_set()
         
-        # Execute the query
-        query = f"SELECT * FROM exercises WHERE {' OR '.join(conditions)}"
-        self.exercise_db.cursor.execute(query, params)
-        return [dict(row) for row in self.exercise_db.cursor.fetchall()]
+        # Look up matches in the in-memory catalog index
+        return get_exercise_index().find(muscle_groups, equipment)
     
     def _get_diverse_exercise_set(self, limit_per_group=3):
         """Get a diverse set of exercises covering different muscle groups."""
-        # Get distinct muscle groups
-        self.exercise_db.cursor.execute("SELECT DISTINCT muscle_group FROM exercises")
-        muscle_groups = [row[0] for row in self.exercise_db.cursor.fetchall()]
-        
-        # Get exercises for each muscle group
-        results = []
-        for group in muscle_groups:
-            self.exercise_db.cursor.execute(
-                "SELECT * FROM exercises WHERE muscle_group = ? LIMIT ?", 
-                (group, limit_per_group)
-            )
-            results.extend([dict(row) for row in self.exercise_db.cursor.fetchall()])
-        
-        return results
+        return get_exercise_index().diverse_set(limit_per_group)
     
     def _extract_muscle_groups(self, description):
-        """Extract potential muscle groups from a description."""
-        common_muscle_groups = [
-            "Chest", "Back", "Legs", "Shoulders", "Arms", 
-            "Biceps", "Triceps", "Abs", "Core", "Glutes", 
-            "Quads", "Hamstrings", "Calves"
-        ]
-        
-        # Find mentioned muscle groups
-        found_groups = []
-        description_lower = description.lower()
-        
-        for group in common_muscle_groups:
-            if group.lower() in description_lower:
-                found_groups.append(group)
-        
-        return found_groups
+        """Extract catalog muscle groups (including synonyms like "glutes") from a description."""
+        return extract_terms(description)[0]
     
     def _extract_equipment(self, description):
-        """Extract potential equipment from a description."""
-        common_equipment = [
-            "Barbell", "Dumbbells", "Machine", "Cable", "Bodyweight",
-            "Kettlebell", "Resistance Band", "Smith Machine", "TRX"
-        ]
-        
-        # Find mentioned equipment
-        found_equipment = []
-        description_lower = description.lower()
-        
-        for equip in common_equipment:
-            if equip.lower() in description_lower:
-                found_equipment.append(equip)
-        
-        return found_equipment
+        """Extract catalog equipment (including synonyms like "cables") from a description."""
+        return extract_terms(description)[1]
 
 # No longer using setup_vector_db - directly querying SQLite instead
 
+class LMMetricsCallback(BaseCallback):
+    """Record latency and token usage of every LM call for /metrics."""
+    
+    def __init__(self):
+        self._calls = {}
+    
+    def on_lm_start(self, call_id, instance, inputs):
+        self._calls[call_id] = (instance, time.perf_counter())
+    
+    def on_lm_end(self, call_id, outputs, exception=None):
+        instance, start = self._calls.pop(call_id, (None, None))
+        if instance is None:
+            return
+        labels = (metrics.provider_of(instance.model), instance.model)
+        metrics.LLM_LATENCY.observe(time.perf_counter() - start, *labels)
+        if exception is not None:
+            metrics.LLM_ERRORS.inc(1, *labels)
+            return
+        
+        # The LM appends each call (with the provider's usage block) to its own history
+        usage = instance.history[-1].get('usage') if instance.history else None
+        if usage:
+            metrics.LLM_TOKENS.inc(usage.get('prompt_tokens') or 0, *labels, 'prompt')
+            metrics.LLM_TOKENS.inc(usage.get('completion_tokens') or 0, *labels, 'completion')
+
+lm_callbacks = [LMMetricsCallback()] if metrics.ENABLED else []
+
+def configured_providers():
+    """Providers with an API key in the environment."""
+    return [provider for provider, key in (('openai', 'OPENAI_API_KEY'), ('claude', 'ANTHROPIC_API_KEY'))
+            if os.environ.get(key)]
+
+def provider_key(provider):
+    """Normalize a form value to a PROVIDER_MODELS key (anything unknown is OpenAI)."""
+    return 'claude' if (provider or '').lower() == 'claude' else 'openai'
+
 def configure_lm(provider='openai'):
-    """Configure the language model based on provider."""
-    if provider.lower() == 'claude':
+    """Configure the language model based on provider.
+    
+    Requests time out after LLM_TIMEOUT so an attempt the dispatcher abandoned
+    doesn't hold a worker thread forever.
+    """
+    if provider_key(provider) == 'claude':
         # Set up Anthropic Claude
         api_key = os.environ.get('ANTHROPIC_API_KEY')
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not found")
         
-        return dspy.LM('anthropic/claude-3-opus-20240229', api_key=api_key)
+        return dspy.LM(PROVIDER_MODELS['claude'], api_key=api_key, callbacks=lm_callbacks, timeout=LLM_TIMEOUT)
     else:
         # Default to OpenAI
         api_key = os.environ.get('OPENAI_API_KEY')
@@ -270,155 +316,388 @@ def configure_lm(provider='openai'):
         
         # In dspy v2.0.0+, use ChatOpenAI instead of OpenAI
         try:
-            return dspy.LM('openai/gpt-4o-mini', api_key=api_key)
+            return dspy.LM(PROVIDER_MODELS['openai'], api_key=api_key, callbacks=lm_callbacks, timeout=LLM_TIMEOUT)
         except AttributeError:
             # Fallback for compatibility with different dspy versions
             import openai
             openai.api_key = api_key
-            return dspy.LM('openai/gpt-4o-mini', api_key=api_key)
+            return dspy.LM(PROVIDER_MODELS['openai'], api_key=api_key, callbacks=lm_callbacks, timeout=LLM_TIMEOUT)
 
 def bootstrap_examples():
-    """Create examples for bootstrapping."""
+    """Create examples for bootstrapping.
+    
+    Inputs are what ``WorkoutGenerator.forward`` takes; the expected plan
+    fields are only there for the metric and for reference.
+    """
     examples = [
         dspy.Example(
-            x=WorkoutRequest(
-                description="I want a quick full body workout with dumbbells",
-                gym_equipment=[
-                    {"name": "Dumbbells", "category": "Free Weights", "quantity": 10},
-                    {"name": "Bench", "category": "Free Weights", "quantity": 2}
-                ]
-            ),
-            y=WorkoutPlan(
-                title="Quick Full Body Dumbbell Workout",
-                description="A time-efficient full body workout using only dumbbells, perfect for building strength and endurance.",
-                exercises=[
-                    {"name": "Dumbbell Squat", "muscle_group": "Legs", "equipment": "Dumbbells", "sets": 3, "reps": 12},
-                    {"name": "Dumbbell Bench Press", "muscle_group": "Chest", "equipment": "Dumbbells", "sets": 3, "reps": 12},
-                    {"name": "Dumbbell Row", "muscle_group": "Back", "equipment": "Dumbbells", "sets": 3, "reps": 12},
-                    {"name": "Lateral Raise", "muscle_group": "Shoulders", "equipment": "Dumbbells", "sets": 3, "reps": 12},
-                    {"name": "Bicep Curl", "muscle_group": "Arms", "equipment": "Dumbbells", "sets": 3, "reps": 12},
-                    {"name": "Overhead Tricep Extension", "muscle_group": "Arms", "equipment": "Dumbbells", "sets": 3, "reps": 12},
-                ],
-                sets_and_reps=["3 sets of 12 reps for each exercise"],
-                rest_times=["60 seconds between sets", "90 seconds between exercises"],
-                notes="Start with a 5-minute warm-up. Use a weight that challenges you by the last rep. Focus on proper form rather than heavy weight."
-            )
-        ),
+            description="I want a quick full body workout with dumbbells",
+            gym_equipment=[
+                {"name": "Dumbbells", "category": "Free Weights", "quantity": 10},
+                {"name": "Bench", "category": "Free Weights", "quantity": 2}
+            ],
+            title="Quick Full Body Dumbbell Workout",
+            exercises=[
+                {"name": "Dumbbell Squat", "muscle_group": "Legs", "equipment": "Dumbbells", "sets": 3, "reps": 12},
+                {"name": "Dumbbell Bench Press", "muscle_group": "Chest", "equipment": "Dumbbells", "sets": 3, "reps": 12},
+                {"name": "Dumbbell Row", "muscle_group": "Back", "equipment": "Dumbbells", "sets": 3, "reps": 12},
+                {"name": "Lateral Raise", "muscle_group": "Shoulders", "equipment": "Dumbbells", "sets": 3, "reps": 12},
+                {"name": "Bicep Curl", "muscle_group": "Arms", "equipment": "Dumbbells", "sets": 3, "reps": 12},
+                {"name": "Overhead Tricep Extension", "muscle_group": "Arms", "equipment": "Dumbbells", "sets": 3, "reps": 12},
+            ],
+            sets_and_reps=["3 sets of 12 reps for each exercise"],
+            rest_times=["60 seconds between sets", "90 seconds between exercises"],
+            notes="Start with a 5-minute warm-up. Use a weight that challenges you by the last rep. Focus on proper form rather than heavy weight."
+        ).with_inputs('description', 'gym_equipment'),
         dspy.Example(
-            x=WorkoutRequest(
-                description="Help me design a chest and triceps workout for hypertrophy",
-                gym_equipment=[
-                    {"name": "Barbell", "category": "Free Weights", "quantity": 4},
-                    {"name": "Bench", "category": "Free Weights", "quantity": 3},
-                    {"name": "Dumbbells", "category": "Free Weights", "quantity": 10},
-                    {"name": "Cable Machine", "category": "Machines", "quantity": 2},
-                    {"name": "Chest Press Machine", "category": "Machines", "quantity": 1}
-                ]
-            ),
-            y=WorkoutPlan(
-                title="Chest and Triceps Hypertrophy Workout",
-                description="A targeted workout for chest and triceps with emphasis on muscular growth (hypertrophy).",
-                exercises=[
-                    {"name": "Bench Press", "muscle_group": "Chest", "equipment": "Barbell", "sets": 4, "reps": "8-12"},
-                    {"name": "Incline Bench Press", "muscle_group": "Chest", "equipment": "Barbell", "sets": 4, "reps": "8-12"},
-                    {"name": "Dumbbell Fly", "muscle_group": "Chest", "equipment": "Dumbbells", "sets": 3, "reps": "10-15"},
-                    {"name": "Cable Crossover", "muscle_group": "Chest", "equipment": "Cable Machine", "sets": 3, "reps": "12-15"},
-                    {"name": "Skull Crusher", "muscle_group": "Arms", "equipment": "EZ Bar", "sets": 4, "reps": "8-12"},
-                    {"name": "Tricep Extension", "muscle_group": "Arms", "equipment": "Cable Machine", "sets": 3, "reps": "12-15"},
-                    {"name": "Close-Grip Bench Press", "muscle_group": "Arms", "equipment": "Barbell", "sets": 3, "reps": "8-12"},
-                ],
-                sets_and_reps=["4 sets of 8-12 reps for compound movements", "3 sets of 10-15 reps for isolation exercises"],
-                rest_times=["90-120 seconds between sets for compound exercises", "60 seconds between sets for isolation exercises"],
-                notes="For hypertrophy, aim for moderate weight with higher volume. Focus on the mind-muscle connection and consider techniques like drop sets or supersets for advanced stimulus."
-            )
-        )
+            description="Help me design a chest and triceps workout for hypertrophy",
+            gym_equipment=[
+                {"name": "Barbell", "category": "Free Weights", "quantity": 4},
+                {"name": "Bench", "category": "Free Weights", "quantity": 3},
+                {"name": "Dumbbells", "category": "Free Weights", "quantity": 10},
+                {"name": "Cable Machine", "category": "Machines", "quantity": 2},
+                {"name": "Chest Press Machine", "category": "Machines", "quantity": 1}
+            ],
+            title="Chest and Triceps Hypertrophy Workout",
+            exercises=[
+                {"name": "Bench Press", "muscle_group": "Chest", "equipment": "Barbell", "sets": 4, "reps": "8-12"},
+                {"name": "Incline Bench Press", "muscle_group": "Chest", "equipment": "Barbell", "sets": 4, "reps": "8-12"},
+                {"name": "Dumbbell Fly", "muscle_group": "Chest", "equipment": "Dumbbells", "sets": 3, "reps": "10-15"},
+                {"name": "Cable Crossover", "muscle_group": "Chest", "equipment": "Cable Machine", "sets": 3, "reps": "12-15"},
+                {"name": "Skull Crusher", "muscle_group": "Arms", "equipment": "EZ Bar", "sets": 4, "reps": "8-12"},
+                {"name": "Tricep Extension", "muscle_group": "Arms", "equipment": "Cable Machine", "sets": 3, "reps": "12-15"},
+                {"name": "Close-Grip Bench Press", "muscle_group": "Arms", "equipment": "Barbell", "sets": 3, "reps": "8-12"},
+            ],
+            sets_and_reps=["4 sets of 8-12 reps for compound movements", "3 sets of 10-15 reps for isolation exercises"],
+            rest_times=["90-120 seconds between sets for compound exercises", "60 seconds between sets for isolation exercises"],
+            notes="For hypertrophy, aim for moderate weight with higher volume. Focus on the mind-muscle connection and consider techniques like drop sets or supersets for advanced stimulus."
+        ).with_inputs('description', 'gym_equipment')
     ]
     return examples
 
+def plan_is_complete(example, prediction, trace=None):
+    """Bootstrap metric: keep a trace only if it produced a titled plan with exercises."""
+    return bool(getattr(prediction, 'title', None)) and bool(getattr(prediction, 'exercises', None))
+
+def compile_workout_generator(lm):
+    """Compile a WorkoutGenerator against the bootstrap examples using the given LM."""
+    with metrics.time_phase('compile'), dspy.settings.context(lm=lm):
+        # Demos come only from bootstrapped traces; the raw examples don't match the predictor's fields
+        teleprompter = dspy.teleprompt.BootstrapFewShot(
+            metric=plan_is_complete, max_bootstrapped_demos=2, max_labeled_demos=0)
+        return teleprompter.compile(WorkoutGenerator(), trainset=bootstrap_examples())
+
+# Compiled programs are shared by every request in this process
+program_registry = ProgramRegistry('app_workout_generator', WorkoutGenerator, compile_workout_generator)
+
+def warm_program_registry():
+    """Load or compile programs for every provider with an API key configured."""
+    lms = {}
+    for provider in PROVIDER_MODELS:
+        try:
+            lms[provider] = configure_lm(provider)
+        except ValueError:
+            continue
+    program_registry.warm(lms)
+
+# Generated plans are reused for near-identical requests against the same gym
+plan_cache = PlanCache()
+
+# Plans are generated off the request thread so web workers stay free
+job_queue = JobQueue()
+
+# Deterministic planner for requests that don't need a language model
+local_planner = LocalPlanner()
+
+# Generation calls go to the requested provider first and fail over (or hedge) to the others
+llm_dispatcher = LLMDispatcher(timeout=LLM_TIMEOUT, hedge=LLM_HEDGING, default_hedge_delay=LLM_HEDGE_DELAY)
+atexit.register(llm_dispatcher.shutdown)
+
+def run_workout_generator(provider, description, gym_equipment):
+    """One generation attempt against a single provider."""
+    with metrics.time_phase('configure_lm'):
+        lm = configure_lm(provider)
+    
+    # Reuse the compiled generator for this provider/model
+    with metrics.time_phase('load_program'):
+        optimized_generator = program_registry.get(provider, lm)
+    
+    with metrics.time_phase('generate'), dspy.settings.context(lm=lm):
+        return optimized_generator(description, gym_equipment)
+
+def record_plan_route(route):
+    """Count where a plan came from (cache, local or llm)."""
+    if metrics.ENABLED:
+        metrics.PLAN_ROUTES.inc(1, route)
+
+def use_local_planner(provider, description, gym_equipment, regenerate=False):
+    """Whether this request should be planned locally instead of by an LLM."""
+    if provider == 'local' or LOCAL_PLANNER == 'only' or not configured_providers():
+        return True
+    # A regenerate asks for something different from what a fixed template gives
+    if LOCAL_PLANNER == 'off' or regenerate:
+        return False
+    return local_planner.route(description, gym_equipment).local
+
+def generate_workout_plan(provider, description, gym_equipment, regenerate=False):
+    """Generate (or fetch from the cache) a workout plan as a plain dict."""
+    # Formulaic requests are answered from the catalog without a network call
+    if use_local_planner(provider, description, gym_equipment, regenerate):
+        with metrics.time_phase('local_plan'):
+            plan = local_planner.plan(description, gym_equipment)
+        record_plan_route('local')
+        return plan
+    
+    requested = provider_key(provider)
+    
+    # Serve a cached plan from the requested model unless the user asked for a fresh one
+    with metrics.time_phase('plan_cache'):
+        plan = None if regenerate else plan_cache.get(
+            plan_cache.make_key(description, gym_equipment, PROVIDER_MODELS[requested]))
+    if plan is not None:
+        record_plan_route('cache')
+        return plan
+    
+    # Generate the workout plan, failing over to the other configured providers if needed
+    configured = configured_providers()
+    providers = [p for p in [requested] + list(PROVIDER_MODELS) if p in configured]
+    workout_plan, winner = llm_dispatcher.call(
+        providers, lambda p: run_workout_generator(p, description, gym_equipment), requested=requested)
+    
+    plan = {
+        'title': workout_plan.title,
+        'description': workout_plan.description,
+        'exercises': workout_plan.exercises,
+        'sets_and_reps': workout_plan.sets_and_reps,
+        'rest_times': workout_plan.rest_times,
+        'notes': workout_plan.notes
+    }
+    # Filed under the model that wrote it, so a failover plan is never served as the requested model's
+    plan_cache.put(plan_cache.make_key(description, gym_equipment, PROVIDER_MODELS[winner]), plan)
+    record_plan_route('llm')
+    return plan
+
 # Workout tracking and history
 class WorkoutTracker:
     def __init__(self, db_path='data/workouts.db'):
         """Initialize the workout tracker database."""
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+        # Reuse this thread's pooled connection; the schema is checked once per process
+        self.db_path = db_path
+        self.conn = db.get_connection(db_path)
         self.cursor = self.conn.cursor()
-        self._create_tables()
+        db.ensure_schema(db_path, self._create_tables)
     
     def _create_tables(self):
-        """Create the necessary tables if they don't exist."""
-        # Create workouts table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS workouts (
-            id INTEGER PRIMARY KEY,
-            title TEXT NOT NULL,
-            description TEXT,
-            date TEXT NOT NULL,
-            gym_id INTEGER,
-            workout_data TEXT NOT NULL
-        )
-        ''')
+        """Create or upgrade the schema through the shared migrations."""
+        migrations.migrate(self.conn, 'workouts')
+    
+    def save_workout(self, title, description, gym_id, workout_data, archive_raw=True):
+        """Save a workout plan to the database.
         
-        # Create workout_logs table for tracking sets, reps, weights
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS workout_logs (
-            id INTEGER PRIMARY KEY,
-            workout_id INTEGER NOT NULL,
-            exercise_name TEXT NOT NULL,
-            set_number INTEGER NOT NULL,
-            reps INTEGER,
-            weight REAL,
-            rest_time INTEGER,
-            notes TEXT,
-            timestamp TEXT NOT NULL,
-            FOREIGN KEY (workout_id) REFERENCES workouts (id)
-        )
-        ''')
+        The plan's exercises are stored as workout_exercises rows. The raw JSON
+        is kept in workout_data only as an archive when ``archive_raw`` is set.
+        """
+        date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        self.conn.commit()
+        if isinstance(workout_data, str):
+            workout_data = json.loads(workout_data)
+        raw = json.dumps(workout_data) if archive_raw else '{}'
+        
+        try:
+            self.cursor.execute(
+                'INSERT INTO workouts (title, description, date, gym_id, workout_data) VALUES (?, ?, ?, ?, ?)',
+                (title, description, date, gym_id, raw)
+            )
+            workout_id = self.cursor.lastrowid
+            plan_storage.insert_plan(self.conn, workout_id, workout_data)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        return workout_id
     
-    def save_workout(self, title, description, gym_id, workout_data):
-        """Save a workout plan to the database."""
-        date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    def log_exercise_set(self, workout_id, exercise_name, set_number, reps=None, weight=None, rest_time=None, notes=None,
+                         client_id=None):
+        """Log a completed exercise set.
         
-        # Convert workout data to JSON string
-        if isinstance(workout_data, dict):
-            workout_data = json.dumps(workout_data)
+        A repeated ``client_id`` is ignored so client retries don't duplicate rows.
+        """
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         self.cursor.execute(
-            'INSERT INTO workouts (title, description, date, gym_id, workout_data) VALUES (?, ?, ?, ?, ?)',
-            (title, description, date, gym_id, workout_data)
+            'INSERT INTO workout_logs (workout_id, exercise_name, set_number, reps, weight, rest_time, notes, timestamp, client_id) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT DO NOTHING',
+            (workout_id, exercise_name, set_number, reps, weight, rest_time, notes, timestamp, client_id)
         )
+        log_id = self.cursor.lastrowid if self.cursor.rowcount else None
+        if log_id:
+            self._bump_log_versions([workout_id])
         self.conn.commit()
-        return self.cursor.lastrowid
+        return log_id
     
-    def log_exercise_set(self, workout_id, exercise_name, set_number, reps=None, weight=None, rest_time=None, notes=None):
-        """Log a completed exercise set."""
+    def log_exercise_sets(self, sets, with_ids=False):
+        """Log several completed sets with one executemany in a single transaction.
+        
+        Each set is a dict with the same keys as ``log_exercise_set`` arguments,
+        plus an optional ``timestamp``. Sets whose ``client_id`` was already
+        logged (or appears earlier in ``sets``) are skipped. Returns the number
+        of rows inserted, or with ``with_ids`` a list holding each set's new
+        log id (None if skipped).
+        """
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            client_ids = sorted({s['client_id'] for s in sets if s.get('client_id') is not None})
+            seen = set()
+            for start in range(0, len(client_ids), 500):
+                chunk = client_ids[start:start + 500]
+                self.cursor.execute(
+                    f"SELECT client_id FROM workout_logs WHERE client_id IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                )
+                seen.update(row[0] for row in self.cursor.fetchall())
+            
+            # Ids are assigned here, under the write lock, so callers learn them without per-row inserts
+            self.cursor.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM workout_logs')
+            next_id = self.cursor.fetchone()[0]
+            rows, log_ids = [], []
+            for s in sets:
+                client_id = s.get('client_id')
+                if client_id is not None:
+                    if client_id in seen:
+                        log_ids.append(None)
+                        continue
+                    seen.add(client_id)
+                rows.append((
+                    next_id, s['workout_id'], s['exercise_name'], s['set_number'],
+                    s.get('reps'), s.get('weight'), s.get('rest_time'), s.get('notes'),
+                    s.get('timestamp') or timestamp, client_id
+                ))
+                log_ids.append(next_id)
+                next_id += 1
+            
+            self.cursor.executemany(
+                'INSERT INTO workout_logs (id, workout_id, exercise_name, set_number, reps, weight, rest_time, notes, timestamp, client_id) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._bump_log_versions([row[1] for row in rows])
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        return log_ids if with_ids else len(rows)
+    
+    def _bump_log_versions(self, workout_ids):
+        """Mark workouts as changed so cached summaries and their ETags go stale (caller commits)."""
+        self.conn.executemany(
+            'UPDATE workouts SET log_version = log_version + 1 WHERE id = ?',
+            [(workout_id,) for workout_id in sorted(set(workout_ids))]
+        )
+    
+    def get_workout_state(self, workout_id):
+        """``finished_at`` and ``log_version`` for a workout, or None if it doesn't exist."""
+        self.cursor.execute('SELECT finished_at, log_version FROM workouts WHERE id = ?', (workout_id,))
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
+    
+    def finish_workout(self, workout_id):
+        """Mark a workout finished (the first time only); returns False if it doesn't exist."""
+        finished_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         self.cursor.execute(
-            'INSERT INTO workout_logs (workout_id, exercise_name, set_number, reps, weight, rest_time, notes, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
-            (workout_id, exercise_name, set_number, reps, weight, rest_time, notes, timestamp)
+            'UPDATE workouts SET finished_at = COALESCE(finished_at, ?) WHERE id = ?',
+            (finished_at, workout_id)
         )
         self.conn.commit()
-        return self.cursor.lastrowid
+        return self.cursor.rowcount > 0
     
     def get_workout(self, workout_id):
-        """Get a workout by ID."""
-        self.cursor.execute('SELECT * FROM workouts WHERE id = ?', (workout_id,))
+        """Get a workout by ID, with its plan rebuilt from workout_exercises."""
+        self.cursor.execute(
+            'SELECT id, title, description, date, gym_id, notes, sets_and_reps, rest_times, plan_normalized '
+            'FROM workouts WHERE id = ?',
+            (workout_id,)
+        )
         workout = self.cursor.fetchone()
-        if workout:
-            result = dict(workout)
-            result['workout_data'] = json.loads(result['workout_data'])
-            return result
-        return None
+        if not workout:
+            return None
+        
+        if not workout['plan_normalized']:
+            # Rows the backfill couldn't parse still only exist as raw JSON
+            self.cursor.execute('SELECT workout_data FROM workouts WHERE id = ?', (workout_id,))
+            workout_data = json.loads(self.cursor.fetchone()['workout_data'])
+        else:
+            self.cursor.execute(
+                'SELECT * FROM workout_exercises WHERE workout_id = ? ORDER BY position',
+                (workout_id,)
+            )
+            workout_data = plan_storage.build_plan(workout, self.cursor.fetchall())
+        
+        result = {key: workout[key] for key in ('id', 'title', 'description', 'date', 'gym_id')}
+        result['workout_data'] = workout_data
+        return result
+    
+    def find_workouts_with_exercise(self, exercise_name, limit=50):
+        """Get workouts (list columns only) whose plan includes the named exercise."""
+        self.cursor.execute('''
+            SELECT w.id, w.title, w.description, w.date, w.gym_id
+            FROM workouts w
+            WHERE w.id IN (SELECT workout_id FROM workout_exercises WHERE name = ?)
+            ORDER BY w.date DESC, w.id DESC
+            LIMIT ?
+        ''', (exercise_name, limit))
+        return [dict(w) for w in self.cursor.fetchall()]
     
     def get_recent_workouts(self, limit=10):
-        """Get recent workouts."""
-        self.cursor.execute('SELECT * FROM workouts ORDER BY date DESC LIMIT ?', (limit,))
-        workouts = self.cursor.fetchall()
-        return [dict(w) for w in workouts]
+        """Get recent workouts (list columns only, without workout_data)."""
+        return read_cache.get(self.conn, self.db_path, 'workouts', ('recent', limit),
+                              lambda: self.get_workout_page(page_size=limit)[0])
+    
+    def get_workout_page(self, page_size=20, cursor=None):
+        """Get one page of workouts, newest first, using keyset pagination on (date, id).
+        
+        Returns ``(workouts, next_cursor)``; pass ``next_cursor`` back in to get
+        the following page. ``next_cursor`` is None on the last page.
+        """
+        columns = 'id, title, description, date, gym_id'
+        if cursor:
+            before_date, before_id = self._decode_cursor(cursor)
+            self.cursor.execute(
+                f'SELECT {columns} FROM workouts WHERE (date, id) < (?, ?) '
+                'ORDER BY date DESC, id DESC LIMIT ?',
+                (before_date, before_id, page_size + 1)
+            )
+        else:
+            self.cursor.execute(
+                f'SELECT {columns} FROM workouts ORDER BY date DESC, id DESC LIMIT ?',
+                (page_size + 1,)
+            )
+        workouts = [dict(w) for w in self.cursor.fetchall()]
+        
+        # The extra row only tells us whether another page exists
+        next_cursor = None
+        if len(workouts) > page_size:
+            workouts = workouts[:page_size]
+            last = workouts[-1]
+            next_cursor = self._encode_cursor(last['date'], last['id'])
+        return workouts, next_cursor
+    
+    @staticmethod
+    def _encode_cursor(date, workout_id):
+        """Opaque URL-safe cursor for a (date, id) position."""
+        return base64.urlsafe_b64encode(f'{date}|{workout_id}'.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def _decode_cursor(cursor):
+        """Decode a cursor produced by ``_encode_cursor``."""
+        try:
+            date, workout_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rsplit('|', 1)
+            return date, int(workout_id)
+        except (ValueError, UnicodeError) as e:
+            raise ValueError(f"Invalid page cursor: {cursor}") from e
     
     def get_workout_logs(self, workout_id):
         """Get all logs for a specific workout."""
@@ -427,8 +706,116 @@ class WorkoutTracker:
         return [dict(log) for log in logs]
     
     def close(self):
-        """Close the database connection."""
-        self.conn.close()
+        """Release the pooled connection, rolling back any unfinished transaction."""
+        self.cursor.close()
+        if self.conn.in_transaction:
+            self.conn.rollback()
+
+def _whole_number(value, field, required=False):
+    """``value`` as a non-negative int (numeric strings allowed), or None when optional and blank."""
+    if value is None or value == '':
+        if required:
+            raise ValueError(f"{field} is required")
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be a whole number")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a whole number") from None
+    if number != float(value) or number < 0:
+        raise ValueError(f"{field} must be a whole number")
+    return number
+
+def parse_logged_set(item):
+    """Validate one set sent to the logging API and return the row to write; raises ValueError."""
+    if not isinstance(item, dict):
+        raise ValueError("set must be an object")
+    exercise_name = item.get('exercise_name')
+    if not isinstance(exercise_name, str) or not exercise_name.strip():
+        raise ValueError("exercise_name is required")
+    weight = item.get('weight')
+    if weight is not None and weight != '':
+        try:
+            weight = float(weight)
+        except (TypeError, ValueError):
+            raise ValueError("weight must be a number") from None
+    else:
+        weight = None
+    notes = item.get('notes')
+    client_id = item.get('client_id')
+    if notes is not None and not isinstance(notes, str):
+        raise ValueError("notes must be text")
+    if client_id is not None and not isinstance(client_id, str):
+        raise ValueError("client_id must be text")
+    return {
+        'workout_id': _whole_number(item.get('workout_id'), 'workout_id', required=True),
+        'exercise_name': exercise_name.strip(),
+        'set_number': _whole_number(item.get('set_number'), 'set_number', required=True),
+        'reps': _whole_number(item.get('reps'), 'reps'),
+        'weight': weight,
+        'rest_time': _whole_number(item.get('rest_time'), 'rest_time'),
+        'notes': notes,
+        'client_id': client_id,
+    }
+
+def write_log_batch(sets):
+    """Commit a group of queued sets; runs on the group-commit writer thread."""
+    tracker = WorkoutTracker()
+    try:
+        log_ids = tracker.log_exercise_sets(sets, with_ids=True)
+    finally:
+        tracker.close()
+    # Sets logged after a workout was finished make its cached summary stale
+    summary_cache.invalidate({s['workout_id'] for s, log_id in zip(sets, log_ids) if log_id})
+    return log_ids
+
+# Rendered summaries of finished workouts, revalidated with strong ETags
+summary_cache = SummaryCache([os.path.join(app.root_path, 'templates', name)
+                              for name in ('workout_summary.html', 'base.html')])
+
+# All set logging goes through one writer thread that commits in groups
+LOG_ACK_TIMEOUT = 10
+log_writer = GroupCommitWriter(write_log_batch, max_batch=50)
+atexit.register(log_writer.close)
+
+def init_databases():
+    """Run the one-time schema checks before the first request."""
+    GymDB().close()
+    WorkoutTracker().close()
+    
+    if os.path.exists('data/exercises.db'):
+        migrations.migrate(db.get_connection('data/exercises.db'), 'exercises')
+
+init_databases()
+
+# Load the logged-set history now rather than on the first /progress request
+warm_progress_report()
+
+@app.teardown_request
+def release_db_connections(exc):
+    """Return pooled connections in a clean state, even when a route raised."""
+    db.release_connections()
+
+if metrics.ENABLED:
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+    
+    @app.after_request
+    def record_request_latency(response):
+        """Observe the request under its route pattern so ids don't explode the label set."""
+        start = g.pop('request_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.REQUEST_LATENCY.observe(time.perf_counter() - start,
+                                            request.method, route, str(response.status_code))
+        return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request, SQL and LLM latency in the Prometheus text format."""
+    return metrics.registry.render(), 200, {'Content-Type': metrics.CONTENT_TYPE}
 
 # Flask routes
 @app.route('/')
@@ -454,7 +841,8 @@ def index():
                           api_key_status={
                               'openai': bool(os.environ.get('OPENAI_API_KEY')),
                               'claude': bool(os.environ.get('ANTHROPIC_API_KEY'))
-                          })
+                          },
+                          local_only=LOCAL_PLANNER == 'only' or not configured_providers())
 
 @app.route('/setup', methods=['GET', 'POST'])
 def setup():
@@ -486,24 +874,22 @@ def new_gym():
                 equipment_data.append({
                     'name': equipment_names[i],
                     'category': equipment_categories[i],
-                    'quantity': int(equipment_quantities[i] or 1),
+                    'quantity': equipment_quantities[i],
                     'description': equipment_descriptions[i] if equipment_descriptions[i].strip() else None
                 })
         
-        # Save to database
-        gym_db = GymDB()
-        gym_id = gym_db.add_gym(gym_name, location, description)
-        
-        for item in equipment_data:
-            gym_db.add_equipment(
-                gym_id=gym_id,
-                name=item['name'],
-                category=item['category'],
-                quantity=item['quantity'],
-                description=item['description']
-            )
+        try:
+            gym = normalize_gym({'name': gym_name, 'location': location, 'description': description,
+                                 'equipment': equipment_data})
+        except ValueError as e:
+            return f"Invalid gym: {e}", 400
         
-        gym_db.close()
+        # Save the gym and all its equipment in one transaction
+        gym_db = GymDB()
+        try:
+            GymImporter(gym_db.conn, upsert=False).import_batch([gym])
+        finally:
+            gym_db.close()
         
         return redirect(url_for('index'))
     
@@ -533,6 +919,17 @@ def view_gym(gym_id):
                           equipment=equipment, 
                           equipment_by_category=equipment_by_category)
 
+@app.route('/api/gym/<int:gym_id>/exercises')
+def gym_exercises(gym_id):
+    """Every catalog exercise the gym has the equipment for."""
+    gym_db = GymDB()
+    gym = gym_db.get_gym(gym_id)
+    gym_db.close()
+    if not gym:
+        return jsonify({'error': 'Gym not found'}), 404
+    exercises = exercises_doable_at_gym(gym_id)
+    return jsonify({'gym_id': gym_id, 'count': len(exercises), 'exercises': exercises})
+
 @app.route('/workout/new', methods=['GET', 'POST'])
 def new_workout():
     """Create a new workout."""
@@ -541,6 +938,7 @@ def new_workout():
         session['model_provider'] = request.form.get('model_provider', 'openai')
         session['gym_id'] = request.form.get('gym_id')
         workout_description = request.form.get('workout_description', '')
+        regenerate = request.form.get('regenerate') == 'on'
         
         # Get gym equipment if a gym was selected
         gym_equipment = []
@@ -556,39 +954,22 @@ def new_workout():
                 'quantity': item['quantity']
             } for item in equipment]
         
-        try:
-            # Configure LLM
-            dspy.settings.configure(lm=configure_lm(session['model_provider']))
-            
-            # Create and optimize the workout generator
-            workout_generator = WorkoutGenerator()
-            
-            # Bootstrap with examples for better performance
-            examples = bootstrap_examples()
-            teleprompter = dspy.teleprompt.BootstrapFewShot(metric=dspy.evaluate.answer_exact_match)
-            optimized_generator = teleprompter.compile(
-                workout_generator,
-                trainset=examples,
-                num_bootstrapped_examples=2
-            )
-            
-            # Generate the workout plan
-            workout_plan = optimized_generator(workout_description, gym_equipment)
-            
-            # Save to session for the confirm step
-            session['workout_plan'] = {
-                'title': workout_plan.title,
-                'description': workout_plan.description,
-                'exercises': workout_plan.exercises,
-                'sets_and_reps': workout_plan.sets_and_reps,
-                'rest_times': workout_plan.rest_times,
-                'notes': workout_plan.notes
-            }
-            
-            return redirect(url_for('confirm_workout'))
+        # Queue generation and hand back the job id right away
+        job_id = job_queue.submit('workout_plan', generate_workout_plan, {
+            'provider': session['model_provider'],
+            'description': workout_description,
+            'gym_equipment': gym_equipment,
+            'regenerate': regenerate
+        })
+        session['job_id'] = job_id
         
-        except Exception as e:
-            return render_template('error.html', error=str(e))
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({
+                'job_id': job_id,
+                'status_url': url_for('job_status', job_id=job_id)
+            }), 202
+        
+        return redirect(url_for('workout_job', job_id=job_id))
     
     # Get available gyms for the form
     gym_db = GymDB()
@@ -600,31 +981,77 @@ def new_workout():
                           api_key_status={
                               'openai': bool(os.environ.get('OPENAI_API_KEY')),
                               'claude': bool(os.environ.get('ANTHROPIC_API_KEY'))
-                          })
+                          },
+                          local_only=LOCAL_PLANNER == 'only' or not configured_providers())
+
+@app.route('/api/llm_dispatch/stats')
+def llm_dispatch_stats():
+    """API endpoint reporting provider latencies and which provider won each generation."""
+    return jsonify(llm_dispatcher.stats())
+
+@app.route('/api/plan_cache/stats')
+def plan_cache_stats():
+    """API endpoint reporting plan cache hit/miss counters."""
+    return jsonify(plan_cache.stats())
+
+@app.route('/workout/job/<job_id>')
+def workout_job(job_id):
+    """Wait for a queued workout plan to finish generating."""
+    job = job_queue.get(job_id)
+    if not job:
+        return "Job not found", 404
+    
+    if job['status'] == 'done':
+        return redirect(url_for('confirm_workout', job_id=job_id))
+    if job['status'] == 'failed':
+        return render_template('error.html', error=job['error'])
+    
+    return render_template('workout_job.html', job=job)
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """API endpoint reporting a generation job's status and finished plan."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'result': job['result'],
+        'error': job['error']
+    })
 
 @app.route('/workout/confirm', methods=['GET', 'POST'])
 def confirm_workout():
     """Confirm and save the generated workout."""
-    if 'workout_plan' not in session:
+    job_id = request.args.get('job_id') or session.get('job_id')
+    job = job_queue.get(job_id) if job_id else None
+    if not job:
         return redirect(url_for('new_workout'))
+    if job['status'] != 'done':
+        return redirect(url_for('workout_job', job_id=job_id))
+    
+    workout_plan = job['result']
     
     if request.method == 'POST':
         # Save the workout to the database
         tracker = WorkoutTracker()
         workout_id = tracker.save_workout(
-            title=session['workout_plan']['title'],
-            description=session['workout_plan']['description'],
+            title=workout_plan['title'],
+            description=workout_plan['description'],
             gym_id=session.get('gym_id') if session.get('gym_id') != 'none' else None,
-            workout_data=session['workout_plan']
+            workout_data=workout_plan
         )
         tracker.close()
         
         # Clear session data
-        session.pop('workout_plan', None)
+        session.pop('job_id', None)
         
         return redirect(url_for('start_workout', workout_id=workout_id))
     
-    return render_template('confirm_workout.html', workout=session['workout_plan'])
+    return render_template('confirm_workout.html', workout=workout_plan, job_id=job_id)
 
 @app.route('/workout/<int:workout_id>/start')
 def start_workout(workout_id):
@@ -646,32 +1073,90 @@ def start_workout(workout_id):
 @app.route('/api/log_set', methods=['POST'])
 def log_set():
     """API endpoint to log a completed set."""
-    data = request.json
+    try:
+        row = parse_logged_set(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    row['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    # Responds once the group containing this set has committed
+    log_id = log_writer.submit(row).result(timeout=LOG_ACK_TIMEOUT)
+    
+    return jsonify({'success': True, 'log_id': log_id})
+
+@app.route('/api/log_sets', methods=['POST'])
+def log_sets():
+    """API endpoint to log a batch of completed sets."""
+    data = request.get_json(silent=True)
+    sets = data.get('sets') if isinstance(data, dict) else data
+    
+    if not isinstance(sets, list):
+        return jsonify({'success': False, 'error': 'Expected a list of sets'}), 400
+    
+    rows = []
+    for i, item in enumerate(sets):
+        try:
+            rows.append(parse_logged_set(item))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f"Set {i}: {e}"}), 400
+    
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    # The whole batch commits in one transaction, or none of it does
+    log_ids = log_writer.submit_many([dict(row, timestamp=timestamp) for row in rows]).result(timeout=LOG_ACK_TIMEOUT)
+    logged = sum(1 for log_id in log_ids if log_id is not None)
+    
+    return jsonify({'success': True, 'logged': logged, 'duplicates': len(sets) - logged})
+
+@app.route('/api/exercises/<path:exercise_name>/workouts')
+def exercise_workouts(exercise_name):
+    """API endpoint listing workouts that include an exercise."""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
     
     tracker = WorkoutTracker()
-    log_id = tracker.log_exercise_set(
-        workout_id=data['workout_id'],
-        exercise_name=data['exercise_name'],
-        set_number=data['set_number'],
-        reps=data.get('reps'),
-        weight=data.get('weight'),
-        rest_time=data.get('rest_time'),
-        notes=data.get('notes')
-    )
+    workouts = tracker.find_workouts_with_exercise(exercise_name, limit)
     tracker.close()
     
-    return jsonify({'success': True, 'log_id': log_id})
+    return jsonify({'success': True, 'exercise_name': exercise_name, 'workouts': workouts})
 
-@app.route('/workout/<int:workout_id>/summary')
-def workout_summary(workout_id):
-    """Display a summary of a completed workout."""
+@app.route('/api/log_writer/stats')
+def log_writer_stats():
+    """API endpoint reporting group-commit writer counters."""
+    return jsonify(log_writer.stats())
+
+@app.route('/api/workout/<int:workout_id>/finish', methods=['POST'])
+def finish_workout(workout_id):
+    """API endpoint marking a workout finished so its summary can be cached."""
     tracker = WorkoutTracker()
-    workout = tracker.get_workout(workout_id)
-    logs = tracker.get_workout_logs(workout_id)
+    finished = tracker.finish_workout(workout_id)
     tracker.close()
     
+    if not finished:
+        return jsonify({'success': False, 'error': 'Workout not found'}), 404
+    return jsonify({'success': True, 'summary_url': url_for('workout_summary', workout_id=workout_id)})
+
+@app.route('/api/summary_cache/stats')
+def summary_cache_stats():
+    """API endpoint reporting rendered summary cache counters."""
+    return jsonify(summary_cache.stats())
+
+@app.route('/api/read_cache/stats')
+def read_cache_stats():
+    """API endpoint reporting gym and workout read cache hit rates."""
+    return jsonify(read_cache.stats())
+
+@app.route('/api/session_store/stats')
+def session_store_stats():
+    """API endpoint reporting session store counters and cookie bytes saved."""
+    if session_interface is None:
+        return jsonify({'backend': 'cookie'})
+    return jsonify(session_interface.stats())
+
+def render_workout_summary(tracker, workout_id):
+    """Render the summary page, or None if the workout doesn't exist."""
+    workout = tracker.get_workout(workout_id)
     if not workout:
-        return "Workout not found", 404
+        return None
+    logs = tracker.get_workout_logs(workout_id)
     
     # Get gym info if applicable
     gym = None
@@ -692,19 +1177,112 @@ def workout_summary(workout_id):
                           logs_by_exercise=logs_by_exercise,
                           gym=gym)
 
+@app.route('/workout/<int:workout_id>/summary')
+def workout_summary(workout_id):
+    """Display a summary of a completed workout.
+    
+    Finished workouts are served from the summary cache with a strong ETag,
+    so a repeat view costs one indexed lookup and usually a bodyless 304.
+    """
+    tracker = WorkoutTracker()
+    try:
+        state = tracker.get_workout_state(workout_id)
+        if not state:
+            return "Workout not found", 404
+        
+        if not state['finished_at']:
+            # Still being logged; always render fresh
+            response = app.make_response(render_workout_summary(tracker, workout_id))
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+        
+        etag = summary_cache.etag(workout_id, state['log_version'])
+        if request.if_none_match.contains(etag):
+            summary_cache.record_not_modified()
+            response = app.response_class(status=304)
+        else:
+            body = summary_cache.get(workout_id, state['log_version'])
+            if body is None:
+                body = render_workout_summary(tracker, workout_id).encode('utf-8')
+                summary_cache.put(workout_id, state['log_version'], body)
+            response = app.response_class(body, mimetype='text/html')
+    finally:
+        tracker.close()
+    
+    # Browsers keep the page but check back, so a late set shows up on the next view
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @app.route('/workouts')
 def workout_history():
     """View workout history."""
+    page_size = min(max(request.args.get('page_size', 20, type=int), 1), 100)
+    cursor = request.args.get('cursor')
+    
     tracker = WorkoutTracker()
-    workouts = tracker.get_recent_workouts(50)  # Get up to 50 recent workouts
-    tracker.close()
+    try:
+        workouts, next_cursor = tracker.get_workout_page(page_size, cursor)
+    except ValueError:
+        return "Invalid page cursor", 400
+    finally:
+        tracker.close()
     
-    return render_template('workout_history.html', workouts=workouts)
+    return render_template('workout_history.html',
+                          workouts=workouts,
+                          next_cursor=next_cursor,
+                          page_size=page_size,
+                          is_first_page=not cursor)
+
+def load_progress(exercise, formula):
+    """Progress report data for the page and the API, or an error response tuple."""
+    if formula not in FORMULAS:
+        return None, ("Unknown 1RM formula", 400)
+    with metrics.time_phase('progress_report'):
+        report = progress_report(formula=formula)
+        data = {
+            'formula': formula,
+            'total_sets': report.total_sets,
+        }
+        if exercise:
+            data['exercise'] = exercise
+            data['history'] = report.exercise_history(exercise)
+        else:
+            data['exercises'] = report.exercise_summaries()
+            data['weekly_volume'] = report.weekly_volume()
+    return data, None
+
+@app.route('/progress')
+def progress():
+    """Estimated 1RM, volume, PRs and trends for every exercise ever logged."""
+    data, error = load_progress(request.args.get('exercise'), request.args.get('formula', 'epley'))
+    if error:
+        return error
+    return render_template('progress.html',
+                          exercise=data.get('exercise'),
+                          history=data.get('history'),
+                          exercises=data.get('exercises'),
+                          total_sets=data['total_sets'],
+                          formula=data['formula'],
+                          formulas=FORMULAS,
+                          max_e1rm_reps=MAX_E1RM_REPS)
+
+@app.route('/api/progress')
+def api_progress():
+    """Progression analytics as JSON; pass ?exercise= for one exercise's session history."""
+    data, error = load_progress(request.args.get('exercise'), request.args.get('formula', 'epley'))
+    if error:
+        return jsonify({'error': error[0]}), error[1]
+    if 'history' in data and data['history'] is None:
+        return jsonify({'error': 'Exercise not found'}), 404
+    return jsonify(data)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Run the Workout Vibe web application")
     parser.add_argument('--port', type=int, default=5001, help='Port to run the server on')
     parser.add_argument('--debug', action='store_true', help='Run in debug mode')
+    parser.add_argument('--warm-programs', action='store_true',
+                        help='Load or compile workout programs before serving requests')
     args = parser.parse_args()
     
     # Check if exercise database exists, create if not
@@ -712,4 +1290,7 @@ if __name__ == '__main__':
         print("Exercise database not found. Creating it now...")
         os.system('python create_exercise_db.py')
     
+    if args.warm_programs:
+        warm_program_registry()
+    
     app.run(host='0.0.0.0', port=args.port, debug=args.debug)
\ No newline at end of file
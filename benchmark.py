@@ -0,0 +1,338 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+import dspy
+
+import db
+
+# Canned plan returned by the stub LM and used to seed workouts if generation fails
+STUB_PLAN = {
+    'title': 'Benchmark Full Body Workout',
+    'description': 'Deterministic plan produced by the offline benchmark LM.',
+    'exercises': [
+        {'name': 'Squat', 'muscle_group': 'Legs', 'equipment': 'Barbell', 'sets': 3, 'reps': 8},
+        {'name': 'Bench Press', 'muscle_group': 'Chest', 'equipment': 'Barbell', 'sets': 3, 'reps': 8},
+        {'name': 'Bent Over Row', 'muscle_group': 'Back', 'equipment': 'Barbell', 'sets': 3, 'reps': 10},
+        {'name': 'Overhead Press', 'muscle_group': 'Shoulders', 'equipment': 'Barbell', 'sets': 3, 'reps': 10},
+    ],
+    'sets_and_reps': ['3 sets of 8-10 reps for each exercise'],
+    'rest_times': ['90 seconds between sets'],
+    'notes': 'Warm up for 5 minutes before starting.',
+}
+
+DESCRIPTIONS = [
+    'Quick 30 minute full body workout with dumbbells',
+    'Chest and triceps hypertrophy',
+    'Leg day for strength',
+    'Back and biceps with cables',
+    'Core and shoulders endurance circuit',
+]
+
+class StubLM(dspy.LM):
+    """Deterministic offline stand-in for dspy.LM with configurable latency."""
+
+    def __init__(self, model='stub/benchmark', latency: float = 0.0):
+        super().__init__(model, cache=False)
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _completion(self) -> str:
+        """The canned plan in DSPy's chat adapter field format."""
+        fields = {'reasoning': 'Balanced compound lifts for every major muscle group.'}
+        for key, value in STUB_PLAN.items():
+            fields[key] = value if isinstance(value, str) else json.dumps(value)
+        sections = [f'[[ ## {name} ## ]]\n{value}' for name, value in fields.items()]
+        return '\n\n'.join(sections) + '\n\n[[ ## completed ## ]]'
+
+    def __call__(self, prompt=None, messages=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._completion()]
+
+class QueryCounter:
+    """Counts SQL statements on every traced connection."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, statement: str):
+        with self._lock:
+            self.count += 1
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+class RouteStats:
+    """Latency samples, SQL counts and status codes for one route."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.queries: List[int] = []
+        self.statuses: Dict[int, int] = {}
+        # Span from the first request starting to the last finishing, for throughput
+        self.first_start = None
+        self.last_end = None
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, queries: int, status: int):
+        """Record a request that finished just now after ``latency`` seconds."""
+        end = time.perf_counter()
+        with self._lock:
+            start = end - latency
+            self.first_start = start if self.first_start is None else min(self.first_start, start)
+            self.last_end = end if self.last_end is None else max(self.last_end, end)
+            self.latencies.append(latency)
+            self.queries.append(queries)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self) -> Dict:
+        total = sum(self.latencies)
+        count = len(self.latencies)
+        # Wall-clock time the route was in use; summed latencies would ignore concurrency and gaps
+        span = self.last_end - self.first_start if count else 0.0
+        return {
+            'count': count,
+            'p50_ms': percentile(self.latencies, 50) * 1000,
+            'p95_ms': percentile(self.latencies, 95) * 1000,
+            'p99_ms': percentile(self.latencies, 99) * 1000,
+            'mean_ms': total / count * 1000 if count else 0.0,
+            'throughput_rps': count / span if span else 0.0,
+            'sql_queries_per_request': sum(self.queries) / count if count else 0.0,
+            'statuses': {str(code): n for code, n in sorted(self.statuses.items())},
+        }
+
+class Benchmark:
+    """Drives the Flask app through its test client and records per-route stats."""
+
+    def __init__(self, app_module, counter: QueryCounter, sets_per_exercise: int = 3, job_timeout: float = 60):
+        self.app_module = app_module
+        self.counter = counter
+        self.sets_per_exercise = sets_per_exercise
+        self.job_timeout = job_timeout
+        self.routes: Dict[str, RouteStats] = {}
+        self.generation_failures = 0
+        self.generation_errors: List[str] = []
+        self._lock = threading.Lock()
+
+    def _stats(self, route: str) -> RouteStats:
+        with self._lock:
+            if route not in self.routes:
+                self.routes[route] = RouteStats()
+            return self.routes[route]
+
+    def request(self, client, route: str, method: str, url: str, **kwargs):
+        """Issue one request and record it under ``route``.
+
+        Query counts are process-wide deltas, so they include background work
+        (job workers, the log writer) that finishes during the request.
+        """
+        queries_before = self.counter.count
+        start = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        elapsed = time.perf_counter() - start
+        self._stats(route).record(elapsed, self.counter.count - queries_before, response.status_code)
+        return response
+
+    def generate(self, client, description: str):
+        """Queue a plan, wait for it and confirm it; returns the new workout id."""
+        response = self.request(client, 'POST /workout/new', 'POST', '/workout/new', data={
+            'model_provider': 'openai',
+            'gym_id': 'none',
+            'workout_description': description,
+            'regenerate': 'on',
+        }, headers={'Accept': 'application/json'})
+        job_id = response.get_json()['job_id']
+
+        start = time.perf_counter()
+        job = None
+        while time.perf_counter() - start < self.job_timeout:
+            job = self.request(client, 'GET /api/jobs/<id>', 'GET', f'/api/jobs/{job_id}').get_json()
+            if job['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.005)
+        self._stats('generation (queue to done)').record(time.perf_counter() - start, 0, 200 if job and job['status'] == 'done' else 500)
+
+        if not job or job['status'] != 'done':
+            # Keep measuring the downstream routes with a seeded workout; main() fails the run afterwards
+            error = (job or {}).get('error') or f'job {job_id} timed out'
+            print(f"Generation failed for {description!r}: {error}", file=sys.stderr)
+            with self._lock:
+                self.generation_failures += 1
+                self.generation_errors.append(error)
+            tracker = self.app_module.WorkoutTracker()
+            workout_id = tracker.save_workout(STUB_PLAN['title'], STUB_PLAN['description'], None, STUB_PLAN)
+            tracker.close()
+            return workout_id
+
+        self.request(client, 'GET /workout/confirm', 'GET', f'/workout/confirm?job_id={job_id}')
+        response = self.request(client, 'POST /workout/confirm', 'POST', f'/workout/confirm?job_id={job_id}')
+        return int(response.location.rstrip('/').split('/')[-2])
+
+    def iteration(self, i: int):
+        """One member's visit: browse, generate, train, review."""
+        client = self.app_module.app.test_client()
+        self.request(client, 'GET /', 'GET', '/')
+        self.request(client, 'GET /workout/new', 'GET', '/workout/new')
+
+        workout_id = self.generate(client, DESCRIPTIONS[i % len(DESCRIPTIONS)])
+        self.request(client, 'GET /workout/<id>/start', 'GET', f'/workout/{workout_id}/start')
+
+        for exercise in STUB_PLAN['exercises']:
+            for set_number in range(1, self.sets_per_exercise + 1):
+                self.request(client, 'POST /api/log_set', 'POST', '/api/log_set', json={
+                    'workout_id': workout_id,
+                    'exercise_name': exercise['name'],
+                    'set_number': set_number,
+                    'reps': exercise['reps'],
+                    'weight': 60.0 + set_number * 2.5,
+                    'client_id': f'bench-{i}-{workout_id}-{exercise["name"]}-{set_number}',
+                })
+
+        self.request(client, 'GET /workout/<id>/summary', 'GET', f'/workout/{workout_id}/summary')
+        self.request(client, 'GET /workouts', 'GET', '/workouts')
+
+    def run(self, iterations: int, concurrency: int = 1) -> float:
+        """Run all iterations and return the wall-clock time taken."""
+        start = time.perf_counter()
+        if concurrency <= 1:
+            for i in range(iterations):
+                self.iteration(i)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(self.iteration, range(iterations)))
+        return time.perf_counter() - start
+
+def git_revision() -> str:
+    """Current commit of the repository, if available."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def print_report(results: Dict):
+    """Print a per-route latency table."""
+    print(f"\nBenchmark @ {results['revision']}: {results['iterations']} iterations, "
+          f"concurrency {results['concurrency']}, LM latency {results['lm_latency_ms']:.0f} ms")
+    print(f"{'Route':<32}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'SQL/req':>9}")
+    for route, stats in results['routes'].items():
+        print(f"{route:<32}{stats['count']:>7}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['throughput_rps']:>10.1f}{stats['sql_queries_per_request']:>9.1f}")
+    print(f"\nWall time: {results['wall_time_s']:.2f} s, LM calls: {results['lm_calls']}, "
+          f"generation failures: {results['generation_failures']}")
+
+def compare(old_path: str, new_path: str):
+    """Print p50/p95 changes between two saved result files."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"\n{old['revision']} -> {new['revision']}")
+    print(f"{'Route':<32}{'p50 old':>10}{'p50 new':>10}{'p95 old':>10}{'p95 new':>10}{'change':>9}")
+    for route, stats in new['routes'].items():
+        before = old['routes'].get(route)
+        if not before:
+            print(f"{route:<32}{'-':>10}{stats['p50_ms']:>10.2f}{'-':>10}{stats['p95_ms']:>10.2f}{'new':>9}")
+            continue
+        change = (stats['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+        print(f"{route:<32}{before['p50_ms']:>10.2f}{stats['p50_ms']:>10.2f}"
+              f"{before['p95_ms']:>10.2f}{stats['p95_ms']:>10.2f}{change:>+8.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every Flask route with an offline stub LM")
+    parser.add_argument('--iterations', type=int, default=20, help='Simulated member visits to run')
+    parser.add_argument('--concurrency', type=int, default=1, help='Visits to run in parallel')
+    parser.add_argument('--lm-latency', type=float, default=0.0, help='Stub LM latency per call in seconds')
+    parser.add_argument('--sets-per-exercise', type=int, default=3, help='Sets logged per exercise')
+    parser.add_argument('--data-dir', type=str, default='data',
+                        help='Directory to copy databases from (they are never modified)')
+    parser.add_argument('--output', type=str, help='Save results as JSON to this file')
+    parser.add_argument('--local-planner', choices=['auto', 'off', 'only'], default='off',
+                        help='Route formulaic requests to the local planner (default: always use the stub LM)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two saved result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Run against copies so the benchmark never touches real data
+    source_dir = os.path.abspath(args.data_dir)
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix='workout-bench-')
+    shutil.copytree(source_dir, os.path.join(workdir, 'data'),
+                    ignore=shutil.ignore_patterns('*.db-wal', '*.db-shm', 'jobs.db', 'plan_cache.db'))
+    os.chdir(workdir)
+
+    # Count every SQL statement issued through the shared connection helper
+    counter = QueryCounter()
+    db.set_trace_callback(counter)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as app_module
+
+    lm = StubLM(latency=args.lm_latency)
+    app_module.configure_lm = lambda provider='openai': lm
+    # The stub stands in for a configured provider even without API keys
+    app_module.configured_providers = lambda: list(app_module.PROVIDER_MODELS)
+    app_module.LOCAL_PLANNER = args.local_planner
+
+    benchmark = Benchmark(app_module, counter, sets_per_exercise=args.sets_per_exercise)
+    try:
+        wall_time = benchmark.run(args.iterations, args.concurrency)
+    finally:
+        app_module.log_writer.close()
+        app_module.job_queue.shutdown(wait=False)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'iterations': args.iterations,
+        'concurrency': args.concurrency,
+        'lm_latency_ms': args.lm_latency * 1000,
+        'local_planner': args.local_planner,
+        'wall_time_s': wall_time,
+        'lm_calls': lm.calls,
+        'generation_failures': benchmark.generation_failures,
+        'routes': {route: stats.summary() for route, stats in benchmark.routes.items()},
+    }
+    print_report(results)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {output}")
+
+    # Seeded workouts keep the other routes measurable, but the generation numbers would be meaningless
+    if benchmark.generation_failures:
+        sys.exit(f"\nBenchmark invalid: {benchmark.generation_failures} generations failed "
+                 f"(first error: {benchmark.generation_errors[0]})")
+    if args.local_planner != 'only' and not lm.calls:
+        sys.exit("\nBenchmark invalid: the stub LM was never called, so no generation went through DSPy")
+
+if __name__ == "__main__":
+    main()
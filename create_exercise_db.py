@@ -1,5 +1,6 @@
 import sqlite3
 import os
+import migrations
 
 # Create database directory if it doesn't exist
 os.makedirs('data', exist_ok=True)
@@ -8,15 +9,8 @@ os.makedirs('data', exist_ok=True)
 conn = sqlite3.connect('data/exercises.db')
 cursor = conn.cursor()
 
-# Create exercises table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS exercises (
-    id INTEGER PRIMARY KEY,
-    name TEXT NOT NULL,
-    muscle_group TEXT NOT NULL,
-    equipment TEXT
-)
-''')
+# Create exercises table and indexes
+migrations.migrate(conn, 'exercises')
 
 # Sample exercises data by muscle group
 exercises = [
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Tuple
+import metrics
+
+# Connection tuning shared by every database in data/
+BUSY_TIMEOUT_MS = 5000
+SYNCHRONOUS = 'NORMAL'  # Safe with WAL; only the last commits can be lost on power failure
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = set()
+_trace_callback = None
+
+def set_trace_callback(callback: Callable[[str], None]):
+    """Call ``callback(sql)`` for every statement run on connections opened from now on.
+
+    Used by the benchmark and metrics to count queries; pass None to disable.
+    """
+    global _trace_callback
+    _trace_callback = callback
+
+def open_connection(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a new connection with WAL journaling and the shared pragmas applied."""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Timed connections feed the per-statement SQL histogram on /metrics
+    factory = metrics.TimedConnection if metrics.ENABLED else sqlite3.Connection
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=check_same_thread,
+                           factory=factory)
+    conn.row_factory = sqlite3.Row
+    if _trace_callback is not None:
+        conn.set_trace_callback(_trace_callback)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA synchronous={SYNCHRONOUS}')
+    conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    return conn
+
+def file_version(db_path: str) -> Tuple:
+    """Cheap change detector for a database file (and its WAL, if any)."""
+    version = []
+    for path in (db_path, db_path + '-wal'):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            version.append(None)
+        else:
+            version.append((st.st_mtime_ns, st.st_size))
+    return tuple(version)
+
+def _thread_connections() -> Dict[str, sqlite3.Connection]:
+    """Connections owned by the current thread in the current process."""
+    pid = os.getpid()
+    if getattr(_local, 'pid', None) != pid:
+        # Never reuse connections inherited across a fork
+        _local.pid = pid
+        _local.connections = {}
+    return _local.connections
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """Return this thread's long-lived connection to ``db_path``, opening it on first use."""
+    connections = _thread_connections()
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = open_connection(db_path)
+        connections[db_path] = conn
+    return conn
+
+def ensure_schema(db_path: str, create_tables: Callable[[], None]):
+    """Run ``create_tables`` once per process for ``db_path``."""
+    key = (os.getpid(), db_path)
+    if key in _schema_ready:
+        return
+    with _schema_lock:
+        if key not in _schema_ready:
+            create_tables()
+            _schema_ready.add(key)
+
+def release_connections():
+    """Roll back any transaction left open on this thread's connections.
+
+    Called at the end of every request so a route that raised mid-write
+    doesn't leave a half-finished transaction holding the write lock.
+    """
+    for conn in _thread_connections().values():
+        if conn.in_transaction:
+            conn.rollback()
+
+def close_connections():
+    """Close and forget every connection owned by this thread."""
+    connections = _thread_connections()
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
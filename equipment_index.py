@@ -0,0 +1,224 @@
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import db
+from exercise_index import ExerciseIndex, get_exercise_index
+from read_cache import ReadCache
+
+# Canonical equipment and the names gyms and the catalog use for it. A gym item
+# can provide more than one canonical piece (a barbell comes with plates).
+CANONICAL_EQUIPMENT = {
+    'Barbell': ('barbell', 'olympic barbell', 'olympic bar', 'bar bell'),
+    'Dumbbell': ('dumbbell', 'dumbbells', 'dumbell', 'adjustable dumbbells', 'db'),
+    'Kettlebell': ('kettlebell', 'kettle bell', 'kb'),
+    'EZ Bar': ('ez bar', 'ez curl bar', 'curl bar'),
+    'Trap Bar': ('trap bar', 'hex bar'),
+    'T-Bar': ('t bar', 't bar row', 'landmine'),
+    'Weight Plate': ('weight plate', 'plate', 'bumper plate'),
+    'Cable Machine': ('cable machine', 'cable', 'cable station', 'cable crossover', 'functional trainer',
+                      'lat pulldown machine', 'pulley'),
+    'Smith Machine': ('smith machine',),
+    'Machine': ('machine', 'selectorized machine', 'plate loaded machine'),
+    'Bench': ('bench', 'flat bench', 'adjustable bench', 'incline bench', 'weight bench'),
+    'Hyperextension Bench': ('hyperextension bench', 'roman chair', 'back extension bench'),
+    'Preacher Bench': ('preacher bench', 'preacher curl bench'),
+    'Pull-Up Bar': ('pull up bar', 'pullup bar', 'chin up bar', 'chinup bar'),
+    'Parallel Bars': ('parallel bars', 'dip bars', 'dip station'),
+    'Rack': ('power rack', 'squat rack', 'rack', 'half rack'),
+    'Resistance Band': ('resistance band', 'band', 'loop band'),
+    'TRX': ('trx', 'suspension trainer'),
+    'Ab Wheel': ('ab wheel', 'ab roller'),
+    'Medicine Ball': ('medicine ball', 'med ball', 'slam ball', 'wall ball'),
+}
+
+# Extra pieces that come with a gym item beyond its own canonical name
+PROVIDES = {
+    'Barbell': ('Weight Plate',),
+    'Rack': ('Pull-Up Bar',),
+    'Smith Machine': ('Machine',),
+}
+
+# Exercise equipment that needs nothing from the gym
+NO_EQUIPMENT = {'', 'none', 'bodyweight', 'body weight', 'no equipment', 'calisthenics'}
+
+# Cardio machines don't count as the catalog's generic "Machine"
+CARDIO_MACHINES = {'treadmill', 'elliptical', 'exercise bike', 'rowing machine', 'rower',
+                   'stair climber', 'stairmaster', 'assault bike', 'ski erg'}
+
+def _key(name: Optional[str]) -> str:
+    """Lower-case words with punctuation collapsed and a trailing plural dropped."""
+    key = ' '.join(re.findall(r'[a-z0-9]+', (name or '').lower()))
+    return key[:-1] if key.endswith('s') and not key.endswith('ss') and len(key) > 3 else key
+
+_ALIASES = {_key(alias): canonical for canonical, aliases in CANONICAL_EQUIPMENT.items() for alias in aliases}
+_NO_EQUIPMENT_KEYS = {_key(name) for name in NO_EQUIPMENT}
+_CARDIO_KEYS = {_key(name) for name in CARDIO_MACHINES}
+
+@lru_cache(maxsize=4096)
+def canonical_equipment(name: Optional[str]) -> Optional[str]:
+    """Canonical name for free-text equipment, or None when it needs no equipment.
+
+    Unknown names fall back to a generic class ("Leg Press Machine" is a
+    Machine, "Flat Utility Bench" a Bench) and otherwise to their own
+    normalized spelling, so they still line up with identical spellings.
+    """
+    key = _key(name)
+    if key in _NO_EQUIPMENT_KEYS:
+        return None
+    if key in _ALIASES:
+        return _ALIASES[key]
+    if key in _CARDIO_KEYS:
+        return name.strip().title()
+    if key.endswith(' machine'):
+        return 'Machine'
+    if key.endswith(' bench'):
+        return 'Bench'
+    return name.strip().title()
+
+@lru_cache(maxsize=4096)
+def provided_equipment(name: Optional[str]) -> Tuple[str, ...]:
+    """Every canonical piece a gym item named ``name`` makes available."""
+    canonical = canonical_equipment(name)
+    if canonical is None:
+        return ()
+    return (canonical,) + PROVIDES.get(canonical, ())
+
+class EquipmentIndex:
+    """Exercise x equipment compatibility as packed bitsets.
+
+    Each exercise's required equipment is a row of uint64 words over a
+    canonical vocabulary; a gym's availability is one such row. An exercise
+    is doable when it requires nothing the gym lacks, which is a single
+    vectorized ``req & ~available == 0`` over the whole catalog.
+    """
+
+    def __init__(self, exercises: Sequence[Dict]):
+        """Build the requirement bitsets for catalog rows (dicts with id and equipment)."""
+        self.ids = np.fromiter((ex['id'] for ex in exercises), dtype=np.int64, count=len(exercises))
+        self.row_of: Dict[int, int] = {int(i): row for row, i in enumerate(self.ids)}
+
+        required = [canonical_equipment(ex.get('equipment')) for ex in exercises]
+        self.vocabulary: Tuple[str, ...] = tuple(sorted({name for name in required if name}))
+        self.bit_of: Dict[str, int] = {name: bit for bit, name in enumerate(self.vocabulary)}
+        self.words = max(1, (len(self.vocabulary) + 63) // 64)
+
+        self.requirements = np.zeros((len(exercises), self.words), dtype=np.uint64)
+        for row, name in enumerate(required):
+            if name:
+                bit = self.bit_of[name]
+                self.requirements[row, bit // 64] |= np.uint64(1 << (bit % 64))
+
+        self._doable_cache: Dict[bytes, np.ndarray] = {}
+        self._availability_cache: Dict[FrozenSet[str], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_index(cls, index: ExerciseIndex) -> 'EquipmentIndex':
+        return cls(index.exercises)
+
+    def availability(self, equipment_names: Iterable[str]) -> np.ndarray:
+        """Availability bitmask for a gym holding ``equipment_names``."""
+        names = frozenset(equipment_names)
+        mask = self._availability_cache.get(names)
+        if mask is not None:
+            return mask
+
+        mask = np.zeros(self.words, dtype=np.uint64)
+        for name in names:
+            for canonical in provided_equipment(name):
+                bit = self.bit_of.get(canonical)
+                if bit is not None:
+                    mask[bit // 64] |= np.uint64(1 << (bit % 64))
+        mask.setflags(write=False)
+        with self._lock:
+            if len(self._availability_cache) > 1024:
+                self._availability_cache.clear()
+            self._availability_cache[names] = mask
+        return mask
+
+    def doable(self, available: np.ndarray) -> np.ndarray:
+        """Boolean array over the catalog: True where the gym has everything the exercise needs."""
+        key = available.tobytes()
+        result = self._doable_cache.get(key)
+        if result is None:
+            result = ~np.any(self.requirements & ~available, axis=1)
+            result.setflags(write=False)
+            with self._lock:
+                # Gyms are few; keep the caches from growing without bound anyway
+                if len(self._doable_cache) > 1024:
+                    self._doable_cache.clear()
+                self._doable_cache[key] = result
+        return result
+
+    def doable_ids(self, available: np.ndarray) -> np.ndarray:
+        """Ids of every catalog exercise doable with ``available``."""
+        return self.ids[self.doable(available)]
+
+    def filter(self, exercises: Sequence[Dict], available: np.ndarray) -> List[Dict]:
+        """The given exercises that are doable with ``available``, in their original order."""
+        doable = self.doable(available)
+        return [ex for ex in exercises
+                if ex.get('id') not in self.row_of or doable[self.row_of[ex['id']]]]
+
+_equipment_indexes: Dict[str, Tuple[ExerciseIndex, EquipmentIndex]] = {}
+_equipment_lock = threading.Lock()
+
+def get_equipment_index(db_path='data/exercises.db') -> EquipmentIndex:
+    """Return the shared bitset index for ``db_path``, rebuilt when the catalog reloads."""
+    index = get_exercise_index(db_path)
+    cached = _equipment_indexes.get(db_path)
+    if cached and cached[0] is index:
+        return cached[1]
+
+    with _equipment_lock:
+        cached = _equipment_indexes.get(db_path)
+        if cached and cached[0] is index:
+            return cached[1]
+        equipment_index = EquipmentIndex.from_index(index)
+        _equipment_indexes[db_path] = (index, equipment_index)
+        return equipment_index
+
+# gyms.db -> (equipment generation, equipment index, {gym_id: availability mask})
+_gym_masks: Dict[str, Tuple[int, EquipmentIndex, Dict[int, np.ndarray]]] = {}
+_gym_masks_lock = threading.Lock()
+
+def gym_availability(gym_id: int, gyms_db_path='data/gyms.db',
+                     exercises_db_path='data/exercises.db') -> np.ndarray:
+    """Cached availability mask for a gym; recomputed whenever gym equipment or the catalog changes."""
+    equipment_index = get_equipment_index(exercises_db_path)
+    conn = db.get_connection(gyms_db_path)
+
+    def load():
+        rows = conn.execute('SELECT name FROM equipment WHERE gym_id = ?', (gym_id,)).fetchall()
+        return equipment_index.availability(row['name'] for row in rows)
+
+    # The equipment generation only moves when equipment rows change, unlike the
+    # file's mtime, which any write to gyms.db (or a checkpoint) bumps
+    generation = None if conn.in_transaction else ReadCache.generation(conn, 'equipment')
+    if generation is None:
+        return load()
+    cached = _gym_masks.get(gyms_db_path)
+    if not cached or cached[0] != generation or cached[1] is not equipment_index:
+        with _gym_masks_lock:
+            cached = _gym_masks.get(gyms_db_path)
+            if not cached or cached[0] != generation or cached[1] is not equipment_index:
+                cached = (generation, equipment_index, {})
+                _gym_masks[gyms_db_path] = cached
+
+    masks = cached[2]
+    mask = masks.get(gym_id)
+    if mask is None:
+        mask = masks[gym_id] = load()
+    return mask
+
+def exercises_doable_at_gym(gym_id: int, gyms_db_path='data/gyms.db',
+                            exercises_db_path='data/exercises.db') -> List[Dict]:
+    """Every catalog exercise the gym has the equipment for."""
+    ids = get_equipment_index(exercises_db_path).doable_ids(
+        gym_availability(gym_id, gyms_db_path, exercises_db_path))
+    catalog = get_exercise_index(exercises_db_path)
+    return [catalog.get(int(i)) for i in ids]
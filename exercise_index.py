@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import db
+
+class ExerciseIndex:
+    """Immutable in-memory view of the exercise catalog.
+
+    The catalog is small and rarely changes, so it is loaded once and indexed
+    by id, muscle group and equipment. Lookups touch only the matching rows
+    and never go back to the database.
+    """
+
+    def __init__(self, exercises: Iterable[Dict], limit_per_group: int = 3):
+        """Build the indexes from exercise rows (dicts with id, name, muscle_group, equipment)."""
+        self.exercises: Tuple[Dict, ...] = tuple(sorted((dict(ex) for ex in exercises), key=lambda ex: ex['id']))
+        self.by_id: Dict[int, Dict] = {ex['id']: ex for ex in self.exercises}
+
+        by_muscle_group: Dict[str, List[Dict]] = {}
+        by_equipment: Dict[str, List[Dict]] = {}
+        for ex in self.exercises:
+            by_muscle_group.setdefault(ex['muscle_group'], []).append(ex)
+            by_equipment.setdefault(ex['equipment'], []).append(ex)
+
+        self.by_muscle_group: Dict[str, Tuple[Dict, ...]] = {k: tuple(v) for k, v in by_muscle_group.items()}
+        self.by_equipment: Dict[str, Tuple[Dict, ...]] = {k: tuple(v) for k, v in by_equipment.items()}
+        self.muscle_groups: Tuple[str, ...] = tuple(self.by_muscle_group)
+        self.equipment: Tuple[str, ...] = tuple(k for k in self.by_equipment if k)
+
+        # Precompute the default diverse set used when a request names nothing specific
+        self.limit_per_group = limit_per_group
+        self._diverse_set = self._build_diverse_set(limit_per_group)
+
+    @classmethod
+    def from_db(cls, db_path='data/exercises.db') -> 'ExerciseIndex':
+        """Load the whole catalog from an exercises database."""
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute('SELECT * FROM exercises').fetchall()
+        finally:
+            conn.close()
+        return cls(dict(row) for row in rows)
+
+    def _build_diverse_set(self, limit_per_group: int) -> Tuple[Dict, ...]:
+        """First ``limit_per_group`` exercises of every muscle group."""
+        results = []
+        for group in self.muscle_groups:
+            results.extend(self.by_muscle_group[group][:limit_per_group])
+        return tuple(results)
+
+    def get(self, exercise_id: int):
+        """Get a copy of an exercise by ID, or None."""
+        ex = self.by_id.get(exercise_id)
+        return dict(ex) if ex else None
+
+    def find(self, muscle_groups: Iterable[str] = (), equipment: Iterable[str] = ()) -> List[Dict]:
+        """Exercises matching any of the muscle groups OR any of the equipment, in catalog order."""
+        matches = {}
+        for group in muscle_groups:
+            for ex in self.by_muscle_group.get(group, ()):
+                matches[ex['id']] = ex
+        for item in equipment:
+            for ex in self.by_equipment.get(item, ()):
+                matches[ex['id']] = ex
+        return [dict(matches[ex_id]) for ex_id in sorted(matches)]
+
+    def diverse_set(self, limit_per_group: int = None) -> List[Dict]:
+        """A diverse set of exercises covering every muscle group."""
+        if limit_per_group is None or limit_per_group == self.limit_per_group:
+            return [dict(ex) for ex in self._diverse_set]
+        return [dict(ex) for ex in self._build_diverse_set(limit_per_group)]
+
+_indexes: Dict[str, Tuple[Tuple, ExerciseIndex]] = {}
+_indexes_lock = threading.Lock()
+
+def get_exercise_index(db_path='data/exercises.db') -> ExerciseIndex:
+    """Return the shared index for ``db_path``, reloading it only when the file changes."""
+    version = db.file_version(db_path)
+    cached = _indexes.get(db_path)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    with _indexes_lock:
+        cached = _indexes.get(db_path)
+        if cached and cached[0] == version:
+            return cached[1]
+        index = ExerciseIndex.from_db(db_path)
+        _indexes[db_path] = (version, index)
+        return index
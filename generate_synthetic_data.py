@@ -0,0 +1,216 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import migrations
+
+# Building blocks for realistic-looking catalog entries
+BASE_MOVEMENTS = {
+    'Chest': ['Bench Press', 'Fly', 'Push-Up', 'Chest Press', 'Crossover', 'Dip', 'Svend Press'],
+    'Back': ['Row', 'Pulldown', 'Pull-Up', 'Deadlift', 'Pullover', 'Shrug', 'Face Pull'],
+    'Legs': ['Squat', 'Lunge', 'Leg Press', 'Romanian Deadlift', 'Leg Curl', 'Calf Raise', 'Step-Up', 'Hip Thrust'],
+    'Shoulders': ['Overhead Press', 'Lateral Raise', 'Front Raise', 'Rear Delt Fly', 'Upright Row', 'Arnold Press'],
+    'Arms': ['Curl', 'Hammer Curl', 'Tricep Extension', 'Skull Crusher', 'Kickback', 'Pushdown'],
+    'Core': ['Crunch', 'Plank', 'Russian Twist', 'Leg Raise', 'Rollout', 'Woodchopper', 'Dead Bug'],
+}
+MODIFIERS = ['', 'Incline', 'Decline', 'Seated', 'Standing', 'Single-Arm', 'Single-Leg', 'Paused',
+             'Tempo', 'Wide-Grip', 'Close-Grip', 'Reverse-Grip', 'Deficit', 'Banded', 'Kneeling', 'Half-Kneeling']
+EQUIPMENT_BY_CATEGORY = {
+    'Free Weights': ['Barbell', 'Dumbbells', 'Kettlebell', 'EZ Bar', 'Weight Plate', 'Trap Bar'],
+    'Machines': ['Cable Machine', 'Smith Machine', 'Leg Press Machine', 'Chest Press Machine', 'Lat Pulldown Machine'],
+    'Racks': ['Squat Rack', 'Power Rack', 'Pull-Up Bar', 'Parallel Bars'],
+    'Benches': ['Flat Bench', 'Adjustable Bench', 'Hyperextension Bench', 'Preacher Bench'],
+    'Functional': ['Resistance Band', 'TRX', 'Ab Wheel', 'Medicine Ball', 'Battle Ropes'],
+    'Cardio': ['Treadmill', 'Rowing Machine', 'Exercise Bike', 'Elliptical', 'Stair Climber'],
+}
+EXERCISE_EQUIPMENT = ['Barbell', 'Dumbbells', 'Kettlebell', 'EZ Bar', 'Cable Machine', 'Smith Machine',
+                      'Machine', 'Bodyweight', 'Resistance Band', 'TRX', 'Weight Plate']
+GYM_WORDS = ['Iron', 'Peak', 'Summit', 'Forge', 'Pulse', 'Core', 'Titan', 'Anchor', 'Apex', 'Granite']
+GYM_SUFFIXES = ['Fitness', 'Gym', 'Athletics', 'Strength Club', 'Training Center', 'Barbell']
+CITIES = ['Springfield', 'Riverside', 'Franklin', 'Greenville', 'Bristol', 'Clinton', 'Fairview',
+          'Salem', 'Madison', 'Georgetown', 'Arlington', 'Ashland']
+GOALS = ['Strength', 'Hypertrophy', 'Endurance', 'Power', 'Conditioning']
+
+def _bulk_insert(conn, query, rows, batch_size, label):
+    """Stream ``rows`` into ``query`` in large transactions, printing progress."""
+    rows = iter(rows)
+    total = 0
+    start = time.perf_counter()
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        conn.execute('BEGIN')
+        conn.executemany(query, batch)
+        conn.commit()
+        total += len(batch)
+        rate = total / max(time.perf_counter() - start, 1e-9)
+        print(f"\r  {label}: {total:,} rows ({rate:,.0f} rows/s)", end='', flush=True)
+    print()
+    return total
+
+def _open(db_path, schema):
+    """Open a database tuned for bulk loading and bring its schema up to date."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    migrations.migrate(conn, schema)
+    # Durability doesn't matter for throwaway data; speed does
+    conn.execute('PRAGMA journal_mode=MEMORY')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('PRAGMA cache_size=-262144')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+def _next_id(conn, table):
+    """First unused id in a table, so appends never collide."""
+    return (conn.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0] or 0) + 1
+
+def generate_exercises(db_path, count, rng, batch_size):
+    """Fill exercises.db and return the generated (id, name, muscle_group, equipment) rows."""
+    conn = _open(db_path, 'exercises')
+    first_id = _next_id(conn, 'exercises')
+
+    exercises = []
+    for offset in range(count):
+        group = rng.choice(list(BASE_MOVEMENTS))
+        equipment = rng.choice(EXERCISE_EQUIPMENT)
+        modifier = rng.choice(MODIFIERS)
+        movement = rng.choice(BASE_MOVEMENTS[group])
+        name = ' '.join(part for part in (modifier, equipment if equipment != 'Bodyweight' else '', movement) if part)
+        exercises.append((first_id + offset, f'{name} #{first_id + offset}', group, equipment))
+
+    _bulk_insert(conn, 'INSERT INTO exercises (id, name, muscle_group, equipment) VALUES (?, ?, ?, ?)',
+                 exercises, batch_size, 'exercises')
+    conn.close()
+    return exercises
+
+def generate_gyms(db_path, count, equipment_per_gym, rng, batch_size):
+    """Fill gyms.db with gyms and their equipment."""
+    conn = _open(db_path, 'gyms')
+    first_id = _next_id(conn, 'gyms')
+
+    gyms = [(
+        first_id + offset,
+        f'{rng.choice(GYM_WORDS)} {rng.choice(GYM_SUFFIXES)} {first_id + offset}',
+        f'{rng.choice(CITIES)}',
+        f'Synthetic gym #{first_id + offset}',
+    ) for offset in range(count)]
+    _bulk_insert(conn, 'INSERT INTO gyms (id, name, location, description) VALUES (?, ?, ?, ?)',
+                 gyms, batch_size, 'gyms')
+
+    catalog = [(name, category) for category, names in EQUIPMENT_BY_CATEGORY.items() for name in names]
+
+    def equipment_rows():
+        for gym_id, _, _, _ in gyms:
+            for name, category in rng.sample(catalog, min(equipment_per_gym, len(catalog))):
+                yield (gym_id, name, category, rng.randint(1, 12), None)
+
+    _bulk_insert(conn, 'INSERT INTO equipment (gym_id, name, category, quantity, description) VALUES (?, ?, ?, ?, ?)',
+                 equipment_rows(), batch_size, 'equipment')
+    conn.close()
+    return [gym[0] for gym in gyms]
+
+def generate_workouts(db_path, workouts, logs, exercises, gym_ids, rng, batch_size, end_date, days=730):
+    """Fill workouts.db with workouts, their normalized exercises and set logs.
+
+    Workouts are spread evenly over the ``days`` days before ``end_date``, and
+    logged weights trend upward so progression analytics have a signal.
+    """
+    conn = _open(db_path, 'workouts')
+    first_id = _next_id(conn, 'workouts')
+    start_date = end_date - timedelta(days=days)
+    step = timedelta(days=days) / max(workouts, 1)
+    logs_per_workout, extra_logs = divmod(logs, max(workouts, 1))
+    base_weight = {ex[1]: rng.uniform(10, 120) for ex in exercises}
+
+    # Each workout's plan comes from its own seeded RNG, so every pass re-derives
+    # the same plan without holding them all in memory
+    plan_seed = rng.getrandbits(64)
+
+    def plan_for(workout_id):
+        plan_rng = random.Random(plan_seed ^ workout_id)
+        return plan_rng.sample(exercises, plan_rng.randint(3, 6))
+
+    def workout_rows():
+        for offset in range(workouts):
+            workout_id = first_id + offset
+            date = (start_date + step * offset).strftime('%Y-%m-%d %H:%M:%S')
+            goal = rng.choice(GOALS)
+            group = plan_for(workout_id)[0][2]
+            yield (
+                workout_id, f'{group} {goal} Workout', f'Synthetic {goal.lower()} session', date,
+                rng.choice(gym_ids) if gym_ids and rng.random() < 0.8 else None,
+                '{}', f'{goal} focus', json.dumps(['3-4 sets of 8-12 reps']), json.dumps(['90 seconds between sets']), 1,
+            )
+
+    def exercise_rows():
+        for offset in range(workouts):
+            workout_id = first_id + offset
+            for position, (exercise_id, name, group, equipment) in enumerate(plan_for(workout_id)):
+                yield (workout_id, position, exercise_id, name, group, equipment, rng.randint(3, 5), rng.choice([5, 8, 10, 12, '8-12']), '90 seconds', None)
+
+    def log_rows():
+        for offset in range(workouts):
+            workout_id = first_id + offset
+            plan = plan_for(workout_id)
+            progress = 1 + 0.5 * offset / max(workouts, 1)
+            date = (start_date + step * offset).strftime('%Y-%m-%d %H:%M:%S')
+            count = logs_per_workout + (1 if offset < extra_logs else 0)
+            for n in range(count):
+                name = plan[n % len(plan)][1]
+                weight = round(base_weight[name] * progress * rng.uniform(0.9, 1.1) / 2.5) * 2.5
+                yield (workout_id, name, n // len(plan) + 1, rng.randint(3, 15), weight, rng.choice([60, 90, 120]), None, date)
+
+    _bulk_insert(conn, 'INSERT INTO workouts (id, title, description, date, gym_id, workout_data, notes, '
+                       'sets_and_reps, rest_times, plan_normalized) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                 workout_rows(), batch_size, 'workouts')
+    _bulk_insert(conn, 'INSERT INTO workout_exercises (workout_id, position, exercise_id, name, muscle_group, '
+                       'equipment, sets, reps, rest, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                 exercise_rows(), batch_size, 'workout_exercises')
+    _bulk_insert(conn, 'INSERT INTO workout_logs (workout_id, exercise_name, set_number, reps, weight, rest_time, '
+                       'notes, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                 log_rows(), batch_size, 'workout_logs')
+    conn.execute('ANALYZE')
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the exercise, gym and workout databases with synthetic data")
+    parser.add_argument('--data-dir', type=str, default='data/synthetic',
+                        help='Directory for the generated databases (default keeps real data untouched)')
+    parser.add_argument('--exercises', type=int, default=1000, help='Number of exercises to generate')
+    parser.add_argument('--gyms', type=int, default=100, help='Number of gyms to generate')
+    parser.add_argument('--equipment-per-gym', type=int, default=15, help='Equipment rows per gym')
+    parser.add_argument('--workouts', type=int, default=10000, help='Number of workouts to generate')
+    parser.add_argument('--logs', type=int, default=200000, help='Total number of workout_logs rows')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible data')
+    parser.add_argument('--end-date', type=str, default='2025-06-30',
+                        help='Date of the last generated workout (YYYY-MM-DD); fixed so runs are reproducible')
+    parser.add_argument('--batch-size', type=int, default=50000, help='Rows per insert transaction')
+    parser.add_argument('--reset', action='store_true', help='Delete existing databases in --data-dir first')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    paths = {name: os.path.join(args.data_dir, f'{name}.db') for name in ('exercises', 'gyms', 'workouts')}
+    if args.reset:
+        for path in paths.values():
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+
+    print(f"Generating synthetic data in {args.data_dir} (seed {args.seed})")
+    exercises = generate_exercises(paths['exercises'], args.exercises, rng, args.batch_size)
+    gym_ids = generate_gyms(paths['gyms'], args.gyms, args.equipment_per_gym, rng, args.batch_size)
+    end_date = datetime.strptime(args.end_date, '%Y-%m-%d')
+    generate_workouts(paths['workouts'], args.workouts, args.logs, exercises, gym_ids, rng, args.batch_size, end_date)
+
+    print(f"Done in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import csv
+import json
+import os
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import db
+import migrations
+
+# Gyms written per transaction; each gym and all its equipment land in the same one
+DEFAULT_BATCH_SIZE = 200
+# Ids per IN (...) lookup, well under SQLite's bound-parameter limit
+LOOKUP_CHUNK = 500
+# One row per equipment item; a gym without equipment is a row with no equipment name
+CSV_COLUMNS = ('gym_name', 'gym_location', 'gym_description', 'name', 'category', 'quantity', 'description')
+FORMATS = ('json', 'jsonl', 'csv')
+
+def detect_format(path: str) -> str:
+    """File format from the extension: .json, .jsonl/.ndjson or .csv."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension in ('.json', '.csv'):
+        return extension[1:]
+    raise ValueError(f"Can't tell the format of {path}; pass one of {', '.join(FORMATS)}")
+
+def _csv_gyms(f, path: str) -> Iterator[Tuple[str, Dict]]:
+    """Group consecutive CSV rows belonging to the same gym into one record."""
+    reader = csv.DictReader(f)
+    missing = {'gym_name', 'name', 'category'} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"{path}: missing CSV columns {', '.join(sorted(missing))}")
+    current, key, where = None, None, None
+    for row in reader:
+        row_key = ((row.get('gym_name') or '').strip(), (row.get('gym_location') or '').strip())
+        if row_key != key:
+            if current is not None:
+                yield where, current
+            key, where = row_key, f'{path}:{reader.line_num}'
+            current = {
+                'name': row.get('gym_name'),
+                'location': row.get('gym_location'),
+                'description': row.get('gym_description'),
+                'equipment': [],
+            }
+        if (row.get('name') or '').strip():
+            current['equipment'].append({column: row.get(column)
+                                         for column in ('name', 'category', 'quantity', 'description')})
+    if current is not None:
+        yield where, current
+
+def read_gym_records(path: str, fmt: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+    """Yield ``(position, gym record)`` pairs from a JSON, JSONL or CSV file.
+
+    JSON may hold one gym (the ``save_to_json`` format), a list of gyms or
+    ``{"gyms": [...]}``. JSONL and CSV are read a line at a time.
+    """
+    fmt = fmt or detect_format(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            yield from _csv_gyms(f, path)
+        elif fmt == 'jsonl':
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    yield f'{path}:{number}', json.loads(line)
+        else:
+            data = json.load(f)
+            if isinstance(data, dict) and 'gyms' in data:
+                data = data['gyms']
+            for number, record in enumerate(data if isinstance(data, list) else [data], 1):
+                yield f'{path}[{number}]', record
+
+def _text(value, field: str, required: bool = False) -> Optional[str]:
+    if value is not None and not isinstance(value, (str, int, float)):
+        raise ValueError(f"{field} must be text")
+    text = str(value).strip() if value is not None else ''
+    if required and not text:
+        raise ValueError(f"{field} is required")
+    return text or None
+
+def normalize_gym(record) -> Dict:
+    """Validate a gym record and return it cleaned up; raises ValueError on bad input.
+
+    Equipment listed twice under the same category and name is merged, the
+    later entry winning.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("gym must be an object")
+    gym = {
+        'name': _text(record.get('name'), 'name', required=True),
+        'location': _text(record.get('location'), 'location'),
+        'description': _text(record.get('description'), 'description'),
+    }
+    equipment = record.get('equipment') or []
+    if not isinstance(equipment, list):
+        raise ValueError("equipment must be a list")
+
+    items = {}
+    for number, item in enumerate(equipment, 1):
+        if not isinstance(item, dict):
+            raise ValueError(f"equipment {number} must be an object")
+        quantity = item.get('quantity')
+        try:
+            quantity = int(quantity) if quantity not in (None, '') else 1
+        except (TypeError, ValueError):
+            raise ValueError(f"equipment {number} quantity must be a whole number") from None
+        if quantity < 1:
+            raise ValueError(f"equipment {number} quantity must be at least 1")
+        cleaned = {
+            'name': _text(item.get('name'), f'equipment {number} name', required=True),
+            'category': _text(item.get('category'), f'equipment {number} category', required=True),
+            'quantity': quantity,
+            'description': _text(item.get('description'), f'equipment {number} description'),
+        }
+        items[(cleaned['category'], cleaned['name'])] = cleaned
+    gym['equipment'] = list(items.values())
+    return gym
+
+def _chunks(values: List, size: int = LOOKUP_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+class ImportStats:
+    """Counts for one import run."""
+
+    def __init__(self):
+        self.gyms_inserted = 0
+        self.gyms_matched = 0
+        self.gyms_updated = 0
+        self.equipment_inserted = 0
+        self.equipment_updated = 0
+        self.batches = 0
+        self.errors: List[str] = []
+
+    def as_dict(self) -> Dict:
+        return {
+            'gyms_inserted': self.gyms_inserted,
+            'gyms_matched': self.gyms_matched,
+            'gyms_updated': self.gyms_updated,
+            'equipment_inserted': self.equipment_inserted,
+            'equipment_updated': self.equipment_updated,
+            'batches': self.batches,
+            'invalid': len(self.errors),
+        }
+
+class GymImporter:
+    """Writes batches of validated gyms, each batch in one transaction.
+
+    With ``upsert`` a gym matching an existing one by name and location is
+    updated rather than added again, and so is its equipment (matched by
+    category and name), so importing the same file twice adds nothing.
+    Rows whose values haven't changed are left alone.
+    With ``dry_run`` all batches share one transaction that ``finish``
+    rolls back, so later batches see what earlier ones wrote and the
+    counts show exactly what a real run would do.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, upsert: bool = True, dry_run: bool = False):
+        self.conn = conn
+        self.upsert = upsert
+        self.dry_run = dry_run
+        self.stats = ImportStats()
+        self._dry_run_open = False
+
+    def import_batch(self, gyms: List[Dict]) -> List[int]:
+        """Write normalized gyms and their equipment; returns each gym's id."""
+        if not self._dry_run_open:
+            if self.conn.in_transaction:
+                self.conn.commit()
+            self.conn.execute('BEGIN IMMEDIATE')
+            self._dry_run_open = self.dry_run
+        try:
+            gym_ids = self._write(gyms)
+            if not self.dry_run:
+                self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            self._dry_run_open = False
+            raise
+        self.stats.batches += 1
+        return gym_ids
+
+    def finish(self):
+        """Roll back everything a dry run wrote; a real import has nothing left to do."""
+        if self._dry_run_open:
+            self.conn.rollback()
+            self._dry_run_open = False
+
+    def _existing_gyms(self, gyms: List[Dict]) -> Dict[Tuple[str, str], Tuple[int, Optional[str]]]:
+        existing = {}
+        names = sorted({gym['name'] for gym in gyms})
+        for chunk in _chunks(names):
+            rows = self.conn.execute(
+                f"SELECT id, name, COALESCE(location, ''), description FROM gyms WHERE name IN ({', '.join('?' * len(chunk))}) "
+                'ORDER BY id DESC',
+                chunk
+            ).fetchall()
+            # Descending, so the oldest of any existing duplicates wins
+            existing.update({(name, location): (gym_id, description)
+                             for gym_id, name, location, description in rows})
+        return existing
+
+    def _existing_equipment(self, gym_ids: List[int]) -> Dict[Tuple[int, str, str], Tuple]:
+        existing = {}
+        for chunk in _chunks(sorted(set(gym_ids))):
+            rows = self.conn.execute(
+                f"SELECT id, gym_id, category, name, quantity, description FROM equipment WHERE gym_id IN ({', '.join('?' * len(chunk))}) "
+                'ORDER BY id DESC',
+                chunk
+            ).fetchall()
+            existing.update({(gym_id, category, name): (equipment_id, quantity, description)
+                             for equipment_id, gym_id, category, name, quantity, description in rows})
+        return existing
+
+    def _write(self, gyms: List[Dict]) -> List[int]:
+        existing = self._existing_gyms(gyms) if self.upsert else {}
+        # Ids are assigned here, under the write lock, so gyms go in with one executemany
+        next_id = self.conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM gyms').fetchone()[0]
+
+        gym_ids, new_gyms, updated_gyms = [], [], []
+        for gym in gyms:
+            key = (gym['name'], gym['location'] or '')
+            if key in existing:
+                gym_id, description = existing[key]
+                # Unchanged rows aren't rewritten, so a repeat import leaves the read cache warm
+                if gym['description'] is not None and gym['description'] != description:
+                    updated_gyms.append((gym['description'], gym_id))
+                    existing[key] = (gym_id, gym['description'])
+            else:
+                gym_id = next_id
+                next_id += 1
+                new_gyms.append((gym_id, gym['name'], gym['location'], gym['description']))
+                if self.upsert:
+                    # A later record for the same gym in this batch merges into it
+                    existing[key] = (gym_id, gym['description'])
+            gym_ids.append(gym_id)
+
+        self.conn.executemany('INSERT INTO gyms (id, name, location, description) VALUES (?, ?, ?, ?)', new_gyms)
+        self.conn.executemany('UPDATE gyms SET description = ? WHERE id = ?', updated_gyms)
+
+        new_ids = {row[0] for row in new_gyms}
+        existing_equipment = (self._existing_equipment([gym_id for gym_id in gym_ids if gym_id not in new_ids])
+                              if self.upsert else {})
+        new_equipment, updated_equipment = {}, {}
+        for gym_id, gym in zip(gym_ids, gyms):
+            for item in gym['equipment']:
+                key = (gym_id, item['category'], item['name'])
+                if key in existing_equipment:
+                    equipment_id, quantity, description = existing_equipment[key]
+                    if (item['quantity'], item['description']) != (quantity, description):
+                        updated_equipment[equipment_id] = (item['quantity'], item['description'], equipment_id)
+                else:
+                    new_equipment[key] = (gym_id, item['name'], item['category'], item['quantity'], item['description'])
+
+        self.conn.executemany(
+            'INSERT INTO equipment (gym_id, name, category, quantity, description) VALUES (?, ?, ?, ?, ?)',
+            list(new_equipment.values())
+        )
+        self.conn.executemany(
+            'UPDATE equipment SET quantity = ?, description = ? WHERE id = ?',
+            list(updated_equipment.values())
+        )
+
+        self.stats.gyms_inserted += len(new_gyms)
+        self.stats.gyms_matched += len(set(gym_ids) - new_ids)
+        self.stats.gyms_updated += len({gym_id for _, gym_id in updated_gyms})
+        self.stats.equipment_inserted += len(new_equipment)
+        self.stats.equipment_updated += len(updated_equipment)
+        return gym_ids
+
+def import_file(path: str, db_path: str = 'data/gyms.db', fmt: Optional[str] = None,
+                batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False, upsert: bool = True,
+                progress=None) -> ImportStats:
+    """Stream gyms from ``path`` into ``db_path`` in batches of ``batch_size``.
+
+    Invalid records are skipped and listed in ``stats.errors``; a failing
+    batch is rolled back whole, so no gym is ever left half-written and the
+    import can simply be run again.
+    """
+    conn = db.open_connection(db_path)
+    try:
+        migrations.migrate(conn, 'gyms')
+        importer = GymImporter(conn, upsert=upsert, dry_run=dry_run)
+        batch = []
+        for where, record in read_gym_records(path, fmt):
+            try:
+                batch.append(normalize_gym(record))
+            except ValueError as e:
+                importer.stats.errors.append(f'{where}: {e}')
+                continue
+            if len(batch) >= batch_size:
+                importer.import_batch(batch)
+                batch = []
+                if progress:
+                    progress(importer.stats)
+        if batch:
+            importer.import_batch(batch)
+            if progress:
+                progress(importer.stats)
+        importer.finish()
+        return importer.stats
+    finally:
+        conn.close()
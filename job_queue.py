@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import db
+
+# Each process refreshes the heartbeat of its unfinished jobs this often
+HEARTBEAT_INTERVAL = 15
+# Another process's job is given up on once its heartbeat is this old
+STALE_AFTER = 120
+# Finished jobs are kept this long for polling clients, then purged
+RETENTION = 24 * 3600
+PURGE_INTERVAL = 3600
+
+def _boot_id() -> str:
+    """Identifies this boot of the machine, so a pid is never mistaken for one from before a reboot."""
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+def _owner_alive(owner: Optional[str], boot_id: str) -> Optional[bool]:
+    """Whether the process named by ``owner`` still runs, or None when that can't be told."""
+    owner_boot, _, pid = (owner or '').rpartition(':')
+    if not boot_id or not pid.isdigit():
+        # Without a boot id (not Linux) only the heartbeat can tell
+        return None
+    if owner_boot != boot_id:
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+class JobQueue:
+    """Thread-pool job queue with job state persisted in SQLite.
+
+    Jobs run ``func(**params)`` on a worker thread. The return value must be
+    JSON-serializable; it is stored as the job result once the job finishes.
+
+    Several processes can share one job database. Each job records the
+    process that owns it and a heartbeat that process keeps fresh, so a
+    starting process only fails jobs whose owner has exited or stopped
+    beating, never jobs a sibling worker is still running.
+    """
+
+    def __init__(self, db_path='data/jobs.db', max_workers: int = 4):
+        """Open (or create) the job database and start the worker pool."""
+        self._lock = threading.Lock()
+        self.conn = db.open_connection(db_path, check_same_thread=False)
+        self.boot_id = _boot_id()
+        self.owner = f'{self.boot_id}:{os.getpid()}'
+        self._create_tables()
+        self._fail_interrupted_jobs()
+        self.purge()
+        self._last_purge = time.monotonic()
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._stop = threading.Event()
+        self._maintainer = threading.Thread(target=self._maintain, name='job-heartbeat', daemon=True)
+        self._maintainer.start()
+
+    def _create_tables(self):
+        """Create the jobs table if it doesn't exist."""
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            params TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            owner TEXT,
+            heartbeat_at REAL
+        )
+        ''')
+        # Job databases created before jobs had owners
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(jobs)')}
+        for column, kind in (('owner', 'TEXT'), ('heartbeat_at', 'REAL')):
+            if column not in columns:
+                self.conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {kind}')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)')
+        self.conn.commit()
+
+    def _fail_interrupted_jobs(self) -> int:
+        """Mark unfinished jobs whose owning process has exited or gone silent as failed."""
+        now = time.time()
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, owner, heartbeat_at FROM jobs WHERE status IN ('queued', 'running') "
+                "AND (owner IS NULL OR owner != ?)",
+                (self.owner,)
+            ).fetchall()
+            orphaned = []
+            for row in rows:
+                alive = _owner_alive(row['owner'], self.boot_id)
+                stale = row['heartbeat_at'] is None or now - row['heartbeat_at'] > STALE_AFTER
+                if alive is False or (alive is None and stale):
+                    orphaned.append(row['id'])
+            # Re-checked in the UPDATE so a job that just finished is left alone
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                [('Interrupted by a server restart', now, job_id) for job_id in orphaned]
+            )
+            self.conn.commit()
+        return len(orphaned)
+
+    def _heartbeat(self):
+        """Show the other processes that this one's unfinished jobs are still alive."""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                (time.time(), self.owner)
+            )
+            self.conn.commit()
+
+    def _maintain(self):
+        """Background loop: heartbeat, fail orphaned jobs and purge old ones."""
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                self._heartbeat()
+                self._fail_interrupted_jobs()
+                if time.monotonic() - self._last_purge >= PURGE_INTERVAL:
+                    self._last_purge = time.monotonic()
+                    self.purge()
+            except Exception:
+                traceback.print_exc()
+
+    def _update(self, job_id: str, **fields):
+        """Update columns of a job row."""
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with self._lock:
+            self.conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+            self.conn.commit()
+
+    def submit(self, kind: str, func: Callable[..., Dict], params: Dict) -> str:
+        """Queue ``func(**params)`` and return the new job id immediately."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO jobs (id, kind, status, params, created_at, owner, heartbeat_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params), now, self.owner, now)
+            )
+            self.conn.commit()
+
+        self.executor.submit(self._run, job_id, func, params)
+        return job_id
+
+    def _run(self, job_id: str, func: Callable[..., Dict], params: Dict):
+        """Execute a job on a worker thread and record its outcome."""
+        self._update(job_id, status='running', started_at=time.time())
+        try:
+            result = func(**params)
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, status='failed', error=str(e), finished_at=time.time())
+        else:
+            self._update(job_id, status='done', result=json.dumps(result), finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get a job by ID with its params and result decoded."""
+        with self._lock:
+            row = self.conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def purge(self, older_than_seconds: int = RETENTION) -> int:
+        """Delete finished jobs older than the given age (runs at startup and hourly)."""
+        with self._lock:
+            cursor = self.conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND created_at < ?",
+                (time.time() - older_than_seconds,)
+            )
+            self.conn.commit()
+        return cursor.rowcount
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and close the database connection."""
+        self._stop.set()
+        self.executor.shutdown(wait=wait)
+        self._maintainer.join()
+        self.conn.close()
@@ -0,0 +1,198 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+import metrics
+
+T = TypeVar('T')
+
+# Seconds one provider gets before we give up on it and fail over
+DEFAULT_TIMEOUT = 120.0
+# Hedge delay used until a provider has enough latency samples for a percentile
+DEFAULT_HEDGE_DELAY = 15.0
+HEDGE_PERCENTILE = 95
+MIN_SAMPLES = 20
+SAMPLE_WINDOW = 200
+
+class LLMUnavailableError(RuntimeError):
+    """Every provider failed or timed out."""
+
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        detail = '; '.join(f'{provider}: {error}' for provider, error in errors.items())
+        super().__init__(f'No language model provider answered ({detail})')
+
+class ProviderStats:
+    """Rolling latency window and outcome counts for one provider."""
+
+    def __init__(self):
+        self.latencies = deque(maxlen=SAMPLE_WINDOW)
+        self.outcomes: Dict[str, int] = {}
+
+    def record(self, outcome: str, latency: Optional[float] = None):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of recent attempt latencies, or None without enough samples."""
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        rank = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered)))) - 1
+        return ordered[rank]
+
+class LLMDispatcher:
+    """Run one generation against a list of providers with timeouts, failover and hedging.
+
+    The first provider is tried first. If it raises or runs past ``timeout``
+    the next one is started (failover). With ``hedge`` on, the next provider
+    is also started once the first has been running longer than its recent
+    p95 latency; whichever answers first wins and the other is abandoned.
+    Every finished attempt, won or failed, feeds the latency window; an
+    abandoned one contributes the time it had run so far, a lower bound,
+    so a provider that keeps losing or timing out still pushes its
+    percentile up instead of looking only as slow as its wins.
+    Python can't interrupt a thread blocked on HTTP, so an abandoned call is
+    cancelled if it hasn't started and otherwise left to hit the LM's own
+    request timeout with its result discarded.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, hedge: bool = False,
+                 hedge_percentile: float = HEDGE_PERCENTILE, default_hedge_delay: float = DEFAULT_HEDGE_DELAY,
+                 max_workers: int = 8):
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self._stats: Dict[str, ProviderStats] = {}
+        self._winners: Dict[Tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-dispatch')
+
+    def _provider_stats(self, provider: str) -> ProviderStats:
+        stats = self._stats.get(provider)
+        if stats is None:
+            stats = self._stats.setdefault(provider, ProviderStats())
+        return stats
+
+    def _record(self, provider: str, outcome: str, latency: Optional[float] = None):
+        with self._lock:
+            self._provider_stats(provider).record(outcome, latency)
+        if metrics.ENABLED:
+            metrics.LLM_DISPATCH_ATTEMPTS.inc(1, provider, outcome)
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on ``provider`` before starting a hedge request."""
+        with self._lock:
+            observed = self._provider_stats(provider).percentile(self.hedge_percentile)
+        return observed if observed is not None else self.default_hedge_delay
+
+    def call(self, providers: Sequence[str], attempt: Callable[[str], T],
+             requested: Optional[str] = None) -> Tuple[T, str]:
+        """Return ``(attempt(provider), provider)`` from the first provider to succeed.
+
+        ``requested`` is the provider the user asked for, which may be missing
+        from ``providers`` when it isn't configured; it defaults to the first
+        provider. A win by any other provider is recorded as a failover.
+        """
+        queue = list(dict.fromkeys(providers))
+        if not queue:
+            raise ValueError('No providers to dispatch to')
+        if requested is None:
+            requested = queue[0]
+        first = queue[0]
+        pending: Dict[Future, Tuple[str, float]] = {}
+        errors: Dict[str, str] = {}
+        hedged = False
+
+        def launch():
+            provider = queue.pop(0)
+            pending[self._executor.submit(attempt, provider)] = (provider, time.monotonic())
+
+        launch()
+        while pending:
+            now = time.monotonic()
+            wake_at = min(start + self.timeout for _, start in pending.values())
+            can_hedge = self.hedge and not hedged and queue and len(pending) == 1
+            if can_hedge:
+                provider, start = next(iter(pending.values()))
+                hedge_at = start + self.hedge_delay(provider)
+                wake_at = min(wake_at, hedge_at)
+
+            done, _ = wait(list(pending), timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+
+            for future in done:
+                provider, start = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self._record(provider, 'error', now - start)
+                    errors[provider] = f'{type(e).__name__}: {e}'
+                    continue
+
+                self._record(provider, 'won', now - start)
+                for loser, (loser_provider, loser_start) in pending.items():
+                    loser.cancel()
+                    self._record(loser_provider, 'lost', now - loser_start)
+                if provider == requested:
+                    path = 'primary'
+                else:
+                    # A hedge only counts as one when it raced the requested provider
+                    path = 'hedge' if hedged and first == requested else 'failover'
+                self._record_winner(requested, provider, path)
+                return result, provider
+
+            # Abandon attempts that ran out of time
+            for future, (provider, start) in list(pending.items()):
+                if now - start >= self.timeout:
+                    future.cancel()
+                    del pending[future]
+                    self._record(provider, 'timeout', now - start)
+                    errors[provider] = f'timed out after {self.timeout:.0f}s'
+
+            # Fail over when nothing is left running, or hedge a slow request
+            if queue and not pending:
+                launch()
+            elif can_hedge and pending and now >= hedge_at:
+                hedged = True
+                launch()
+
+        self._record_winner(requested, 'none', 'failed')
+        raise LLMUnavailableError(errors)
+
+    def _record_winner(self, requested: str, winner: str, path: str):
+        with self._lock:
+            key = (requested, winner, path)
+            self._winners[key] = self._winners.get(key, 0) + 1
+        if metrics.ENABLED:
+            metrics.LLM_DISPATCH_WINNERS.inc(1, requested, winner, path)
+
+    def stats(self) -> Dict:
+        """Per-provider latency percentiles and outcomes, plus who won for each requested provider."""
+        with self._lock:
+            providers = {}
+            for provider, stats in self._stats.items():
+                providers[provider] = {
+                    'samples': len(stats.latencies),
+                    'p50_seconds': stats.percentile(50),
+                    'p95_seconds': stats.percentile(95),
+                    'outcomes': dict(stats.outcomes),
+                }
+            winners = [{'requested': requested, 'winner': winner, 'path': path, 'count': count}
+                       for (requested, winner, path), count in sorted(self._winners.items())]
+        for provider in providers:
+            providers[provider]['hedge_delay_seconds'] = self.hedge_delay(provider)
+        return {
+            'timeout_seconds': self.timeout,
+            'hedging': self.hedge,
+            'providers': providers,
+            'winners': winners,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,294 @@
+import argparse
+import json
+import re
+from typing import Dict, List, Optional, Sequence
+
+from equipment_index import canonical_equipment, get_equipment_index
+from exercise_index import get_exercise_index
+from term_extractor import get_term_extractor
+
+# Prescription per training goal
+GOAL_TEMPLATES = {
+    'strength': {
+        'exercises': 5, 'sets': 5, 'reps': '3-5', 'rest': '3 minutes',
+        'notes': 'Warm up with 2-3 lighter ramp-up sets before the first lift. Keep 1-2 reps in reserve and '
+                 'add weight once every set hits the top of the rep range with clean form.',
+    },
+    'hypertrophy': {
+        'exercises': 6, 'sets': 4, 'reps': '8-12', 'rest': '90 seconds',
+        'notes': 'Start with a 5-minute warm-up. Take sets close to failure with a controlled lowering phase, '
+                 'and add weight once you reach 12 reps on every set.',
+    },
+    'endurance': {
+        'exercises': 6, 'sets': 3, 'reps': '15-20', 'rest': '45 seconds',
+        'notes': 'Move briskly between exercises and keep rest short. Use a weight you can control for every rep; '
+                 'run the list as a circuit for extra conditioning.',
+    },
+}
+DEFAULT_GOAL = 'hypertrophy'
+
+GOAL_TERMS = {
+    'strength': ('strength', 'strong', 'stronger', 'powerlifting', 'power', 'heavy', 'max', '5x5'),
+    'hypertrophy': ('hypertrophy', 'muscle', 'muscles', 'size', 'mass', 'bodybuilding', 'grow', 'growth',
+                    'bulk', 'build', 'building', 'tone', 'toning'),
+    'endurance': ('endurance', 'conditioning', 'circuit', 'stamina', 'hiit', 'metabolic', 'cardio', 'sweat'),
+}
+_GOAL_OF = {term: goal for goal, terms in GOAL_TERMS.items() for term in terms}
+
+# Splits named by word rather than by muscle group
+SPLIT_TERMS = {
+    'full': ('Chest', 'Back', 'Legs', 'Shoulders', 'Arms', 'Core'),
+    'total': ('Chest', 'Back', 'Legs', 'Shoulders', 'Arms', 'Core'),
+    'whole': ('Chest', 'Back', 'Legs', 'Shoulders', 'Arms', 'Core'),
+    'push': ('Chest', 'Shoulders', 'Arms'),
+    'pull': ('Back', 'Arms'),
+}
+
+# Muscles inside a catalog group, and the exercise-name fragments that train them
+MUSCLE_HINTS = {
+    'tricep': ('tricep', 'skull', 'close-grip', 'dip', 'pushdown', 'extension'),
+    'bicep': ('curl', 'chin'),
+    'forearm': ('wrist', 'hammer', 'farmer'),
+    'glute': ('glute', 'thrust', 'bridge', 'deadlift', 'split squat'),
+    'hamstring': ('curl', 'romanian', 'deadlift'),
+    'quad': ('squat', 'leg press', 'extension', 'lunge'),
+    'calf': ('calf',),
+    'calves': ('calf',),
+    'lat': ('pulldown', 'pull-up', 'row'),
+    'delt': ('raise', 'press', 'fly'),
+    'oblique': ('twist', 'side', 'woodchop'),
+}
+
+# Words that carry no request detail; anything else the planner doesn't know sends the request to the LLM
+FILLER_WORDS = {
+    'a', 'an', 'and', 'the', 'for', 'with', 'my', 'me', 'i', 'im', 'want', 'need', 'like', 'would', 'give',
+    'make', 'create', 'design', 'help', 'plan', 'program', 'routine', 'session', 'workout', 'workouts',
+    'training', 'train', 'day', 'today', 'exercise', 'exercises', 'focus', 'focused', 'on', 'using', 'only',
+    'just', 'some', 'please', 'of', 'to', 'in', 'at', 'gym', 'quick', 'short', 'fast', 'long',
+    'upper', 'lower', 'split', 'body', 'weights', 'weight', 'free', 'minute', 'minutes', 'min', 'mins',
+    'hour', 'beginner', 'intermediate', 'advanced', 'good', 'solid', 'simple', 'basic', 'or', 'all', 'around',
+}
+
+# Share of a description's words the planner must recognize before it answers without the LLM
+MIN_COVERAGE = 0.8
+
+# Names that mark a multi-joint lift; these go first in a plan
+_COMPOUND = re.compile(r'press|squat|deadlift|row|pull-?up|chin-?up|dip|lunge|clean|thrust|push-?up|pulldown',
+                       re.IGNORECASE)
+_WORD = re.compile(r'[a-z0-9]+')
+_MINUTES = re.compile(r'(\d+)\s*(?:-\s*)?(?:min|mins|minute|minutes)\b')
+
+def _hinted(ex: Dict, name_hints: Dict[str, List[str]]) -> bool:
+    """Whether an exercise's name matches a muscle the request named in its group."""
+    name = ex['name'].lower()
+    return any(hint in name for hint in name_hints.get(ex['muscle_group'], ()))
+
+def _title(groups: Sequence[str], all_groups: Sequence[str]) -> str:
+    if set(groups) >= set(all_groups):
+        return 'Full Body'
+    if len(groups) <= 2:
+        return ' and '.join(groups)
+    return ', '.join(groups[:-1]) + ' and ' + groups[-1]
+
+class RouteDecision:
+    """Whether the local planner should answer a request, and why."""
+
+    def __init__(self, local: bool, coverage: float, reason: str):
+        self.local = local
+        self.coverage = coverage
+        self.reason = reason
+
+    def to_dict(self) -> Dict:
+        return {'local': self.local, 'coverage': round(self.coverage, 3), 'reason': self.reason}
+
+class LocalPlanner:
+    """Deterministic workout plans built from the catalog and a gym's equipment.
+
+    A request is read for a goal (strength, hypertrophy or endurance), target
+    muscle groups and equipment. Exercise slots are shared out across the
+    groups round-robin, compound lifts come first, and only exercises the
+    gym can support are used. The result has the same output fields as the
+    LLM's ``GenerateWorkout`` signature.
+    """
+
+    def __init__(self, db_path='data/exercises.db', min_coverage: float = MIN_COVERAGE):
+        self.db_path = db_path
+        self.min_coverage = min_coverage
+
+    def parse(self, description: str) -> Dict:
+        """Goal, muscle groups, equipment, time limit and unrecognized words in ``description``."""
+        extractor = get_term_extractor(self.db_path)
+        groups, equipment = extractor.extract(description)
+        words = _WORD.findall((description or '').lower())
+
+        goal = None
+        split_groups: List[str] = []
+        hints: Dict[str, List[str]] = {}
+        unknown = []
+        for word in words:
+            hint = MUSCLE_HINTS.get(word) or MUSCLE_HINTS.get(word.rstrip('s'))
+            for group in (extractor.terms.get(word, ((), ()))[0] if hint else ()):
+                group_hints = hints.setdefault(group, [])
+                group_hints.extend(h for h in hint if h not in group_hints)
+            if word in _GOAL_OF:
+                goal = goal or _GOAL_OF[word]
+            elif word in SPLIT_TERMS:
+                split_groups.extend(g for g in SPLIT_TERMS[word] if g not in split_groups)
+            elif word not in FILLER_WORDS and word not in extractor.terms and not word.isdigit():
+                unknown.append(word)
+
+        catalog_groups = get_exercise_index(self.db_path).muscle_groups
+        for group in split_groups:
+            if group in catalog_groups and group not in groups:
+                groups.append(group)
+
+        minutes = _MINUTES.search((description or '').lower())
+        return {
+            'goal': goal,
+            'muscle_groups': groups,
+            'equipment': equipment,
+            'name_hints': hints,
+            'minutes': int(minutes.group(1)) if minutes else None,
+            'quick': any(word in ('quick', 'short', 'fast') for word in words),
+            'unknown_words': unknown,
+            'word_count': len(words),
+        }
+
+    def route(self, description: str, gym_equipment: Optional[Sequence[Dict]] = None) -> RouteDecision:
+        """Answer locally only when every detail of the request is something the planner understands
+        and the gym has something for every muscle group it names."""
+        request = self.parse(description)
+        if not request['word_count']:
+            return RouteDecision(False, 0.0, 'empty description')
+        coverage = 1 - len(request['unknown_words']) / request['word_count']
+        if not request['muscle_groups']:
+            return RouteDecision(False, coverage, 'no muscle groups named')
+        if coverage < self.min_coverage:
+            return RouteDecision(False, coverage, 'unrecognized: ' + ', '.join(request['unknown_words'][:5]))
+        candidates = self.candidates(gym_equipment or [], request['equipment'], request['name_hints'])
+        missing = [g for g in request['muscle_groups'] if not any(ex['muscle_group'] == g for ex in candidates)]
+        if missing:
+            return RouteDecision(False, coverage, 'no exercises available for ' + ', '.join(missing))
+        return RouteDecision(True, coverage, 'formulaic request')
+
+    def candidates(self, gym_equipment: Sequence[Dict], equipment: Sequence[str],
+                   name_hints: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        """Catalog exercises the gym supports, narrowed to the requested equipment when that leaves any.
+
+        Exercises for a muscle the request named are kept whatever they use,
+        so "biceps with cables" can still fall back to a dumbbell curl.
+        """
+        exercises = list(get_exercise_index(self.db_path).exercises)
+        if gym_equipment:
+            equipment_index = get_equipment_index(self.db_path)
+            available = equipment_index.availability(item['name'] for item in gym_equipment)
+            exercises = equipment_index.filter(exercises, available)
+        if equipment:
+            # "with dumbbells" keeps bodyweight moves too; they need nothing extra
+            wanted = {canonical_equipment(e) for e in equipment}
+            narrowed = [ex for ex in exercises if canonical_equipment(ex.get('equipment')) in wanted | {None}
+                        or _hinted(ex, name_hints or {})]
+            if narrowed:
+                exercises = narrowed
+        return exercises
+
+    def select(self, groups: Sequence[str], exercises: Sequence[Dict], count: int,
+               equipment: Sequence[str] = (), name_hints: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        """Up to ``count`` exercises shared across ``groups``, compound lifts first, no repeated names.
+
+        Within a group, exercises whose name matches a muscle the request named
+        in that group come first ("triceps" puts Tricep Extension ahead of Bicep
+        Curl in Arms), then those using the requested ``equipment``, so
+        "biceps with cables" falls back to a dumbbell curl before a cable
+        tricep move.
+        """
+        wanted = {canonical_equipment(e) for e in equipment}
+        name_hints = name_hints or {}
+        queues: Dict[str, List[Dict]] = {}
+        for group in groups:
+            in_group = [ex for ex in exercises if ex['muscle_group'] == group]
+            # Named muscles, requested equipment, compound lifts, then catalog order
+            in_group.sort(key=lambda ex: (group in name_hints and not _hinted(ex, name_hints),
+                                          bool(wanted) and canonical_equipment(ex.get('equipment')) not in wanted,
+                                          not _COMPOUND.search(ex['name']), ex['id']))
+            queues[group] = in_group
+
+        chosen: List[Dict] = []
+        names = set()
+        while len(chosen) < count and any(queues.values()):
+            for group in groups:
+                queue = queues[group]
+                while queue and queue[0]['name'].lower() in names:
+                    queue.pop(0)
+                if not queue or len(chosen) >= count:
+                    continue
+                used_equipment = {ex['equipment'] for ex in chosen if ex['muscle_group'] == group}
+                pick = next((ex for ex in queue if ex['equipment'] not in used_equipment), queue[0])
+                queue.remove(pick)
+                chosen.append(pick)
+                names.add(pick['name'].lower())
+        return chosen
+
+    def plan(self, description: str, gym_equipment: Optional[Sequence[Dict]] = None) -> Dict:
+        """A complete plan dict with the ``GenerateWorkout`` output fields, built without any network call."""
+        request = self.parse(description)
+        goal = request['goal'] or DEFAULT_GOAL
+        template = GOAL_TEMPLATES[goal]
+        catalog_groups = get_exercise_index(self.db_path).muscle_groups
+        groups = request['muscle_groups'] or list(catalog_groups)
+
+        count = template['exercises']
+        if request['minutes']:
+            # Roughly eight minutes per exercise including rest
+            count = request['minutes'] // 8
+        elif request['quick']:
+            count -= 2
+        # At least one exercise per named group (up to eight) and never fewer than three
+        count = max(3, min(max(count, min(len(groups), 8)), 10))
+
+        candidates = self.candidates(gym_equipment or [], request['equipment'], request['name_hints'])
+        exercises = self.select(groups, candidates, count, request['equipment'], request['name_hints'])
+        sets, reps, rest = template['sets'], template['reps'], template['rest']
+        plan_exercises = [{
+            'id': ex['id'],
+            'name': ex['name'],
+            'muscle_group': ex['muscle_group'],
+            'equipment': ex['equipment'],
+            'sets': sets,
+            'reps': reps,
+            'rest': rest,
+        } for ex in exercises]
+
+        covered = [g for g in groups if any(ex['muscle_group'] == g for ex in exercises)]
+        focus = _title(covered or groups, catalog_groups)
+        # One name per piece ("Dumbbells" and "Dumbbell" are both in the catalog)
+        equipment_names = {}
+        for item in request['equipment']:
+            equipment_names.setdefault(canonical_equipment(item) or item, item)
+        equipment_note = f" using {', '.join(equipment_names.values()).lower()}" if equipment_names else ''
+        return {
+            'title': f'{focus} {goal.title()} Workout',
+            'description': f"{'An' if goal[0] in 'aeiou' else 'A'} {goal} session for {focus.lower()}{equipment_note}: "
+                           f'{len(plan_exercises)} exercises, {sets} sets of {reps} reps.',
+            'exercises': plan_exercises,
+            'sets_and_reps': [f"{ex['name']}: {sets} sets of {reps} reps" for ex in plan_exercises],
+            'rest_times': [f'{rest} between sets', 'Compound lifts first; rest a little longer after them'
+                           if goal != 'endurance' else 'Up to 2 minutes between circuit rounds'],
+            'notes': template['notes'],
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a workout plan locally, without a language model')
+    parser.add_argument('description', help='Workout description')
+    parser.add_argument('--db', default='data/exercises.db', help='Exercise database')
+    parser.add_argument('--route', action='store_true', help='Only report whether the request would be answered locally')
+    args = parser.parse_args()
+
+    planner = LocalPlanner(args.db)
+    decision = planner.route(args.description)
+    print(json.dumps(decision.to_dict()))
+    if not args.route:
+        print(json.dumps(planner.plan(args.description), indent=2))
+
+if __name__ == "__main__":
+    main()
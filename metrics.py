@@ -0,0 +1,309 @@
+import bisect
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+# Set WORKOUT_METRICS=0 to skip all instrumentation
+ENABLED = os.environ.get('WORKOUT_METRICS', '1') != '0'
+
+# Seconds; covers sub-millisecond SQLite lookups up to slow LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _escape(value) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    """Render ``{name="value",...}``, or an empty string when there are no labels."""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+class Counter:
+    """A monotonically increasing value per label combination."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values):
+        """Add ``amount`` to the series for ``label_values``."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.label_names, labels)} {value}'
+                for labels, value in values]
+
+class Histogram:
+    """Bucketed observations per label combination."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        """Record one observation for ``label_values``."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        """Observe the wall-clock duration of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count))
+                            for labels, (counts, total, count) in self._series.items())
+        lines = []
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}')
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f'{self.name}_sum{label_text} {total}')
+            lines.append(f'{self.name}_count{label_text} {count}')
+        return lines
+
+class Registry:
+    """The set of metrics exposed on /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Flask request latency by route.',
+    ('method', 'route', 'status'))
+SQL_LATENCY = registry.histogram(
+    'sqlite_query_duration_seconds', 'SQLite statement execution time by database and statement.',
+    ('database', 'statement'))
+LLM_LATENCY = registry.histogram(
+    'llm_request_duration_seconds', 'Language model call latency by provider.',
+    ('provider', 'model'))
+LLM_TOKENS = registry.counter(
+    'llm_tokens_total', 'Language model tokens by provider and kind (prompt or completion).',
+    ('provider', 'model', 'kind'))
+LLM_ERRORS = registry.counter(
+    'llm_request_errors_total', 'Language model calls that raised.',
+    ('provider', 'model'))
+PROMPT_CONTEXT_TOKENS = registry.counter(
+    'prompt_context_tokens_total', 'Estimated prompt tokens for exercise and equipment context, as JSON (raw) and packed.',
+    ('section', 'kind'))
+LLM_DISPATCH_ATTEMPTS = registry.counter(
+    'llm_dispatch_attempts_total', 'Provider attempts made by the dispatcher by outcome (won, lost, error, timeout).',
+    ('provider', 'outcome'))
+LLM_DISPATCH_WINNERS = registry.counter(
+    'llm_dispatch_winner_total', 'Which provider answered a dispatched generation and how (primary, hedge, failover).',
+    ('requested', 'winner', 'path'))
+PLAN_ROUTES = registry.counter(
+    'workout_plan_route_total', 'Workout plan requests by where the plan came from (cache, local or llm).',
+    ('route',))
+SESSION_COOKIE_BYTES = registry.counter(
+    'session_cookie_bytes_total', 'Session cookie bytes received, as sent (server_side) and as a signed cookie would have been.',
+    ('kind',))
+READ_CACHE_LOOKUPS = registry.counter(
+    'read_cache_lookups_total', 'Cached gym and workout reads by generation and result (hit, miss, stale, uncached).',
+    ('generation', 'result'))
+GENERATION_PHASE_LATENCY = registry.histogram(
+    'workout_generation_phase_seconds', 'Time spent in each step of generating a workout plan.',
+    ('phase',))
+
+@contextmanager
+def _untimed():
+    yield
+
+def time_phase(phase: str):
+    """Context manager timing one step of workout generation."""
+    if not ENABLED:
+        return _untimed()
+    return GENERATION_PHASE_LATENCY.time(phase)
+
+def record_packed_context(packed):
+    """Count the raw and packed prompt tokens of one PackedContext."""
+    if not ENABLED:
+        return
+    for section, tokens in packed.raw_tokens.items():
+        PROMPT_CONTEXT_TOKENS.inc(tokens, section, 'raw')
+    for section, tokens in packed.packed_tokens.items():
+        PROMPT_CONTEXT_TOKENS.inc(tokens, section, 'packed')
+
+def provider_of(model: str) -> str:
+    """``openai`` for ``openai/gpt-4o-mini``; the whole name when there is no prefix."""
+    return model.split('/', 1)[0] if '/' in model else model
+
+# Where the table name sits for each kind of statement
+_TABLE_PATTERNS = {
+    'SELECT': re.compile(r'\bFROM\s+["`\[]?(\w+)', re.IGNORECASE),
+    'DELETE': re.compile(r'\bFROM\s+["`\[]?(\w+)', re.IGNORECASE),
+    'INSERT': re.compile(r'\bINTO\s+["`\[]?(\w+)', re.IGNORECASE),
+    'REPLACE': re.compile(r'\bINTO\s+["`\[]?(\w+)', re.IGNORECASE),
+    'UPDATE': re.compile(r'^\s*UPDATE\s+(?:OR\s+\w+\s+)?["`\[]?(\w+)', re.IGNORECASE),
+}
+
+@lru_cache(maxsize=1024)
+def statement_label(sql: str) -> str:
+    """A low-cardinality label for a statement, e.g. ``SELECT workouts``."""
+    words = sql.split(None, 1)
+    if not words:
+        return 'OTHER'
+    verb = words[0].upper()
+    pattern = _TABLE_PATTERNS.get(verb)
+    match = pattern.search(sql) if pattern else None
+    return f'{verb} {match.group(1)}' if match else verb
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records how long each statement takes, from execute through its last fetch.
+
+    SQLite steps through a query as rows are fetched, so timing execute
+    alone misses most of a large read. Time is summed across execute and
+    the fetches, then observed once: when the rows run out, or when the
+    cursor runs another statement, is closed or is dropped.
+    """
+
+    _label = None
+    _elapsed = 0.0
+
+    def _observe(self):
+        if self._label is not None:
+            SQL_LATENCY.observe(self._elapsed, self.connection.database_label, self._label)
+            self._label = None
+
+    def execute(self, sql, parameters=()):
+        self._observe()
+        self._label, self._elapsed = statement_label(sql), 0.0
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._elapsed += time.perf_counter() - start
+            if self.description is None:
+                # No rows to fetch (or the statement failed): it's done
+                self._observe()
+
+    def executemany(self, sql, seq_of_parameters):
+        self._observe()
+        self._label, self._elapsed = statement_label(sql), 0.0
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._elapsed += time.perf_counter() - start
+            self._observe()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._elapsed += time.perf_counter() - start
+        if row is None:
+            self._observe()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._elapsed += time.perf_counter() - start
+        if len(rows) < size:
+            self._observe()
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._elapsed += time.perf_counter() - start
+            self._observe()
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._elapsed += time.perf_counter() - start
+            self._observe()
+            raise
+        self._elapsed += time.perf_counter() - start
+        return row
+
+    def close(self):
+        self._observe()
+        super().close()
+
+    def __del__(self):
+        self._observe()
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (and execute shortcuts) feed SQL_LATENCY."""
+
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.database_label = os.path.splitext(os.path.basename(str(database)))[0] or 'memory'
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
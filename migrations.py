@@ -0,0 +1,235 @@
+import argparse
+import sqlite3
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple, Union
+
+import plan_storage
+
+# A migration step is either a SQL statement or a callable taking the connection
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+# Ordered migrations for each database in data/. Version 1 of every schema
+# uses IF NOT EXISTS so databases created before migrations existed upgrade
+# cleanly. Never edit a released migration; append a new one instead.
+# cache_generations rows are bumped by triggers, so every writer of a file
+# (any process) invalidates the read caches in app.py.
+MIGRATIONS: Dict[str, List[Tuple[int, str, List[Step]]]] = {
+    'exercises': [
+        (1, 'Create exercises table', [
+            '''
+            CREATE TABLE IF NOT EXISTS exercises (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                muscle_group TEXT NOT NULL,
+                equipment TEXT
+            )
+            ''',
+        ]),
+        (2, 'Index exercises by muscle group and equipment', [
+            'CREATE INDEX IF NOT EXISTS idx_exercises_muscle_group ON exercises (muscle_group)',
+            'CREATE INDEX IF NOT EXISTS idx_exercises_equipment ON exercises (equipment)',
+        ]),
+    ],
+    'gyms': [
+        (1, 'Create gyms and equipment tables', [
+            '''
+            CREATE TABLE IF NOT EXISTS gyms (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                location TEXT,
+                description TEXT
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS equipment (
+                id INTEGER PRIMARY KEY,
+                gym_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                category TEXT NOT NULL,
+                quantity INTEGER DEFAULT 1,
+                description TEXT,
+                FOREIGN KEY (gym_id) REFERENCES gyms (id)
+            )
+            ''',
+        ]),
+        (2, 'Index equipment by gym', [
+            'CREATE INDEX IF NOT EXISTS idx_equipment_gym ON equipment (gym_id, category, name)',
+            'CREATE INDEX IF NOT EXISTS idx_gyms_name ON gyms (name)',
+        ]),
+        (3, 'Count writes per table for the read cache', [
+            '''
+            CREATE TABLE IF NOT EXISTS cache_generations (
+                name TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL DEFAULT 0
+            )
+            ''',
+            "INSERT OR IGNORE INTO cache_generations (name) VALUES ('gyms'), ('equipment')",
+            'CREATE TRIGGER IF NOT EXISTS gyms_insert_generation AFTER INSERT ON gyms '
+            "BEGIN UPDATE cache_generations SET generation = generation + 1 WHERE name = 'gyms'; END",
+            'CREATE TRIGGER IF NOT EXISTS gyms_update_generation AFTER UPDATE ON gyms '
+            "BEGIN UPDATE cache_generations SET generation = generation + 1 WHERE name = 'gyms'; END",
+            'CREATE TRIGGER IF NOT EXISTS gyms_delete_generation AFTER DELETE ON gyms '
+            "BEGIN UPDATE cache_generations SET generation = generation + 1 WHERE name = 'gyms'; END",
+            'CREATE TRIGGER IF NOT EXISTS equipment_insert_generation AFTER INSERT ON equipment '
+            "BEGIN UPDATE cache_generations SET generation = generation + 1 WHERE name = 'equipment'; END",
+            'CREATE TRIGGER IF NOT EXISTS equipment_update_generation AFTER UPDATE ON equipment '
+            "BEGIN UPDATE cache_generations SET generation = generation + 1 WHERE name = 'equipment'; END",
+            'CREATE TRIGGER IF NOT EXISTS equipment_delete_generation AFTER DELETE ON equipment '
+            "BEGIN UPDATE cache_generations SET generation = generation + 1 WHERE name = 'equipment'; END",
+        ]),
+    ],
+    'workouts': [
+        (1, 'Create workouts and workout_logs tables', [
+            '''
+            CREATE TABLE IF NOT EXISTS workouts (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT,
+                date TEXT NOT NULL,
+                gym_id INTEGER,
+                workout_data TEXT NOT NULL
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS workout_logs (
+                id INTEGER PRIMARY KEY,
+                workout_id INTEGER NOT NULL,
+                exercise_name TEXT NOT NULL,
+                set_number INTEGER NOT NULL,
+                reps INTEGER,
+                weight REAL,
+                rest_time INTEGER,
+                notes TEXT,
+                timestamp TEXT NOT NULL,
+                FOREIGN KEY (workout_id) REFERENCES workouts (id)
+            )
+            ''',
+        ]),
+        (2, 'Index workout logs and workout dates', [
+            'CREATE INDEX IF NOT EXISTS idx_workout_logs_workout ON workout_logs (workout_id, exercise_name, set_number)',
+            'CREATE INDEX IF NOT EXISTS idx_workouts_date ON workouts (date)',
+        ]),
+        (3, 'Add idempotency keys to workout logs', [
+            'ALTER TABLE workout_logs ADD COLUMN client_id TEXT',
+            'CREATE UNIQUE INDEX IF NOT EXISTS idx_workout_logs_client_id ON workout_logs (client_id) '
+            'WHERE client_id IS NOT NULL',
+        ]),
+        (4, 'Normalize workout plans into workout_exercises', [
+            '''
+            CREATE TABLE IF NOT EXISTS workout_exercises (
+                id INTEGER PRIMARY KEY,
+                workout_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                exercise_id INTEGER,
+                name TEXT NOT NULL,
+                muscle_group TEXT,
+                equipment TEXT,
+                sets INTEGER,
+                reps,  -- untyped so 12 and "8-12" both round-trip unchanged
+                rest,
+                extra TEXT,
+                FOREIGN KEY (workout_id) REFERENCES workouts (id)
+            )
+            ''',
+            'CREATE UNIQUE INDEX IF NOT EXISTS idx_workout_exercises_workout ON workout_exercises (workout_id, position)',
+            'CREATE INDEX IF NOT EXISTS idx_workout_exercises_name ON workout_exercises (name, workout_id)',
+            'ALTER TABLE workouts ADD COLUMN notes TEXT',
+            'ALTER TABLE workouts ADD COLUMN sets_and_reps TEXT',
+            'ALTER TABLE workouts ADD COLUMN rest_times TEXT',
+            'ALTER TABLE workouts ADD COLUMN plan_normalized INTEGER NOT NULL DEFAULT 0',
+            plan_storage.backfill,
+        ]),
+        (5, 'Track finished workouts and a per-workout log version', [
+            'ALTER TABLE workouts ADD COLUMN finished_at TEXT',
+            'ALTER TABLE workouts ADD COLUMN log_version INTEGER NOT NULL DEFAULT 0',
+        ]),
+        (6, 'Count workout list changes for the read cache', [
+            '''
+            CREATE TABLE IF NOT EXISTS cache_generations (
+                name TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL DEFAULT 0
+            )
+            ''',
+            "INSERT OR IGNORE INTO cache_generations (name) VALUES ('workouts')",
+            'CREATE TRIGGER IF NOT EXISTS workouts_insert_generation AFTER INSERT ON workouts '
+            "BEGIN UPDATE cache_generations SET generation = generation + 1 WHERE name = 'workouts'; END",
+            'CREATE TRIGGER IF NOT EXISTS workouts_update_generation AFTER UPDATE OF title, description, date, gym_id ON workouts '
+            "BEGIN UPDATE cache_generations SET generation = generation + 1 WHERE name = 'workouts'; END",
+            'CREATE TRIGGER IF NOT EXISTS workouts_delete_generation AFTER DELETE ON workouts '
+            "BEGIN UPDATE cache_generations SET generation = generation + 1 WHERE name = 'workouts'; END",
+        ]),
+    ],
+}
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Highest migration version applied to a database (0 if none)."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TEXT NOT NULL
+    )
+    ''')
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+def migrate(conn: sqlite3.Connection, schema: str) -> int:
+    """Apply any pending migrations for ``schema`` and return the resulting version.
+
+    Each migration runs in its own write transaction, so concurrent processes
+    starting at once serialize on the lock and skip work already done.
+    """
+    migrations = MIGRATIONS[schema]
+    version = current_version(conn)
+    if conn.in_transaction:
+        conn.commit()
+
+    for migration_version, description, steps in migrations:
+        if migration_version <= version:
+            continue
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another process may have applied it while we waited for the lock
+            if current_version(conn) >= migration_version:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                'INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                (migration_version, description, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = migration_version
+
+    return max(version, current_version(conn))
+
+DATABASES = {
+    'exercises': 'data/exercises.db',
+    'gyms': 'data/gyms.db',
+    'workouts': 'data/workouts.db',
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations to the databases in data/")
+    parser.add_argument('--schema', choices=sorted(DATABASES), help='Only migrate this database')
+    args = parser.parse_args()
+    
+    for schema, db_path in DATABASES.items():
+        if args.schema and schema != args.schema:
+            continue
+        conn = sqlite3.connect(db_path)
+        before = current_version(conn)
+        after = migrate(conn, schema)
+        conn.close()
+        print(f"{schema}: version {before} -> {after}")
+
+if __name__ == "__main__":
+    main()
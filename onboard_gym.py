@@ -3,6 +3,9 @@ import os
 import argparse
 from typing import List, Dict, Optional
 import json
+import time
+import migrations
+from gym_import import FORMATS, DEFAULT_BATCH_SIZE, GymImporter, import_file, normalize_gym
 
 class GymDB:
     def __init__(self, db_path='data/gyms.db'):
@@ -16,31 +19,8 @@ class GymDB:
         self._create_tables()
     
     def _create_tables(self):
-        """Create the necessary tables if they don't exist."""
-        # Create gyms table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS gyms (
-            id INTEGER PRIMARY KEY,
-            name TEXT NOT NULL,
-            location TEXT,
-            description TEXT
-        )
-        ''')
-        
-        # Create equipment table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS equipment (
-            id INTEGER PRIMARY KEY,
-            gym_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            category TEXT NOT NULL,
-            quantity INTEGER DEFAULT 1,
-            description TEXT,
-            FOREIGN KEY (gym_id) REFERENCES gyms (id)
-        )
-        ''')
-        
-        self.conn.commit()
+        """Create or upgrade the schema through the shared migrations."""
+        migrations.migrate(self.conn, 'gyms')
     
     def add_gym(self, name: str, location: str = None, description: str = None) -> int:
         """Add a new gym to the database."""
@@ -208,13 +188,45 @@ def save_to_json(gym_info: Dict, filename: str):
         json.dump(gym_info, f, indent=2)
     print(f"\nGym information saved to {filename}")
 
+def run_import(args):
+    """Bulk-import gyms from a JSON, JSONL or CSV file."""
+    start = time.perf_counter()
+    
+    def progress(stats):
+        print(f"  batch {stats.batches}: {stats.gyms_inserted + stats.gyms_matched:,} gyms")
+    
+    stats = import_file(args.import_file, db_path=args.db, fmt=args.format, batch_size=args.batch_size,
+                        dry_run=args.dry_run, upsert=not args.insert_only, progress=progress)
+    
+    for error in stats.errors:
+        print(f"Skipped {error}")
+    verb = "Would import" if args.dry_run else "Imported"
+    print(f"\n{verb} {stats.gyms_inserted:,} new gyms ({stats.gyms_matched:,} already existed, "
+          f"{stats.gyms_updated:,} of them updated), {stats.equipment_inserted:,} new and "
+          f"{stats.equipment_updated:,} updated equipment rows "
+          f"in {time.perf_counter() - start:.1f} s ({len(stats.errors)} invalid records skipped)")
+    if args.dry_run:
+        print("Dry run: nothing was written.")
+
 def main():
     parser = argparse.ArgumentParser(description="Onboard a new gym by describing available equipment")
     parser.add_argument('--interactive', action='store_true', help='Use interactive prompt mode')
     parser.add_argument('--description', type=str, help='Text description of gym equipment')
     parser.add_argument('--save-json', type=str, help='Save gym info to a JSON file')
+    parser.add_argument('--import', dest='import_file', type=str,
+                        help='Bulk-import gyms from a JSON, JSONL or CSV file (JSON may be a --save-json file)')
+    parser.add_argument('--format', choices=FORMATS, help='Import file format (default: from the extension)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Gyms written per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='Validate and count the import without writing')
+    parser.add_argument('--insert-only', action='store_true',
+                        help='Always add new rows instead of updating gyms matched by name and location')
+    parser.add_argument('--db', type=str, default='data/gyms.db', help='Gym database to write to')
     args = parser.parse_args()
     
+    if args.import_file:
+        run_import(args)
+        return
+    
     # Determine which mode to use
     if args.interactive:
         gym_info = interactive_onboarding()
@@ -225,25 +237,9 @@ def main():
         parser.print_help()
         return
     
-    # Save to database
-    gym_db = GymDB()
-    
-    # Add gym
-    gym_id = gym_db.add_gym(
-        name=gym_info['name'],
-        location=gym_info['location'],
-        description=gym_info['description']
-    )
-    
-    # Add equipment
-    for item in gym_info['equipment']:
-        gym_db.add_equipment(
-            gym_id=gym_id,
-            name=item['name'],
-            category=item['category'],
-            quantity=item['quantity'],
-            description=item.get('description')
-        )
+    # Save the gym and all its equipment in one transaction
+    gym_db = GymDB(args.db)
+    gym_id = GymImporter(gym_db.conn, upsert=False).import_batch([normalize_gym(gym_info)])[0]
     
     # Display summary
     display_gym_summary(gym_db, gym_id)
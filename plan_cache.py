@@ -0,0 +1,123 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import db
+from program_registry import PROGRAM_VERSION
+
+# The compiled program is the prompt, so its version doubles as the prompt version
+PROMPT_VERSION = PROGRAM_VERSION
+
+class PlanCache:
+    """SQLite-backed cache of generated workout plans with LRU and TTL eviction."""
+
+    def __init__(self, db_path='data/plan_cache.db', max_entries: int = 5000,
+                 ttl_seconds: int = 7 * 24 * 3600, prompt_version: int = PROMPT_VERSION):
+        """Open (or create) the cache database."""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.prompt_version = prompt_version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.conn = db.open_connection(db_path, check_same_thread=False)
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create the cache table if it doesn't exist."""
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS plan_cache (
+            cache_key TEXT PRIMARY KEY,
+            plan TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hit_count INTEGER DEFAULT 0
+        )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_plan_cache_last_used ON plan_cache (last_used)')
+        self.conn.commit()
+
+    @staticmethod
+    def normalize_description(description: str) -> str:
+        """Lowercase, strip punctuation and collapse whitespace in a request."""
+        description = re.sub(r'[^a-z0-9\s-]', ' ', description.lower())
+        return ' '.join(description.split())
+
+    @staticmethod
+    def equipment_fingerprint(gym_equipment: List[Dict]) -> str:
+        """Order-independent hash of a gym equipment list."""
+        items = sorted(json.dumps(item, sort_keys=True) for item in gym_equipment)
+        return hashlib.sha256('\n'.join(items).encode('utf-8')).hexdigest()
+
+    def make_key(self, description: str, gym_equipment: List[Dict], model: str) -> str:
+        """Build the cache key for a request."""
+        parts = [
+            self.normalize_description(description),
+            self.equipment_fingerprint(gym_equipment),
+            model,
+            str(self.prompt_version),
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[Dict]:
+        """Return a cached plan, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT plan, created_at FROM plan_cache WHERE cache_key = ?', (cache_key,)
+            ).fetchone()
+
+            if row is None or now - row['created_at'] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            self.conn.execute(
+                'UPDATE plan_cache SET last_used = ?, hit_count = hit_count + 1 WHERE cache_key = ?',
+                (now, cache_key)
+            )
+            self.conn.commit()
+            self.hits += 1
+        return json.loads(row['plan'])
+
+    def put(self, cache_key: str, plan: Dict):
+        """Store a generated plan and evict old entries."""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO plan_cache (cache_key, plan, created_at, last_used, hit_count) '
+                'VALUES (?, ?, ?, ?, 0)',
+                (cache_key, json.dumps(plan), now, now)
+            )
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the least recently used ones over the size limit."""
+        self.conn.execute('DELETE FROM plan_cache WHERE created_at < ?', (now - self.ttl_seconds,))
+        self.conn.execute('''
+        DELETE FROM plan_cache WHERE cache_key IN (
+            SELECT cache_key FROM plan_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+        )
+        ''', (self.max_entries,))
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus the current cache size."""
+        with self._lock:
+            entries = self.conn.execute('SELECT COUNT(*) FROM plan_cache').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+        }
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
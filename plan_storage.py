@@ -0,0 +1,96 @@
+import json
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Exercise keys stored in their own workout_exercises columns
+EXERCISE_COLUMNS = ('exercise_id', 'name', 'muscle_group', 'equipment', 'sets', 'reps', 'rest')
+
+# Alternate keys the LLM sometimes uses for the same fields
+_KEY_ALIASES = {
+    'id': 'exercise_id',
+    'rest_time': 'rest',
+}
+
+def exercise_rows(workout_id: int, exercises: Iterable[Dict[str, Any]]) -> List[Tuple]:
+    """Rows for workout_exercises from a plan's exercise dicts, in plan order."""
+    rows = []
+    for position, exercise in enumerate(exercises or []):
+        if not isinstance(exercise, dict):
+            exercise = {'name': str(exercise)}
+
+        values = {}
+        extra = {}
+        for key, value in exercise.items():
+            column = _KEY_ALIASES.get(key, key)
+            if column in EXERCISE_COLUMNS and column not in values:
+                values[column] = value
+            else:
+                extra[key] = value
+
+        rows.append((
+            workout_id, position,
+            values.get('exercise_id'),
+            values.get('name') or 'Unnamed exercise',
+            values.get('muscle_group'),
+            values.get('equipment'),
+            values.get('sets'),
+            values.get('reps'),
+            values.get('rest'),
+            json.dumps(extra) if extra else None,
+        ))
+    return rows
+
+def insert_plan(conn, workout_id: int, plan: Dict[str, Any]):
+    """Write a plan's normalized rows and plan-level columns (caller commits)."""
+    conn.executemany(
+        'INSERT INTO workout_exercises (workout_id, position, exercise_id, name, muscle_group, equipment, '
+        'sets, reps, rest, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        exercise_rows(workout_id, plan.get('exercises'))
+    )
+    conn.execute(
+        'UPDATE workouts SET notes = ?, sets_and_reps = ?, rest_times = ?, plan_normalized = 1 WHERE id = ?',
+        (plan.get('notes'), json.dumps(plan.get('sets_and_reps') or []),
+         json.dumps(plan.get('rest_times') or []), workout_id)
+    )
+
+def exercise_from_row(row) -> Dict[str, Any]:
+    """Rebuild a plan exercise dict from a workout_exercises row."""
+    exercise = {}
+    if row['exercise_id'] is not None:
+        exercise['id'] = row['exercise_id']
+    for column in ('name', 'muscle_group', 'equipment', 'sets', 'reps', 'rest'):
+        if row[column] is not None:
+            exercise[column] = row[column]
+    if row['extra']:
+        exercise.update(json.loads(row['extra']))
+    return exercise
+
+def build_plan(workout, rows: Iterable) -> Dict[str, Any]:
+    """Rebuild the plan dict that used to live in workout_data."""
+    return {
+        'title': workout['title'],
+        'description': workout['description'],
+        'exercises': [exercise_from_row(row) for row in rows],
+        'sets_and_reps': json.loads(workout['sets_and_reps'] or '[]'),
+        'rest_times': json.loads(workout['rest_times'] or '[]'),
+        'notes': workout['notes'],
+    }
+
+def backfill(conn, batch_size: int = 1000):
+    """Normalize every workout saved before workout_exercises existed."""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            'SELECT id, workout_data FROM workouts WHERE id > ? AND plan_normalized = 0 ORDER BY id LIMIT ?',
+            (last_id, batch_size)
+        ).fetchall()
+        if not rows:
+            return
+        for workout_id, workout_data in rows:
+            last_id = workout_id
+            try:
+                plan = json.loads(workout_data)
+            except (TypeError, ValueError):
+                # Leave unreadable rows on the raw JSON path
+                continue
+            if isinstance(plan, dict):
+                insert_plan(conn, workout_id, plan)
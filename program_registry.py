@@ -0,0 +1,101 @@
+import os
+import re
+import threading
+from typing import Callable, Dict, Tuple
+
+import dspy
+
+# Bump whenever the signatures, bootstrap examples or compile settings change
+# so stale artifacts under data/ are ignored instead of loaded.
+PROGRAM_VERSION = 2
+
+DEFAULT_ARTIFACT_DIR = 'data/programs'
+
+class ProgramRegistry:
+    """Process-wide cache of compiled DSPy programs keyed by provider and model.
+
+    Programs are compiled at most once per process. Each compiled program is
+    also written to a versioned JSON artifact so later processes can load it
+    instead of re-running the teleprompter.
+    """
+
+    def __init__(self, name: str, build_program: Callable[[], dspy.Module],
+                 compile_program: Callable[[dspy.LM], dspy.Module],
+                 artifact_dir: str = DEFAULT_ARTIFACT_DIR, version: int = PROGRAM_VERSION):
+        """Create a registry.
+
+        ``build_program`` returns a fresh, uncompiled program (used when loading
+        an artifact) and ``compile_program`` compiles one against a given LM.
+        """
+        self.name = name
+        self.build_program = build_program
+        self.compile_program = compile_program
+        self.artifact_dir = artifact_dir
+        self.version = version
+        self._programs: Dict[Tuple[str, str], dspy.Module] = {}
+        # One lock per key, so a slow compile for one provider doesn't block the others
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def artifact_path(self, provider: str, model: str) -> str:
+        """Path of the saved artifact for a provider/model pair."""
+        model_slug = re.sub(r'[^A-Za-z0-9._-]+', '_', model)
+        filename = f'{self.name}-{provider}-{model_slug}-v{self.version}.json'
+        return os.path.join(self.artifact_dir, filename)
+
+    def _key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        """The lock serializing loads and compiles for one provider/model pair."""
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def get(self, provider: str, lm: dspy.LM, rebuild: bool = False) -> dspy.Module:
+        """Return the compiled program for ``provider``/``lm``, compiling it on first use."""
+        key = (provider.lower(), lm.model)
+        if not rebuild:
+            program = self._programs.get(key)
+            if program is not None:
+                return program
+
+        with self._key_lock(key):
+            program = None if rebuild else self._programs.get(key)
+            if program is None:
+                if not rebuild:
+                    program = self.load(provider, lm.model)
+                if program is None:
+                    program = self.compile_program(lm)
+                    try:
+                        self.save(provider, lm.model, program)
+                    except Exception as e:
+                        # A failed save only costs a recompile in the next process
+                        print(f"Could not save program artifact: {e}")
+                self._programs[key] = program
+        return program
+
+    def load(self, provider: str, model: str):
+        """Load a previously saved program, or return None if no artifact exists."""
+        path = self.artifact_path(provider.lower(), model)
+        if not os.path.exists(path):
+            return None
+
+        program = self.build_program()
+        try:
+            program.load(path)
+        except Exception as e:
+            print(f"Ignoring unreadable program artifact {path}: {e}")
+            return None
+        return program
+
+    def save(self, provider: str, model: str, program: dspy.Module) -> str:
+        """Save a compiled program to its versioned artifact path."""
+        path = self.artifact_path(provider.lower(), model)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        program.save(path)
+        return path
+
+    def warm(self, lms: Dict[str, dspy.LM]):
+        """Compile or load programs for every ``provider -> lm`` pair up front."""
+        for provider, lm in lms.items():
+            self.get(provider, lm)
@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import db
+
+# Sets with more reps than this say little about a one-rep max and get no e1RM
+MAX_E1RM_REPS = 12
+FORMULAS = ('epley', 'brzycki')
+
+# Unix epoch as a Julian day, for turning SQLite's julianday() into days since 1970
+_UNIX_EPOCH_JULIAN_DAY = 2440587.5
+# 1970-01-01 was a Thursday; shifting by three days makes weeks start on Monday, as ISO weeks do
+_MONDAY_OFFSET = 3
+
+def estimated_1rm(weight: np.ndarray, reps: np.ndarray, formula: str = 'epley') -> np.ndarray:
+    """Estimated one-rep max per set; NaN where there is no weight or too many reps to be meaningful."""
+    weight = np.asarray(weight, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.float64)
+    valid = (weight > 0) & (reps >= 1) & (reps <= MAX_E1RM_REPS)
+    safe_reps = np.where(valid, reps, 1)
+    if formula == 'brzycki':
+        e1rm = weight * 36.0 / (37.0 - safe_reps)
+    elif formula == 'epley':
+        e1rm = np.where(safe_reps == 1, weight, weight * (1 + safe_reps / 30.0))
+    else:
+        raise ValueError(f"Unknown 1RM formula: {formula}")
+    return np.where(valid, e1rm, np.nan)
+
+def _day_string(days: float) -> Optional[str]:
+    """``YYYY-MM-DD`` for days since the Unix epoch."""
+    if days is None or not np.isfinite(days):
+        return None
+    return str(np.datetime64(int(np.floor(days)), 'D'))
+
+def _segment_starts(*keys: np.ndarray) -> np.ndarray:
+    """Start index of every run of equal ``keys`` in sorted arrays."""
+    if not len(keys[0]):
+        return np.zeros(0, dtype=np.int64)
+    change = np.zeros(len(keys[0]), dtype=bool)
+    change[0] = True
+    for key in keys:
+        change[1:] |= key[1:] != key[:-1]
+    return np.flatnonzero(change)
+
+class LogArrays:
+    """The whole workout_logs history as columnar arrays.
+
+    The app has no user accounts, so every logged set is treated as one
+    athlete's history. Exercise names are stored once in ``names`` and
+    referenced by integer code.
+    """
+
+    def __init__(self, ids, workout_ids, exercise_codes, reps, weight, days, names):
+        self.ids = ids
+        self.workout_ids = workout_ids
+        self.exercise_codes = exercise_codes
+        self.reps = reps
+        self.weight = weight
+        self.days = days
+        self.names: List[str] = names
+
+    @property
+    def last_id(self) -> int:
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def empty(cls) -> 'LogArrays':
+        return cls(np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.int32),
+                   np.zeros(0, np.float64), np.zeros(0, np.float64), np.zeros(0, np.float64), [])
+
+    def extend(self, rows: List[Tuple]) -> 'LogArrays':
+        """A new LogArrays with ``(id, workout_id, exercise_name, reps, weight, julianday)`` rows appended."""
+        if not rows:
+            return self
+        names = list(self.names)
+        code_of = {name: code for code, name in enumerate(names)}
+        ids, workout_ids, exercise_names, reps, weight, julian = zip(*rows)
+        codes = [code_of.setdefault(name, len(code_of)) for name in exercise_names]
+        names.extend(list(code_of)[len(names):])
+        return LogArrays(
+            np.concatenate([self.ids, np.array(ids, dtype=np.int64)]),
+            np.concatenate([self.workout_ids, np.array(workout_ids, dtype=np.int64)]),
+            np.concatenate([self.exercise_codes, np.array(codes, dtype=np.int32)]),
+            np.concatenate([self.reps, np.array(reps, dtype=np.float64)]),
+            np.concatenate([self.weight, np.array(weight, dtype=np.float64)]),
+            np.concatenate([self.days, np.array(julian, dtype=np.float64) - _UNIX_EPOCH_JULIAN_DAY]),
+            names,
+        )
+
+# Logs are append-only, so a cached history only ever needs the rows after its last id
+_log_arrays: Dict[str, Tuple[Tuple, LogArrays]] = {}
+_log_arrays_lock = threading.Lock()
+
+def _fetch_after(conn, last_id: int) -> List[Tuple]:
+    return conn.execute(
+        'SELECT id, workout_id, exercise_name, COALESCE(reps, 0), COALESCE(weight, 0), julianday(timestamp) '
+        'FROM workout_logs WHERE id > ? ORDER BY id', (last_id,)).fetchall()
+
+def get_log_arrays(db_path='data/workouts.db') -> LogArrays:
+    """The cached log history for ``db_path``, topped up with any rows logged since the last call."""
+    version = db.file_version(db_path)
+    cached = _log_arrays.get(db_path)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    with _log_arrays_lock:
+        cached = _log_arrays.get(db_path)
+        if cached and cached[0] == version:
+            return cached[1]
+        conn = db.get_connection(db_path)
+        arrays = cached[1] if cached else LogArrays.empty()
+        # A rowid lookup, unlike COUNT(*), doesn't scan the table on every change
+        max_id, = conn.execute('SELECT COALESCE(MAX(id), 0) FROM workout_logs').fetchone()
+        if max_id < arrays.last_id:
+            # Rows went away (a restored or rebuilt database); start over
+            arrays = LogArrays.empty()
+        arrays = arrays.extend([tuple(row) for row in _fetch_after(conn, arrays.last_id)])
+        _log_arrays[db_path] = (version, arrays)
+        return arrays
+
+class ProgressReport:
+    """Per-exercise progression computed over a LogArrays in one vectorized pass.
+
+    Sets are sorted by exercise, day and workout, then reduced to sessions
+    (one exercise in one workout) with ``reduceat``: best e1RM, volume load
+    and top weight. A session is a PR when its best e1RM beats every earlier
+    session of the same exercise. The trend is a least-squares line through
+    the session e1RMs, from per-exercise sums.
+    """
+
+    def __init__(self, logs: LogArrays, formula: str = 'epley'):
+        self.formula = formula
+        self.names = logs.names
+        self.total_sets = len(logs)
+
+        order = np.lexsort((logs.ids, logs.workout_ids, logs.days, logs.exercise_codes))
+        exercise = logs.exercise_codes[order]
+        workout = logs.workout_ids[order]
+        days = logs.days[order]
+        reps = logs.reps[order]
+        weight = logs.weight[order]
+        e1rm = estimated_1rm(weight, reps, formula)
+        volume = reps * weight
+
+        # Sessions: one exercise within one workout
+        starts = _segment_starts(exercise, workout)
+        self.session_exercise = exercise[starts]
+        self.session_days = days[starts]
+        self.session_sets = np.diff(np.append(starts, len(exercise)))
+        if len(starts):
+            self.session_e1rm = np.fmax.reduceat(e1rm, starts)
+            self.session_volume = np.add.reduceat(volume, starts)
+            self.session_top_weight = np.maximum.reduceat(weight, starts)
+        else:
+            self.session_e1rm = self.session_volume = self.session_top_weight = np.zeros(0)
+
+        # Exercises: runs of sessions
+        ex_starts = _segment_starts(self.session_exercise)
+        self.exercise_codes = self.session_exercise[ex_starts]
+        self.exercise_starts = ex_starts
+        self.exercise_sessions = np.diff(np.append(ex_starts, len(self.session_exercise)))
+        self.exercise_sets = np.bincount(exercise, minlength=len(self.names))[self.exercise_codes]
+        self.exercise_of_session = np.repeat(np.arange(len(ex_starts)), self.exercise_sessions)
+
+        self._find_prs()
+        self._fit_trends()
+
+    def _find_prs(self):
+        """Mark sessions whose best e1RM beats every earlier session of the same exercise."""
+        best = np.nan_to_num(self.session_e1rm, nan=0.0)
+        if not len(best):
+            self.session_is_pr = np.zeros(0, dtype=bool)
+            return
+        # Offset each exercise above the previous one so one running max never crosses exercises
+        offset = self.exercise_of_session * (best.max() + 1.0)
+        running = np.maximum.accumulate(best + offset) - offset
+        previous = np.empty_like(running)
+        previous[0] = 0.0
+        previous[1:] = running[:-1]
+        first = np.zeros(len(best), dtype=bool)
+        first[self.exercise_starts] = True
+        # An exercise's first session is the baseline, not a PR
+        self.session_is_pr = (best > previous) & ~first & (best > 0)
+
+    def _fit_trends(self):
+        """e1RM slope per exercise in weight units per week, from per-exercise least-squares sums."""
+        n_exercises = len(self.exercise_codes)
+        self.trend_per_week = np.full(n_exercises, np.nan)
+        if not n_exercises:
+            return
+        valid = np.isfinite(self.session_e1rm)
+        group = self.exercise_of_session[valid]
+        # Days from each exercise's first session keep the sums well conditioned
+        x = self.session_days[valid] - self.session_days[self.exercise_starts][group]
+        y = self.session_e1rm[valid]
+        n = np.bincount(group, minlength=n_exercises).astype(np.float64)
+        sx = np.bincount(group, x, n_exercises)
+        sy = np.bincount(group, y, n_exercises)
+        sxx = np.bincount(group, x * x, n_exercises)
+        sxy = np.bincount(group, x * y, n_exercises)
+        denominator = n * sxx - sx * sx
+        fit = (n >= 2) & (denominator > 1e-9)
+        slope_per_day = np.divide(n * sxy - sx * sy, denominator, out=np.full(n_exercises, np.nan), where=fit)
+        self.trend_per_week = slope_per_day * 7
+
+    def exercise_summaries(self) -> List[Dict]:
+        """One dict per exercise, most recently trained first."""
+        if not len(self.exercise_starts):
+            return []
+        ends = np.append(self.exercise_starts[1:], len(self.session_exercise)) - 1
+        volume = np.add.reduceat(self.session_volume, self.exercise_starts)
+        pr_count = np.bincount(self.exercise_of_session[self.session_is_pr], minlength=len(ends))
+        e1rm = np.nan_to_num(self.session_e1rm, nan=-1.0)
+        best_e1rm = np.fmax.reduceat(self.session_e1rm, self.exercise_starts)
+
+        summaries = []
+        for i in np.argsort(-self.session_days[ends], kind='stable'):
+            start, end = self.exercise_starts[i], ends[i]
+            best = best_e1rm[i]
+            best_session = start + int(np.argmax(e1rm[start:end + 1])) if np.isfinite(best) else None
+            prs = np.flatnonzero(self.session_is_pr[start:end + 1])
+            summaries.append({
+                'exercise': self.names[self.exercise_codes[i]],
+                'sets': int(self.exercise_sets[i]),
+                'sessions': int(self.exercise_sessions[i]),
+                'first_date': _day_string(self.session_days[start]),
+                'last_date': _day_string(self.session_days[end]),
+                'best_e1rm': round(float(best), 1) if np.isfinite(best) else None,
+                'best_e1rm_date': _day_string(self.session_days[best_session]) if best_session is not None else None,
+                'latest_e1rm': (round(float(self.session_e1rm[end]), 1)
+                                if np.isfinite(self.session_e1rm[end]) else None),
+                'volume_load': round(float(volume[i]), 1),
+                'pr_count': int(pr_count[i]),
+                'last_pr_date': _day_string(self.session_days[start + prs[-1]]) if len(prs) else None,
+                'trend_per_week': (round(float(self.trend_per_week[i]), 2)
+                                   if np.isfinite(self.trend_per_week[i]) else None),
+            })
+        return summaries
+
+    def exercise_history(self, name: str) -> Optional[List[Dict]]:
+        """Session-by-session history of one exercise, oldest first, or None if it was never logged."""
+        try:
+            code = self.names.index(name)
+        except ValueError:
+            return None
+        position = np.searchsorted(self.exercise_codes, code)
+        if position >= len(self.exercise_codes) or self.exercise_codes[position] != code:
+            return None
+        start = self.exercise_starts[position]
+        end = start + self.exercise_sessions[position]
+        return [{
+            'date': _day_string(self.session_days[i]),
+            'sets': int(self.session_sets[i]),
+            'top_weight': round(float(self.session_top_weight[i]), 1),
+            'best_e1rm': round(float(self.session_e1rm[i]), 1) if np.isfinite(self.session_e1rm[i]) else None,
+            'volume_load': round(float(self.session_volume[i]), 1),
+            'pr': bool(self.session_is_pr[i]),
+        } for i in range(start, end)]
+
+    def weekly_volume(self, weeks: int = 12) -> List[Dict]:
+        """Total volume load for each of the last ``weeks`` Monday-to-Sunday weeks, ending with the latest trained."""
+        if not len(self.session_days):
+            return []
+        week = np.floor((self.session_days + _MONDAY_OFFSET) / 7).astype(np.int64)
+        first = week.max() - weeks + 1
+        recent = week >= first
+        totals = np.bincount(week[recent] - first, self.session_volume[recent], minlength=weeks)
+        sets = np.bincount(week[recent] - first, self.session_sets[recent], minlength=weeks)
+        return [{'week_of': _day_string((first + i) * 7 - _MONDAY_OFFSET), 'volume_load': round(float(totals[i]), 1),
+                 'sets': int(sets[i])} for i in range(weeks)]
+
+# The latest report per database and formula, reused until new sets are logged
+_reports: Dict[Tuple[str, str], Tuple[LogArrays, ProgressReport]] = {}
+
+def progress_report(db_path='data/workouts.db', formula: str = 'epley') -> ProgressReport:
+    """Progression over every set logged in ``db_path``."""
+    if formula not in FORMULAS:
+        raise ValueError(f"Unknown 1RM formula: {formula}")
+    logs = get_log_arrays(db_path)
+    cached = _reports.get((db_path, formula))
+    if cached and cached[0] is logs:
+        return cached[1]
+    report = ProgressReport(logs, formula)
+    _reports[(db_path, formula)] = (logs, report)
+    return report
+
+def warm_progress_report(db_path='data/workouts.db', formula: str = 'epley') -> threading.Thread:
+    """Load the log history and build a report on a background thread, so no request pays for the cold load."""
+    def run():
+        if not os.path.exists(db_path):
+            return
+        try:
+            progress_report(db_path, formula)
+        except sqlite3.Error as e:
+            print(f"Progress report warm-up skipped: {e}")
+    thread = threading.Thread(target=run, name='progress-warmup', daemon=True)
+    thread.start()
+    return thread
+
+def main():
+    parser = argparse.ArgumentParser(description='Report strength progression from logged sets')
+    parser.add_argument('--db', default='data/workouts.db', help='Workout database')
+    parser.add_argument('--exercise', help='Show the session history of one exercise')
+    parser.add_argument('--formula', choices=FORMULAS, default='epley', help='Estimated 1RM formula')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    logs = get_log_arrays(args.db)
+    loaded = time.perf_counter()
+    report = ProgressReport(logs, args.formula)
+    summaries = report.exercise_summaries()
+    done = time.perf_counter()
+
+    if args.exercise:
+        print(json.dumps(report.exercise_history(args.exercise), indent=2))
+    else:
+        for summary in summaries[:20]:
+            print(json.dumps(summary))
+    print(f"{len(logs)} sets, {len(summaries)} exercises: loaded in {(loaded - start) * 1000:.0f} ms, "
+          f"analyzed in {(done - loaded) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
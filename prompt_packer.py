@@ -0,0 +1,220 @@
+import argparse
+import json
+from typing import Dict, List, Sequence
+
+import db
+from equipment_index import EquipmentIndex, canonical_equipment, provided_equipment
+from exercise_index import get_exercise_index
+from term_extractor import extract_terms
+
+# Default prompt budget for the exercise and equipment context combined
+DEFAULT_TOKEN_BUDGET = 1200
+# Equipment never takes more than this share of the budget
+EQUIPMENT_SHARE = 0.3
+
+EXERCISE_HEADER = 'id|name|muscle_group|equipment'
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English and JSON)."""
+    return (len(text) + 3) // 4
+
+def _cell(value) -> str:
+    """One table cell; the column separator can't appear inside it."""
+    return '' if value is None else str(value).replace('|', '/').replace('\n', ' ')
+
+class PackedContext:
+    """Compact prompt context plus what it cost and saved."""
+
+    def __init__(self, exercises: str, equipment: str, kept_exercises: List[Dict],
+                 raw_tokens: Dict[str, int], packed_tokens: Dict[str, int],
+                 dropped_exercises: int, dropped_equipment: int):
+        self.exercises = exercises
+        self.equipment = equipment
+        self.kept_exercises = kept_exercises
+        self.raw_tokens = raw_tokens
+        self.packed_tokens = packed_tokens
+        self.dropped_exercises = dropped_exercises
+        self.dropped_equipment = dropped_equipment
+
+    @property
+    def tokens_saved(self) -> int:
+        return sum(self.raw_tokens.values()) - sum(self.packed_tokens.values())
+
+    def stats(self) -> Dict:
+        """Token and row counts for logging and /metrics."""
+        return {
+            'raw_tokens': dict(self.raw_tokens),
+            'packed_tokens': dict(self.packed_tokens),
+            'tokens_saved': self.tokens_saved,
+            'exercises_kept': len(self.kept_exercises),
+            'exercises_dropped': self.dropped_exercises,
+            'equipment_dropped': self.dropped_equipment,
+        }
+
+class PromptPacker:
+    """Fit exercise candidates and gym equipment into a token budget.
+
+    Candidates the gym can actually support come first, muscle groups are
+    interleaved so trimming never drops a whole group, and both lists are
+    written as compact tables instead of JSON with repeated keys.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET, equipment_share: float = EQUIPMENT_SHARE):
+        self.token_budget = token_budget
+        self.equipment_share = equipment_share
+
+    @staticmethod
+    def usable(exercises: Sequence[Dict], gym_equipment: Sequence[Dict]) -> List[bool]:
+        """Whether the gym has what each exercise needs (all true when the gym is unknown).
+
+        Uses the same canonical vocabulary and requirement bitsets as the gym
+        filter in ``equipment_index``, so ranking and filtering agree.
+        """
+        if not gym_equipment:
+            return [True] * len(exercises)
+        index = EquipmentIndex([{'id': row, 'equipment': ex.get('equipment')} for row, ex in enumerate(exercises)])
+        doable = index.doable(index.availability(item.get('name') for item in gym_equipment))
+        return [bool(flag) for flag in doable]
+
+    def rank_exercises(self, exercises: Sequence[Dict], gym_equipment: Sequence[Dict]) -> List[Dict]:
+        """Usable exercises first, round-robin across muscle groups, retrieval order within a group."""
+        usable = self.usable(exercises, gym_equipment or [])
+        ranked = []
+        for tier in (True, False):
+            by_group: Dict[str, List[Dict]] = {}
+            for exercise, ok in zip(exercises, usable):
+                if ok == tier:
+                    by_group.setdefault(exercise.get('muscle_group') or '', []).append(exercise)
+            queues = list(by_group.values())
+            depth = max((len(queue) for queue in queues), default=0)
+            for i in range(depth):
+                ranked.extend(queue[i] for queue in queues if i < len(queue))
+        return ranked
+
+    def rank_equipment(self, gym_equipment: Sequence[Dict], exercises: Sequence[Dict]) -> List[Dict]:
+        """Equipment used by the candidate exercises first, then the rest in gym order."""
+        needed = {canonical_equipment(ex.get('equipment')) for ex in exercises} - {None}
+        def relevant(item):
+            return any(piece in needed for piece in provided_equipment(item.get('name')))
+        items = list(gym_equipment or [])
+        return [item for item in items if relevant(item)] + [item for item in items if not relevant(item)]
+
+    @staticmethod
+    def equipment_entry(item: Dict) -> str:
+        """``Dumbbells x10`` (quantity only when more than one, description in parentheses)."""
+        entry = _cell(item.get('name'))
+        if (item.get('quantity') or 1) > 1:
+            entry += f" x{item['quantity']}"
+        if item.get('description'):
+            entry += f" ({_cell(item['description'])})"
+        return entry
+
+    @classmethod
+    def format_equipment(cls, items: Sequence[Dict]) -> str:
+        """One line per category: ``Free Weights: Dumbbells x10, Bench x2``."""
+        by_category: Dict[str, List[str]] = {}
+        for item in items:
+            by_category.setdefault(_cell(item.get('category')) or 'Other', []).append(cls.equipment_entry(item))
+        return '\n'.join(f"{category}: {', '.join(entries)}" for category, entries in by_category.items())
+
+    @staticmethod
+    def format_exercise(exercise: Dict) -> str:
+        return '|'.join(_cell(exercise.get(column)) for column in ('id', 'name', 'muscle_group', 'equipment'))
+
+    @classmethod
+    def format_exercises(cls, exercises: Sequence[Dict]) -> str:
+        """Header line plus one ``id|name|muscle_group|equipment`` row per exercise."""
+        if not exercises:
+            return ''
+        return '\n'.join([EXERCISE_HEADER] + [cls.format_exercise(ex) for ex in exercises])
+
+    def pack(self, exercises: Sequence[Dict], gym_equipment: Sequence[Dict] = ()) -> PackedContext:
+        """Rank, trim and serialize the context for one generation request."""
+        exercises = list(exercises or [])
+        gym_equipment = list(gym_equipment or [])
+        raw_tokens = {
+            'exercises': estimate_tokens(json.dumps(exercises)),
+            'equipment': estimate_tokens(json.dumps(gym_equipment)),
+        }
+
+        # Equipment first, capped at its share; exercises get whatever is left
+        equipment_budget = int(self.token_budget * self.equipment_share)
+        kept_equipment = []
+        categories = set()
+        chars = 0
+        for item in self.rank_equipment(gym_equipment, exercises):
+            category = _cell(item.get('category')) or 'Other'
+            cost = len(self.equipment_entry(item)) + 2
+            if category not in categories:
+                cost += len(category) + 3
+            if (chars + cost + 3) // 4 > equipment_budget and kept_equipment:
+                break
+            kept_equipment.append(item)
+            categories.add(category)
+            chars += cost
+        equipment_text = self.format_equipment(kept_equipment)
+        dropped_equipment = len(gym_equipment) - len(kept_equipment)
+        if dropped_equipment:
+            equipment_text += f'\n(+{dropped_equipment} more items not listed)'
+
+        remaining = self.token_budget - estimate_tokens(equipment_text)
+        used = estimate_tokens(EXERCISE_HEADER) + 1
+        kept_exercises = []
+        for exercise in self.rank_exercises(exercises, gym_equipment):
+            cost = estimate_tokens(self.format_exercise(exercise)) + 1
+            if used + cost > remaining and kept_exercises:
+                break
+            kept_exercises.append(exercise)
+            used += cost
+        exercises_text = self.format_exercises(kept_exercises)
+
+        return PackedContext(
+            exercises=exercises_text,
+            equipment=equipment_text,
+            kept_exercises=kept_exercises,
+            raw_tokens=raw_tokens,
+            packed_tokens={
+                'exercises': estimate_tokens(exercises_text),
+                'equipment': estimate_tokens(equipment_text),
+            },
+            dropped_exercises=len(exercises) - len(kept_exercises),
+            dropped_equipment=dropped_equipment,
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Show how a workout request's context is packed into the prompt")
+    parser.add_argument('description', help='Workout description')
+    parser.add_argument('--gym-id', type=int, help='Gym whose equipment to include')
+    parser.add_argument('--data-dir', default='data', help='Directory holding exercises.db and gyms.db')
+    parser.add_argument('--budget', type=int, default=DEFAULT_TOKEN_BUDGET, help='Token budget for the context')
+    parser.add_argument('--all-exercises', action='store_true',
+                        help='Offer the whole catalog instead of the keyword matches')
+    parser.add_argument('--show', action='store_true', help='Print the packed context')
+    args = parser.parse_args()
+
+    exercises_db = f'{args.data_dir}/exercises.db'
+    index = get_exercise_index(exercises_db)
+    if args.all_exercises:
+        exercises = [dict(ex) for ex in index.exercises]
+    else:
+        groups, equipment = extract_terms(args.description, exercises_db)
+        exercises = index.find(groups, equipment) if groups or equipment else index.diverse_set()
+
+    gym_equipment = []
+    if args.gym_id is not None:
+        conn = db.open_connection(f'{args.data_dir}/gyms.db')
+        rows = conn.execute('SELECT * FROM equipment WHERE gym_id = ? ORDER BY category, name', (args.gym_id,))
+        gym_equipment = [dict(row) for row in rows]
+        conn.close()
+
+    packed = PromptPacker(args.budget).pack(exercises, gym_equipment)
+    if args.show:
+        print(packed.equipment, '\n', packed.exercises, sep='\n')
+    stats = packed.stats()
+    raw, kept = sum(stats['raw_tokens'].values()), sum(stats['packed_tokens'].values())
+    print(f"{len(exercises)} exercises, {len(gym_equipment)} equipment items: "
+          f"~{raw} tokens as JSON -> ~{kept} packed (saved ~{stats['tokens_saved']}, "
+          f"dropped {stats['exercises_dropped']} exercises and {stats['equipment_dropped']} equipment items)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+import metrics
+
+DEFAULT_MAX_ENTRIES = 512
+
+def _copy(value):
+    """Shallow copy of a cached row or list of rows, so callers can't edit the cache."""
+    if isinstance(value, list):
+        return [dict(row) if isinstance(row, dict) else row for row in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+class ReadCache:
+    """In-process LRU of query results, invalidated through generation counters in SQLite.
+
+    Each entry is stamped with the ``cache_generations`` row it was loaded
+    under. A read checks that row first (one primary-key lookup) and reloads
+    when any writer, in this process or another, has bumped it since.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    def _count(self, name: str, result: str):
+        with self._lock:
+            counts = self._counts.setdefault(name, {'hit': 0, 'miss': 0, 'stale': 0, 'uncached': 0})
+            counts[result] += 1
+        if metrics.ENABLED:
+            metrics.READ_CACHE_LOOKUPS.inc(1, name, result)
+
+    @staticmethod
+    def generation(conn: sqlite3.Connection, name: str):
+        row = conn.execute('SELECT generation FROM cache_generations WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, conn: sqlite3.Connection, db_path: str, name: str, key: Hashable,
+            loader: Callable[[], object]):
+        """``loader()``'s result for ``key``, cached until generation ``name`` of ``db_path`` changes."""
+        # Inside a transaction the counter may include our own uncommitted writes
+        if self.max_entries <= 0 or conn.in_transaction:
+            self._count(name, 'uncached')
+            return loader()
+        generation = self.generation(conn, name)
+        if generation is None:
+            self._count(name, 'uncached')
+            return loader()
+
+        cache_key = (db_path, name, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            fresh = entry is not None and entry[0] == generation
+            if fresh:
+                self._entries.move_to_end(cache_key)
+        if fresh:
+            self._count(name, 'hit')
+            return _copy(entry[1])
+
+        self._count(name, 'miss' if entry is None else 'stale')
+        # Loaded after reading the generation, so the value is never older than its stamp
+        value = loader()
+        with self._lock:
+            self._entries[cache_key] = (generation, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return _copy(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            by_name = {}
+            hits = lookups = 0
+            for name, counts in sorted(self._counts.items()):
+                total = sum(counts.values())
+                by_name[name] = dict(counts, hit_rate=round(counts['hit'] / total, 3) if total else None)
+                hits += counts['hit']
+                lookups += total
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'evictions': self.evictions,
+                'lookups': lookups,
+                'hit_rate': round(hits / lookups, 3) if lookups else None,
+                'by_generation': by_name,
+            }
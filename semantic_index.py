@@ -0,0 +1,477 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:  # The same index files are searched with numpy instead
+    faiss = None
+
+from exercise_index import get_exercise_index
+
+DEFAULT_INDEX_DIR = 'data/exercise_vectors'
+
+# Bump EMBEDDING_VERSION whenever the embedding changes so stale vectors are re-embedded
+EMBEDDING_VERSION = 1
+EMBEDDING_DIM = 128
+
+# Small catalogs are scanned exhaustively; larger ones are split into inverted lists
+IVF_MIN_VECTORS = 4096
+VECTORS_PER_LIST = 256
+NPROBE = 8
+KMEANS_ITERATIONS = 10
+
+# Results below this cosine similarity are treated as "no idea"
+MIN_SIMILARITY = 0.25
+
+# Hand-written vocabulary: words that share a movement pattern or body region map to the
+# same concept, so "pulling movements" lands on rows and curls and "posterior chain"
+# on deadlifts and bridges even though neither phrase appears in the catalog.
+CONCEPTS = {
+    'deadlift': ('hinge', 'posterior_chain'),
+    'rdl': ('hinge', 'posterior_chain'),
+    'hinge': ('hinge', 'posterior_chain'),
+    'hyperextension': ('hinge', 'posterior_chain', 'lower_back'),
+    'bridge': ('hinge', 'posterior_chain', 'glutes'),
+    'thrust': ('hinge', 'posterior_chain', 'glutes'),
+    'swing': ('hinge', 'posterior_chain'),
+    'posterior_chain': ('posterior_chain', 'hinge'),
+    'glute': ('glutes', 'posterior_chain'),
+    'hamstring': ('hamstrings', 'posterior_chain'),
+    'curl': ('pull', 'biceps'),
+    'bicep': ('biceps', 'pull'),
+    'row': ('pull', 'upper_back'),
+    'pulldown': ('pull', 'lats'),
+    'pull': ('pull',),
+    'chin': ('pull', 'lats'),
+    'shrug': ('pull', 'traps'),
+    'lat': ('lats', 'pull'),
+    'press': ('push',),
+    'push': ('push',),
+    'dip': ('push', 'triceps'),
+    'fly': ('push', 'chest'),
+    'flie': ('push', 'chest'),
+    'crossover': ('push', 'chest'),
+    'tricep': ('triceps', 'push'),
+    'extension': ('isolation',),
+    'raise': ('isolation', 'delts'),
+    'delt': ('delts',),
+    'squat': ('squat', 'quads'),
+    'lunge': ('squat', 'single_leg', 'quads'),
+    'split': ('single_leg',),
+    'step': ('single_leg',),
+    'quad': ('quads', 'squat'),
+    'calve': ('calves',),
+    'crunch': ('core', 'abs'),
+    'plank': ('core', 'anti_extension'),
+    'twist': ('core', 'rotation'),
+    'woodchopper': ('core', 'rotation'),
+    'rollout': ('core', 'anti_extension'),
+    'climber': ('core', 'conditioning'),
+    'ab': ('core', 'abs'),
+    'abs': ('core', 'abs'),
+    'core': ('core',),
+    'cardio': ('conditioning',),
+    'conditioning': ('conditioning',),
+    'hiit': ('conditioning',),
+    # Catalog muscle groups and the body regions they belong to
+    'leg': ('lower_body', 'quads', 'hamstrings', 'glutes'),
+    'back': ('upper_body', 'pull', 'upper_back', 'lats'),
+    'chest': ('upper_body', 'push'),
+    'shoulder': ('upper_body', 'delts'),
+    'arm': ('upper_body', 'biceps', 'triceps'),
+}
+
+# Multi-word phrases collapsed to a single token before lookup
+PHRASES = {
+    'posterior chain': 'posterior_chain',
+    'upper body': 'upper_body',
+    'lower body': 'lower_body',
+    'lower back': 'lower_back',
+    'upper back': 'upper_back',
+    'single leg': 'single_leg',
+}
+
+_WORD = re.compile(r"[a-z0-9_]+")
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping so "pulling", "pulls" and "pull" share a token."""
+    if word.endswith('ss'):
+        return word
+    for suffix in ('ing', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            stem = word[:-len(suffix)]
+            if suffix == 'es' and not stem.endswith(('ss', 'sh', 'ch', 'x')):
+                # "raises" -> "raise", but "presses" -> "press"
+                stem = word[:-1]
+            return stem
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, stemmed word tokens with known phrases joined."""
+    text = text.lower().replace('-', ' ')
+    for phrase, token in PHRASES.items():
+        text = text.replace(phrase, token)
+    return [_stem(word) for word in _WORD.findall(text)]
+
+def _bucket(feature: str, dim: int) -> Tuple[int, float]:
+    """Stable hash of a feature to a dimension and a sign."""
+    h = zlib.crc32(feature.encode('utf-8'))
+    return h % dim, 1.0 if (h >> 31) & 1 else -1.0
+
+class HashingEmbedder:
+    """Deterministic bag-of-features embedding that needs no model download or network.
+
+    Features are words, word bigrams, concept tokens from ``CONCEPTS`` and
+    character trigrams (which soak up typos like "dumbell"), hashed into a
+    fixed number of signed dimensions and L2-normalized.
+    """
+
+    WORD_WEIGHT = 1.0
+    BIGRAM_WEIGHT = 0.5
+    CONCEPT_WEIGHT = 1.5
+    TRIGRAM_WEIGHT = 0.2
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def features(self, text: str) -> Dict[str, float]:
+        """Weighted features of ``text``."""
+        tokens = tokenize(text)
+        features: Dict[str, float] = {}
+
+        def add(feature, weight):
+            features[feature] = features.get(feature, 0.0) + weight
+
+        for token in tokens:
+            add('w:' + token, self.WORD_WEIGHT)
+            for concept in CONCEPTS.get(token, ()):
+                add('c:' + concept, self.CONCEPT_WEIGHT)
+            padded = f'#{token}#'
+            for i in range(len(padded) - 2):
+                add('t:' + padded[i:i + 3], self.TRIGRAM_WEIGHT)
+        for first, second in zip(tokens, tokens[1:]):
+            add(f'b:{first} {second}', self.BIGRAM_WEIGHT)
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        """Unit-length float32 vector for ``text``."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self.features(text).items():
+            index, sign = _bucket(feature, self.dim)
+            vector[index] += sign * weight
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_exercise(self, exercise: Dict) -> np.ndarray:
+        """Vector for a catalog row."""
+        return self.embed(exercise_text(exercise))
+
+def exercise_text(exercise: Dict) -> str:
+    """The text an exercise is embedded from."""
+    return ' '.join(filter(None, (exercise.get('name'), exercise.get('muscle_group'), exercise.get('equipment'))))
+
+def _content_hash(exercise: Dict) -> int:
+    """Changes whenever an exercise would embed differently."""
+    return zlib.crc32(exercise_text(exercise).encode('utf-8'))
+
+def _fingerprint(ids: np.ndarray, hashes: np.ndarray, dim: int) -> str:
+    """Identifies one catalog + embedding combination."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{EMBEDDING_VERSION}:{dim}:'.encode())
+    digest.update(np.ascontiguousarray(ids, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(hashes, dtype=np.uint32).tobytes())
+    return digest.hexdigest()
+
+def _kmeans(vectors: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids for the inverted lists."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * 64)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        counts = np.bincount(assignment, minlength=nlist)
+        empty = counts == 0
+        # Reseed empty lists from random points so every list stays in use
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+    return centroids
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    """Nearest centroid of every vector."""
+    if not len(centroids):
+        return np.zeros(len(vectors), dtype=np.int64)
+    return np.concatenate([np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+                           for start in range(0, len(vectors), chunk)] or [np.zeros(0, dtype=np.int64)])
+
+class SemanticIndex:
+    """Read-only, memory-mapped vector index over the exercise catalog.
+
+    Vectors are stored grouped by inverted list, so the OS page cache holds a
+    single copy shared by every worker process. A FAISS index over the same
+    vectors is used when faiss is installed; otherwise search runs in numpy.
+    """
+
+    def __init__(self, path: str):
+        """Open a built index generation directory."""
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+        self.fingerprint = self.manifest['fingerprint']
+        self.ids = np.load(os.path.join(path, 'ids.npy'), mmap_mode='r')
+        self.hashes = np.load(os.path.join(path, 'hashes.npy'), mmap_mode='r')
+        self.vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        self.centroids = np.load(os.path.join(path, 'centroids.npy'))
+        self.offsets = np.load(os.path.join(path, 'offsets.npy'))
+        self.embedder = HashingEmbedder(self.manifest['dim'])
+        self.nprobe = min(NPROBE, len(self.centroids)) if len(self.centroids) else 0
+
+        self.faiss_index = None
+        faiss_path = os.path.join(path, 'index.faiss')
+        if faiss is not None and os.path.exists(faiss_path):
+            try:
+                self.faiss_index = faiss.read_index(faiss_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                # Not every faiss build can mmap every index type
+                self.faiss_index = faiss.read_index(faiss_path)
+            if self.nprobe:
+                self.faiss_index.nprobe = self.nprobe
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search_vector(self, query: np.ndarray, k: int = 20) -> List[Tuple[int, float]]:
+        """``(exercise_id, similarity)`` of the ``k`` nearest exercises, best first."""
+        if not len(self.ids) or k <= 0:
+            return []
+        query = np.ascontiguousarray(query, dtype=np.float32)
+
+        if self.faiss_index is not None:
+            scores, ids = self.faiss_index.search(query[None, :], k)
+            return [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i != -1]
+
+        if self.nprobe:
+            lists = np.argpartition(-(self.centroids @ query), self.nprobe - 1)[:self.nprobe]
+            rows = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+            scores = self.vectors[rows] @ query
+        else:
+            rows = None
+            scores = self.vectors @ query
+
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        positions = rows[top] if rows is not None else top
+        return [(int(self.ids[p]), float(scores[t])) for p, t in zip(positions, top)]
+
+    def search(self, text: str, k: int = 20) -> List[Tuple[int, float]]:
+        """Nearest exercises to a free-text request."""
+        return self.search_vector(self.embedder.embed(text), k)
+
+def _current_path(index_dir: str) -> Optional[str]:
+    """Directory of the live index generation, if one has been built."""
+    try:
+        with open(os.path.join(index_dir, 'CURRENT')) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(index_dir, name)
+    return path if os.path.exists(os.path.join(path, 'manifest.json')) else None
+
+def _write_generation(index_dir: str, ids, hashes, vectors, centroids, fingerprint, stats) -> str:
+    """Write a new index generation, point CURRENT at it and drop older ones."""
+    assignment = _assign(vectors, centroids)
+    order = np.argsort(assignment, kind='stable')
+    ids, hashes, vectors = ids[order], hashes[order], np.ascontiguousarray(vectors[order])
+    offsets = np.zeros(max(len(centroids), 1) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(assignment, minlength=max(len(centroids), 1)))
+
+    name = f'gen-{time.time_ns()}'
+    path = os.path.join(index_dir, name)
+    os.makedirs(path)
+    np.save(os.path.join(path, 'ids.npy'), ids)
+    np.save(os.path.join(path, 'hashes.npy'), hashes)
+    np.save(os.path.join(path, 'vectors.npy'), vectors)
+    np.save(os.path.join(path, 'centroids.npy'), centroids)
+    np.save(os.path.join(path, 'offsets.npy'), offsets)
+
+    if faiss is not None and len(ids):
+        dim = vectors.shape[1]
+        if len(centroids):
+            quantizer = faiss.IndexFlatIP(dim)
+            quantizer.add(centroids)
+            index = faiss.IndexIVFFlat(quantizer, dim, len(centroids), faiss.METRIC_INNER_PRODUCT)
+            index.is_trained = True
+        else:
+            index = faiss.IndexIDMap(faiss.IndexFlatIP(dim))
+        index.add_with_ids(vectors, ids)
+        faiss.write_index(index, os.path.join(path, 'index.faiss'))
+
+    with open(os.path.join(path, 'manifest.json'), 'w') as f:
+        json.dump({'fingerprint': fingerprint, 'embedding_version': EMBEDDING_VERSION,
+                   'dim': int(vectors.shape[1]), 'count': int(len(ids)), 'nlist': int(len(centroids)),
+                   **stats}, f)
+
+    # Swap atomically; processes with the old generation mapped keep reading it
+    pointer = os.path.join(index_dir, 'CURRENT.tmp')
+    with open(pointer, 'w') as f:
+        f.write(name)
+    os.replace(pointer, os.path.join(index_dir, 'CURRENT'))
+
+    for entry in os.listdir(index_dir):
+        if entry.startswith('gen-') and entry != name:
+            shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+    return path
+
+@contextmanager
+def _build_lock(index_dir: str):
+    """Hold the index directory's rebuild lock, shared by every process on the machine."""
+    with open(os.path.join(index_dir, '.lock'), 'w') as lock:
+        try:
+            import fcntl
+        except ImportError:
+            # Windows: lock the file's first byte instead
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after about ten seconds; a rebuild can take longer
+                    continue
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+def build_index(exercises: Sequence[Dict], index_dir: str = DEFAULT_INDEX_DIR,
+                dim: int = EMBEDDING_DIM, force: bool = False) -> SemanticIndex:
+    """Bring the on-disk index up to date with ``exercises`` and open it.
+
+    Only exercises that are new or whose text changed are embedded again;
+    existing inverted-list centroids are kept unless the catalog size has
+    moved far enough to unbalance them.
+    """
+    ids = np.fromiter((ex['id'] for ex in exercises), dtype=np.int64, count=len(exercises))
+    hashes = np.fromiter((_content_hash(ex) for ex in exercises), dtype=np.uint32, count=len(exercises))
+    fingerprint = _fingerprint(ids, hashes, dim)
+
+    os.makedirs(index_dir, exist_ok=True)
+    # One process rebuilds; the others wait and then open its result
+    with _build_lock(index_dir):
+        current_path = _current_path(index_dir)
+        previous = SemanticIndex(current_path) if current_path else None
+        if previous is not None and previous.fingerprint == fingerprint and not force:
+            return previous
+
+        reusable = {}
+        if previous is not None and not force and previous.manifest['dim'] == dim \
+                and previous.manifest['embedding_version'] == EMBEDDING_VERSION:
+            reusable = {int(i): row for row, i in enumerate(previous.ids)}
+
+        embedder = HashingEmbedder(dim)
+        vectors = np.empty((len(exercises), dim), dtype=np.float32)
+        embedded = 0
+        for row, ex in enumerate(exercises):
+            old_row = reusable.get(ex['id'])
+            if old_row is not None and previous.hashes[old_row] == hashes[row]:
+                vectors[row] = previous.vectors[old_row]
+            else:
+                vectors[row] = embedder.embed_exercise(ex)
+                embedded += 1
+
+        nlist = len(exercises) // VECTORS_PER_LIST if len(exercises) >= IVF_MIN_VECTORS else 0
+        centroids = np.zeros((0, dim), dtype=np.float32)
+        if nlist:
+            old = previous.centroids if reusable else centroids
+            if len(old) and 0.5 <= nlist / len(old) <= 2:
+                centroids = np.array(old)
+            else:
+                centroids = _kmeans(vectors, nlist)
+
+        path = _write_generation(index_dir, ids, hashes, vectors, centroids, fingerprint,
+                                 {'embedded': embedded, 'reused': len(exercises) - embedded})
+        return SemanticIndex(path)
+
+_semantic_indexes: Dict[str, Tuple[object, SemanticIndex]] = {}
+_semantic_lock = threading.Lock()
+
+def get_semantic_index(db_path: str = 'data/exercises.db', index_dir: str = DEFAULT_INDEX_DIR) -> SemanticIndex:
+    """Return the semantic index for the current catalog, rebuilding it if the catalog changed."""
+    catalog = get_exercise_index(db_path)
+    cached = _semantic_indexes.get(index_dir)
+    if cached and cached[0] is catalog:
+        return cached[1]
+
+    with _semantic_lock:
+        cached = _semantic_indexes.get(index_dir)
+        if cached and cached[0] is catalog:
+            return cached[1]
+        index = build_index(catalog.exercises, index_dir)
+        _semantic_indexes[index_dir] = (catalog, index)
+        return index
+
+def find_similar_exercises(description: str, k: int = 20, db_path: str = 'data/exercises.db',
+                           index_dir: str = DEFAULT_INDEX_DIR) -> List[Dict]:
+    """Exercises closest in meaning to ``description``, best first (empty if nothing is close)."""
+    index = get_semantic_index(db_path, index_dir)
+    catalog = get_exercise_index(db_path)
+    results = []
+    for exercise_id, score in index.search(description, k):
+        if score < MIN_SIMILARITY:
+            break
+        exercise = catalog.get(exercise_id)
+        if exercise is not None:
+            results.append(exercise)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the semantic exercise index")
+    parser.add_argument('--db', default='data/exercises.db', help='Exercise database to index')
+    parser.add_argument('--index-dir', default=DEFAULT_INDEX_DIR, help='Where the index files live')
+    parser.add_argument('--rebuild', action='store_true', help='Re-embed every exercise')
+    parser.add_argument('--query', help='Print the nearest exercises to this text')
+    parser.add_argument('-k', type=int, default=10, help='Number of results for --query')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build_index(get_exercise_index(args.db).exercises, args.index_dir, force=args.rebuild)
+    manifest = index.manifest
+    print(f"Index {os.path.basename(index.path)}: {manifest['count']} exercises, {manifest['nlist']} lists, "
+          f"{manifest.get('embedded', 0)} embedded, {manifest.get('reused', 0)} reused "
+          f"({time.perf_counter() - start:.2f}s, {'faiss' if index.faiss_index is not None else 'numpy'} search)")
+
+    if args.query:
+        start = time.perf_counter()
+        hits = index.search(args.query, args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        catalog = get_exercise_index(args.db)
+        for exercise_id, score in hits:
+            ex = catalog.get(exercise_id)
+            print(f"{score:6.3f}  {ex['name']} ({ex['muscle_group']}, {ex['equipment']})")
+        print(f"Search took {elapsed:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import hashlib
+import secrets
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+import db
+import metrics
+
+# Session ids are 32 random bytes, URL-safe base64 (43 characters)
+SESSION_ID_BYTES = 32
+DEFAULT_LIFETIME = 30 * 24 * 3600
+# Expired rows are deleted at most this often, by whichever request saves a session next
+SWEEP_INTERVAL = 300
+# An unchanged session's expiry is only pushed back once less than this share of it remains
+REFRESH_FRACTION = 0.5
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session data held on the server; the cookie only names it."""
+
+    def __init__(self, initial=None, sid: Optional[str] = None, new: bool = False,
+                 expires_at: float = 0.0, cookie_bytes: int = 0):
+        def on_update(session):
+            session.modified = True
+            session.accessed = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+        self.expires_at = expires_at
+        # Size the same data would take as Flask's signed cookie
+        self.cookie_bytes = cookie_bytes
+
+class SessionStore:
+    """Where server-side sessions live; subclass for another backend."""
+
+    def load(self, sid: str) -> Optional[Tuple[bytes, float, int]]:
+        """``(data, expires_at, cookie_bytes)`` for a live session, or None."""
+        raise NotImplementedError
+
+    def save(self, sid: str, data: bytes, expires_at: float, cookie_bytes: int):
+        raise NotImplementedError
+
+    def touch(self, sid: str, expires_at: float):
+        """Push back a session's expiry without rewriting its data."""
+        raise NotImplementedError
+
+    def delete(self, sid: str):
+        raise NotImplementedError
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Delete expired sessions; returns how many went."""
+        raise NotImplementedError
+
+class MemorySessionStore(SessionStore):
+    """Sessions in a dict; for a single process, e.g. tests or a dev server."""
+
+    def __init__(self):
+        self._sessions: Dict[str, Tuple[bytes, float, int]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        entry = self._sessions.get(sid)
+        return entry if entry and entry[1] > time.time() else None
+
+    def save(self, sid, data, expires_at, cookie_bytes):
+        with self._lock:
+            self._sessions[sid] = (data, expires_at, cookie_bytes)
+
+    def touch(self, sid, expires_at):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry:
+                self._sessions[sid] = (entry[0], expires_at, entry[2])
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def sweep(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [sid for sid, entry in self._sessions.items() if entry[1] <= now]
+            for sid in expired:
+                del self._sessions[sid]
+        return len(expired)
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in their own SQLite database, read through each thread's pooled connection.
+
+    Rows are keyed by a SHA-256 of the session id, so a leaked database
+    can't be replayed as cookies.
+    """
+
+    def __init__(self, db_path='data/sessions.db'):
+        self.db_path = db_path
+        db.ensure_schema(db_path, self._create_tables)
+
+    def _create_tables(self):
+        conn = db.open_connection(self.db_path)
+        try:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                cookie_bytes INTEGER NOT NULL DEFAULT 0
+            )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(sid: str) -> str:
+        return hashlib.sha256(sid.encode('ascii')).hexdigest()
+
+    def _write(self, sql: str, params: Tuple) -> int:
+        conn = db.get_connection(self.db_path)
+        try:
+            cursor = conn.execute(sql, params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return cursor.rowcount
+
+    def load(self, sid):
+        row = db.get_connection(self.db_path).execute(
+            'SELECT data, expires_at, cookie_bytes FROM sessions WHERE id = ? AND expires_at > ?',
+            (self._key(sid), time.time())
+        ).fetchone()
+        return (row['data'], row['expires_at'], row['cookie_bytes']) if row else None
+
+    def save(self, sid, data, expires_at, cookie_bytes):
+        self._write(
+            'INSERT INTO sessions (id, data, expires_at, cookie_bytes) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at, '
+            'cookie_bytes = excluded.cookie_bytes',
+            (self._key(sid), data, expires_at, cookie_bytes)
+        )
+
+    def touch(self, sid, expires_at):
+        self._write('UPDATE sessions SET expires_at = ? WHERE id = ?', (expires_at, self._key(sid)))
+
+    def delete(self, sid):
+        self._write('DELETE FROM sessions WHERE id = ?', (self._key(sid),))
+
+    def sweep(self, now=None):
+        return self._write('DELETE FROM sessions WHERE expires_at <= ?', (time.time() if now is None else now,))
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface that keeps session data in a SessionStore.
+
+    The cookie carries only an opaque random id. Each request also records
+    how many cookie bytes that saved compared with Flask's default signed
+    cookie holding the same data.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store: SessionStore, lifetime: int = DEFAULT_LIFETIME,
+                 sweep_interval: int = SWEEP_INTERVAL):
+        self.store = store
+        self.lifetime = lifetime
+        self.sweep_interval = sweep_interval
+        self._cookie_interface = SecureCookieSessionInterface()
+        self._last_sweep = 0.0
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.bytes_saved = 0
+        self.swept = 0
+
+    def _record_request(self, session: ServerSideSession, sent_cookie_bytes: int):
+        """Count what the browser's cookie header would have carried with a signed-cookie session."""
+        saved = max(0, session.cookie_bytes - sent_cookie_bytes)
+        with self._stats_lock:
+            self.requests += 1
+            self.bytes_saved += saved
+        if metrics.ENABLED:
+            metrics.SESSION_COOKIE_BYTES.inc(sent_cookie_bytes, 'server_side')
+            metrics.SESSION_COOKIE_BYTES.inc(session.cookie_bytes, 'signed_cookie')
+
+    def open_session(self, app, request):
+        name = self.get_cookie_name(app)
+        sid = request.cookies.get(name)
+        if sid and len(sid) < 128:
+            entry = self.store.load(sid)
+            if entry is not None:
+                data, expires_at, cookie_bytes = entry
+                session = ServerSideSession(self.serializer.loads(data), sid=sid,
+                                            expires_at=expires_at, cookie_bytes=cookie_bytes)
+                self._record_request(session, len(name) + 1 + len(sid))
+                return session
+        return ServerSideSession(sid=secrets.token_urlsafe(SESSION_ID_BYTES), new=True)
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        removed = self.store.sweep(now)
+        with self._stats_lock:
+            self.swept += removed
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            # Emptied: forget it on both sides
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        expires_at = now + self.lifetime
+        if session.modified or session.new:
+            data = self.serializer.dumps(dict(session))
+            signed = self._cookie_interface.get_signing_serializer(app)
+            cookie_bytes = len(name) + 1 + len(signed.dumps(dict(session))) if signed else 0
+            self.store.save(session.sid, data.encode('utf-8'), expires_at, cookie_bytes)
+        elif session.expires_at - now < self.lifetime * REFRESH_FRACTION:
+            self.store.touch(session.sid, expires_at)
+        else:
+            # Unchanged and far from expiring: no write, and the browser's cookie is still good
+            self._maybe_sweep()
+            return
+
+        response.set_cookie(
+            name, session.sid,
+            expires=expires_at,
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        self._maybe_sweep()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                'backend': type(self.store).__name__,
+                'lifetime_seconds': self.lifetime,
+                'requests_with_session': self.requests,
+                'cookie_bytes_saved': self.bytes_saved,
+                'cookie_bytes_saved_per_request': (round(self.bytes_saved / self.requests, 1)
+                                                   if self.requests else None),
+                'expired_sessions_swept': self.swept,
+            }
+
+def make_session_interface(backend: str, db_path='data/sessions.db',
+                               lifetime: int = DEFAULT_LIFETIME) -> Optional[SessionInterface]:
+    """Session interface for ``backend`` (sqlite, memory or cookie); None keeps Flask's signed cookie."""
+    if backend == 'sqlite':
+        return ServerSideSessionInterface(SQLiteSessionStore(db_path), lifetime)
+    if backend == 'memory':
+        return ServerSideSessionInterface(MemorySessionStore(), lifetime)
+    if backend == 'cookie':
+        return None
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -0,0 +1,78 @@
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Sequence
+
+class SummaryCache:
+    """In-memory LRU of rendered summaries for finished workouts.
+
+    An entry is keyed by workout id and stamped with the workout's
+    ``log_version``, which every logged set bumps. A finished workout's page
+    is therefore rendered once per version, and its strong ETag only changes
+    when a late set arrives or the templates change.
+    """
+
+    def __init__(self, template_paths: Sequence[str] = (), max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.template_version = self._template_version(template_paths)
+        self._entries: 'OrderedDict[int, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def _template_version(paths: Sequence[str]) -> str:
+        """Checksum of the templates a summary is rendered from, so a deploy changes every ETag."""
+        checksum = 0
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    checksum = zlib.crc32(f.read(), checksum)
+            except OSError:
+                continue
+        return f'{checksum:08x}'
+
+    def etag(self, workout_id: int, log_version: int) -> str:
+        return f'summary-{workout_id}-{log_version}-{self.template_version}'
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def get(self, workout_id: int, log_version: int) -> Optional[bytes]:
+        """The rendered page for this version of the workout, or None."""
+        with self._lock:
+            entry = self._entries.get(workout_id)
+            if entry is None or entry[0] != log_version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(workout_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, workout_id: int, log_version: int, body: bytes):
+        with self._lock:
+            self._entries[workout_id] = (log_version, body)
+            self._entries.move_to_end(workout_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, workout_ids: Iterable[int]):
+        """Drop cached pages for workouts that just had sets logged."""
+        with self._lock:
+            for workout_id in workout_ids:
+                self._entries.pop(workout_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'template_version': self.template_version,
+            }
@@ -0,0 +1,160 @@
+import re
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from equipment_index import CANONICAL_EQUIPMENT, NO_EQUIPMENT, canonical_equipment
+from exercise_index import ExerciseIndex, get_exercise_index
+
+# Everyday words for the catalog's muscle groups. Keys are catalog values; a key
+# that isn't in the loaded catalog is ignored.
+MUSCLE_GROUP_SYNONYMS = {
+    'Chest': ('chest', 'pec', 'pecs', 'pectorals'),
+    'Back': ('back', 'lat', 'lats', 'upper back', 'lower back', 'rhomboids'),
+    'Legs': ('leg', 'quad', 'quads', 'quadriceps', 'hamstring', 'glute', 'glutes', 'calf', 'calves',
+             'lower body', 'thigh'),
+    'Shoulders': ('shoulder', 'delt', 'delts', 'deltoids', 'traps'),
+    'Arms': ('arm', 'bicep', 'biceps', 'tricep', 'triceps', 'forearm'),
+    'Core': ('core', 'ab', 'abs', 'abdominals', 'obliques', 'midsection'),
+}
+
+# "upper body" names several groups at once
+MULTI_GROUP_TERMS = {
+    'upper body': ('Chest', 'Back', 'Shoulders', 'Arms'),
+}
+
+def _key(text: str) -> str:
+    """Lookup key that ignores case, spaces and hyphens ("Pull-Up Bar" == "pullup bar")."""
+    return re.sub(r'[^a-z0-9]', '', text.lower())
+
+def _inflections(term: str) -> List[str]:
+    """The term plus the singular or plural of its last word."""
+    head, _, last = term.lower().rpartition(' ')
+    prefix = head + ' ' if head else ''
+    forms = {last}
+    if last.endswith('ies') and len(last) > 4:
+        forms.add(last[:-3] + 'y')
+    elif last.endswith(('ches', 'shes', 'sses', 'xes')):
+        forms.add(last[:-2])
+    elif last.endswith('s') and not last.endswith('ss') and len(last) > 3:
+        forms.add(last[:-1])
+    elif last.endswith('y') and len(last) > 2 and last[-2] not in 'aeiou':
+        forms.add(last[:-1] + 'ies')
+    elif last.endswith(('ch', 'sh', 'ss', 'x')):
+        forms.add(last + 'es')
+    else:
+        forms.add(last + 's')
+    return [prefix + form for form in forms]
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+class TermExtractor:
+    """Map free text to catalog muscle groups and equipment in one pass.
+
+    Every surface term (catalog values, synonyms and their plurals) is
+    stored in one dict keyed by its words with spacing and hyphens removed.
+    The text is split into words once and scanned left to right, trying the
+    longest run of words first, so "glutes" finds Legs, "cables" finds
+    Cable Machine, "smith machine" beats "machine" and "score" never
+    matches "core".
+    """
+
+    def __init__(self, muscle_groups: Iterable[str], equipment: Iterable[str]):
+        """Build the matcher for the given catalog values."""
+        self.muscle_groups = tuple(muscle_groups)
+        self.equipment = tuple(equipment)
+
+        # surface key -> (canonical muscle groups, canonical equipment)
+        self.terms: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+        # First words of multi-word terms; only these need the longer lookups
+        self.phrase_starts: Dict[str, int] = {}
+
+        def add(surface, groups=(), equipment=()):
+            for form in _inflections(surface):
+                key = _key(form)
+                if not key:
+                    continue
+                old_groups, old_equipment = self.terms.get(key, ((), ()))
+                self.terms[key] = (
+                    old_groups + tuple(g for g in groups if g not in old_groups),
+                    old_equipment + tuple(e for e in equipment if e not in old_equipment),
+                )
+                words = _WORD.findall(form)
+                if len(words) > 1:
+                    self.phrase_starts[words[0]] = max(self.phrase_starts.get(words[0], 1), len(words))
+
+        catalog_groups = {g.lower(): g for g in self.muscle_groups}
+        for group in self.muscle_groups:
+            add(group, groups=(group,))
+        for group, synonyms in MUSCLE_GROUP_SYNONYMS.items():
+            if group.lower() in catalog_groups:
+                for synonym in synonyms:
+                    add(synonym, groups=(catalog_groups[group.lower()],))
+        for term, groups in MULTI_GROUP_TERMS.items():
+            present = tuple(catalog_groups[g.lower()] for g in groups if g.lower() in catalog_groups)
+            if present:
+                add(term, groups=present)
+
+        # Equipment words come from equipment_index, so a description names the same
+        # equipment that gym filtering and prompt ranking understand
+        for item in self.equipment:
+            add(item, equipment=(item,))
+            canonical = canonical_equipment(item)
+            aliases = NO_EQUIPMENT if canonical is None else CANONICAL_EQUIPMENT.get(canonical, ())
+            for alias in aliases:
+                # "none" is too common a word to mean bodyweight
+                if alias != 'none':
+                    add(alias, equipment=(item,))
+
+    @classmethod
+    def from_index(cls, index: ExerciseIndex) -> 'TermExtractor':
+        """Matcher for the groups and equipment present in a catalog index."""
+        return cls(index.muscle_groups, index.equipment)
+
+    def extract(self, text: str) -> Tuple[List[str], List[str]]:
+        """Canonical ``(muscle_groups, equipment)`` mentioned in ``text``, in order of mention."""
+        groups: Dict[str, None] = {}
+        equipment: Dict[str, None] = {}
+        words = _WORD.findall(text.lower()) if text else []
+        terms = self.terms
+        phrase_starts = self.phrase_starts
+        i = 0
+        while i < len(words):
+            word = words[i]
+            match, width = None, 1
+            # Longest match first so "smith machine" wins over "machine"
+            for n in range(min(phrase_starts.get(word, 1), len(words) - i), 1, -1):
+                match = terms.get(''.join(words[i:i + n]))
+                if match is not None:
+                    width = n
+                    break
+            if match is None:
+                match = terms.get(word)
+            if match is not None:
+                for group in match[0]:
+                    groups[group] = None
+                for item in match[1]:
+                    equipment[item] = None
+            i += width
+        return list(groups), list(equipment)
+
+_extractors: Dict[str, Tuple[ExerciseIndex, TermExtractor]] = {}
+_extractors_lock = threading.Lock()
+
+def get_term_extractor(db_path='data/exercises.db') -> TermExtractor:
+    """Return the shared extractor for ``db_path``, rebuilding it when the catalog reloads."""
+    index = get_exercise_index(db_path)
+    cached = _extractors.get(db_path)
+    if cached and cached[0] is index:
+        return cached[1]
+
+    with _extractors_lock:
+        cached = _extractors.get(db_path)
+        if cached and cached[0] is index:
+            return cached[1]
+        extractor = TermExtractor.from_index(index)
+        _extractors[db_path] = (index, extractor)
+        return extractor
+
+def extract_terms(description: str, db_path='data/exercises.db') -> Tuple[List[str], List[str]]:
+    """Catalog ``(muscle_groups, equipment)`` named in a workout description."""
+    return get_term_extractor(db_path).extract(description)
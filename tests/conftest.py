@@ -0,0 +1,29 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The Flask app module, imported inside a scratch directory so data/ is never touched.
+
+    app.py opens its databases relative to the working directory at import
+    time, so the whole session runs from the scratch directory.
+    """
+    workdir = tmp_path_factory.mktemp('app')
+    os.makedirs(workdir / 'data')
+    exercises_db = os.path.join(REPO_ROOT, 'data', 'exercises.db')
+    if os.path.exists(exercises_db):
+        shutil.copy(exercises_db, workdir / 'data' / 'exercises.db')
+    os.chdir(workdir)
+    import app
+    app.app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+
+import dspy
+import pytest
+
+import workout_generator
+from workout_generator import RateLimiter, completed_request_ids, read_batch_requests, run_batch
+
+class FakeGenerator:
+    """Stands in for the compiled program; fails for descriptions containing "fail"."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, description, gym_equipment=None):
+        with self.lock:
+            self.calls.append(description)
+        if 'fail' in description:
+            raise RuntimeError('model error')
+        return dspy.Prediction(title=description.title(), description=description, exercises=[],
+                               sets_and_reps=[], notes='')
+
+def write_lines(path, rows):
+    path.write_text(''.join(json.dumps(row) + '\n' for row in rows))
+
+def read_results(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_requests_are_read_from_jsonl_and_csv(tmp_path):
+    jsonl = tmp_path / 'requests.jsonl'
+    write_lines(jsonl, [{'id': 'a', 'description': ' legs ', 'gym_id': 2}, {'description': 'arms'}])
+    assert read_batch_requests(str(jsonl)) == [
+        {'id': 'a', 'description': 'legs', 'gym_id': 2},
+        {'id': '2', 'description': 'arms', 'gym_id': None},
+    ]
+
+    csv_path = tmp_path / 'requests.csv'
+    csv_path.write_text('id,description,gym_id\nx,chest day,\ny,back day,3\n')
+    assert [(r['id'], r['gym_id']) for r in read_batch_requests(str(csv_path))] == [('x', None), ('y', 3)]
+
+@pytest.mark.parametrize('rows, message', [
+    ([{'id': 1, 'description': 'legs'}, {'id': 1, 'description': 'arms'}], 'duplicate request id 1'),
+    ([{'id': 1, 'description': '  '}], 'request 1 has no description'),
+])
+def test_bad_requests_are_rejected(tmp_path, rows, message):
+    path = tmp_path / 'requests.jsonl'
+    write_lines(path, rows)
+    with pytest.raises(ValueError, match=message):
+        read_batch_requests(str(path))
+
+def test_completed_ids_skip_failures_and_trim_a_partial_line(tmp_path):
+    path = tmp_path / 'out.jsonl'
+    path.write_text('{"id": "1", "status": "ok"}\n{"id": "2", "status": "error"}\n{"id": "3", "sta')
+    assert completed_request_ids(str(path)) == {'1'}
+    assert path.read_text().endswith('"error"}\n')
+    assert completed_request_ids(str(tmp_path / 'missing.jsonl')) == set()
+
+def test_batch_writes_one_line_per_request(tmp_path):
+    output = tmp_path / 'out.jsonl'
+    requests = [{'id': str(i), 'description': d, 'gym_id': None} for i, d in enumerate(['legs', 'fail', 'arms'])]
+    assert run_batch(FakeGenerator(), requests, str(output), workers=2,
+                     gyms_db_path=str(tmp_path / 'gyms.db')) == (2, 1)
+
+    results = {r['id']: r for r in read_results(output)}
+    assert results['0']['plan']['title'] == 'Legs'
+    assert results['1']['status'] == 'error' and results['1']['error'] == 'RuntimeError: model error'
+
+def test_resume_retries_only_what_is_missing(tmp_path):
+    output = tmp_path / 'out.jsonl'
+    output.write_text('{"id": "0", "status": "ok"}\n{"id": "1", "status": "error"}\n{"id": "2", "stat')
+    requests = [{'id': str(i), 'description': f'workout {i}', 'gym_id': None} for i in range(3)]
+    generator = FakeGenerator()
+    assert run_batch(generator, requests, str(output), workers=1, resume=True,
+                     gyms_db_path=str(tmp_path / 'gyms.db')) == (2, 0)
+    assert sorted(generator.calls) == ['workout 1', 'workout 2']
+    results = read_results(output)
+    assert [r['id'] for r in results[:2]] == ['0', '1']
+    assert sorted((r['id'], r['status']) for r in results[2:]) == [('1', 'ok'), ('2', 'ok')]
+
+def test_unknown_gym_fails_without_calling_the_model(tmp_path):
+    generator = FakeGenerator()
+    requests = [{'id': '1', 'description': 'legs', 'gym_id': 99}]
+    assert run_batch(generator, requests, str(tmp_path / 'out.jsonl'), gyms_db_path=str(tmp_path / 'gyms.db')) == (0, 1)
+    assert generator.calls == []
+
+def test_rate_limiter_spaces_calls_after_the_burst(monkeypatch):
+    clock = [0.0]
+    sleeps = []
+    monkeypatch.setattr(workout_generator.time, 'monotonic', lambda: clock[0])
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+    monkeypatch.setattr(workout_generator.time, 'sleep', sleep)
+
+    limiter = RateLimiter(per_minute=60, burst=2)
+    for _ in range(4):
+        limiter.acquire()
+    assert sleeps == [pytest.approx(1.0), pytest.approx(1.0)]
+
+def test_unlimited_rate_never_waits():
+    started = time.monotonic()
+    limiter = RateLimiter(per_minute=0)
+    for _ in range(1000):
+        limiter.acquire()
+    assert time.monotonic() - started < 1
@@ -0,0 +1,35 @@
+import time
+
+import dspy
+import pytest
+
+from benchmark import STUB_PLAN, RouteStats, StubLM, percentile
+
+@pytest.mark.parametrize('pct, expected', [(50, 5), (90, 9), (95, 10), (99, 10), (100, 10), (1, 1)])
+def test_percentile_is_nearest_rank(pct, expected):
+    assert percentile(list(range(10, 0, -1)), pct) == expected
+
+def test_percentile_of_nothing_is_zero():
+    assert percentile([], 95) == 0.0
+
+def test_throughput_uses_wall_clock_span():
+    stats = RouteStats()
+    stats.record(0.001, 0, 200)
+    time.sleep(0.1)
+    stats.record(0.001, 0, 200)
+    # Two requests over ~0.1 s, not two over their 2 ms of summed latency
+    assert 10 < stats.summary()['throughput_rps'] < 25
+
+def test_generator_plans_through_the_stub_lm(app_module):
+    lm = StubLM()
+    with dspy.settings.context(lm=lm):
+        plan = app_module.WorkoutGenerator()('Chest and triceps hypertrophy', [])
+    assert lm.calls == 1
+    assert plan.title == STUB_PLAN['title']
+    assert plan.exercises == STUB_PLAN['exercises']
+
+def test_compile_bootstraps_with_the_stub_lm(app_module):
+    lm = StubLM()
+    program = app_module.compile_workout_generator(lm)
+    assert lm.calls > 0
+    assert all(predictor.demos for predictor in program.predictors())
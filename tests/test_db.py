@@ -0,0 +1,54 @@
+import threading
+
+import db
+
+def test_connection_is_reused_within_a_thread(tmp_path):
+    path = str(tmp_path / 'pool.db')
+    assert db.get_connection(path) is db.get_connection(path)
+    db.close_connections()
+
+def test_each_thread_gets_its_own_connection(tmp_path):
+    path = str(tmp_path / 'pool.db')
+    mine = db.get_connection(path)
+    theirs = []
+    thread = threading.Thread(target=lambda: theirs.append(db.get_connection(path)))
+    thread.start()
+    thread.join()
+    assert theirs[0] is not mine
+    db.close_connections()
+
+def test_connections_use_wal(tmp_path):
+    conn = db.open_connection(str(tmp_path / 'wal.db'))
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == db.BUSY_TIMEOUT_MS
+    conn.close()
+
+def test_release_rolls_back_an_open_transaction(tmp_path):
+    path = str(tmp_path / 'release.db')
+    conn = db.get_connection(path)
+    conn.execute('CREATE TABLE t (n INTEGER)')
+    conn.commit()
+    conn.execute('INSERT INTO t VALUES (1)')
+    assert conn.in_transaction
+    db.release_connections()
+    assert not conn.in_transaction
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    db.close_connections()
+
+def test_schema_is_created_once(tmp_path):
+    path = str(tmp_path / 'schema.db')
+    calls = []
+    db.ensure_schema(path, lambda: calls.append(1))
+    db.ensure_schema(path, lambda: calls.append(1))
+    assert calls == [1]
+
+def test_file_version_changes_on_write(tmp_path):
+    path = str(tmp_path / 'version.db')
+    conn = db.open_connection(path)
+    conn.execute('CREATE TABLE t (n INTEGER)')
+    conn.commit()
+    before = db.file_version(path)
+    conn.execute('INSERT INTO t VALUES (1)')
+    conn.commit()
+    assert db.file_version(path) != before
+    conn.close()
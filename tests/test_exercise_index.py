@@ -0,0 +1,47 @@
+import sqlite3
+
+import pytest
+
+from exercise_index import ExerciseIndex, get_exercise_index
+
+EXERCISES = [
+    {'id': 3, 'name': 'Bench Press', 'muscle_group': 'Chest', 'equipment': 'Barbell'},
+    {'id': 1, 'name': 'Squat', 'muscle_group': 'Legs', 'equipment': 'Barbell'},
+    {'id': 2, 'name': 'Lunge', 'muscle_group': 'Legs', 'equipment': 'Dumbbells'},
+    {'id': 4, 'name': 'Push-Up', 'muscle_group': 'Chest', 'equipment': 'Bodyweight'},
+    {'id': 5, 'name': 'Leg Press', 'muscle_group': 'Legs', 'equipment': 'Machine'},
+]
+
+@pytest.fixture
+def index():
+    return ExerciseIndex(EXERCISES, limit_per_group=1)
+
+def test_find_matches_group_or_equipment_in_id_order(index):
+    assert [ex['id'] for ex in index.find(['Chest'], ['Dumbbells'])] == [2, 3, 4]
+    assert index.find(['Arms']) == []
+
+def test_diverse_set_takes_the_first_of_each_group(index):
+    assert [ex['name'] for ex in index.diverse_set()] == ['Squat', 'Bench Press']
+    assert len(index.diverse_set(limit_per_group=2)) == 4
+
+def test_results_are_copies(index):
+    index.find(['Legs'])[0]['name'] = 'Changed'
+    index.get(1)['name'] = 'Changed'
+    index.diverse_set()[0]['name'] = 'Changed'
+    assert index.get(1)['name'] == 'Squat'
+
+def test_shared_index_reloads_when_the_file_changes(tmp_path):
+    path = str(tmp_path / 'exercises.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE exercises (id INTEGER PRIMARY KEY, name TEXT, muscle_group TEXT, equipment TEXT)')
+    conn.executemany('INSERT INTO exercises VALUES (:id, :name, :muscle_group, :equipment)', EXERCISES)
+    conn.commit()
+
+    first = get_exercise_index(path)
+    assert get_exercise_index(path) is first
+    conn.execute("INSERT INTO exercises VALUES (6, 'Plank', 'Core', 'Bodyweight')")
+    conn.commit()
+    conn.close()
+    second = get_exercise_index(path)
+    assert second is not first
+    assert 'Core' in second.muscle_groups
@@ -0,0 +1,33 @@
+import random
+import sqlite3
+from datetime import datetime
+
+import generate_synthetic_data as synthetic
+
+def generate(data_dir, seed=7):
+    data_dir.mkdir(exist_ok=True)
+    rng = random.Random(seed)
+    exercises = synthetic.generate_exercises(str(data_dir / 'exercises.db'), 50, rng, 100)
+    gym_ids = synthetic.generate_gyms(str(data_dir / 'gyms.db'), 3, 5, rng, 100)
+    synthetic.generate_workouts(str(data_dir / 'workouts.db'), 200, 1000, exercises, gym_ids, rng, 100,
+                                datetime(2025, 6, 30))
+    return sqlite3.connect(str(data_dir / 'workouts.db'))
+
+def test_logs_use_their_workouts_plan(tmp_path):
+    conn = generate(tmp_path)
+    assert conn.execute('SELECT COUNT(*) FROM workout_logs').fetchone()[0] == 1000
+    off_plan = conn.execute(
+        'SELECT COUNT(*) FROM workout_logs l WHERE NOT EXISTS '
+        '(SELECT 1 FROM workout_exercises e WHERE e.workout_id = l.workout_id AND e.name = l.exercise_name)'
+    ).fetchone()[0]
+    assert off_plan == 0
+    # Titles name the first planned exercise's muscle group
+    mismatched = conn.execute(
+        "SELECT COUNT(*) FROM workouts w JOIN workout_exercises e ON e.workout_id = w.id AND e.position = 0 "
+        "WHERE w.title NOT LIKE e.muscle_group || ' %'"
+    ).fetchone()[0]
+    assert mismatched == 0
+
+def test_same_seed_same_data(tmp_path):
+    query = 'SELECT workout_id, position, exercise_id, sets, reps FROM workout_exercises ORDER BY id'
+    assert generate(tmp_path / 'a').execute(query).fetchall() == generate(tmp_path / 'b').execute(query).fetchall()
@@ -0,0 +1,30 @@
+import equipment_index
+
+def test_missing_gym_is_404(client):
+    response = client.get('/api/gym/999999/exercises')
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'Gym not found'}
+
+def test_exercises_follow_equipment_changes(app_module, client):
+    gym_db = app_module.GymDB()
+    gym_id = gym_db.add_gym('Availability Test Gym')
+    gym_db.add_equipment(gym_id, 'Dumbbells', 'Free Weights', 10)
+
+    first = client.get(f'/api/gym/{gym_id}/exercises').get_json()
+    assert first['gym_id'] == gym_id
+    assert first['count'] == len(first['exercises'])
+    assert all(ex['equipment'] != 'Barbell' for ex in first['exercises'])
+
+    # Renaming a gym leaves the cached masks alone
+    masks = equipment_index._gym_masks['data/gyms.db'][2]
+    gym_db.conn.execute('UPDATE gyms SET description = ? WHERE id = ?', ('Renamed', gym_id))
+    gym_db.conn.commit()
+    client.get(f'/api/gym/{gym_id}/exercises')
+    assert equipment_index._gym_masks['data/gyms.db'][2] is masks
+
+    # New equipment invalidates them
+    gym_db.add_equipment(gym_id, 'Barbell', 'Free Weights', 2)
+    second = client.get(f'/api/gym/{gym_id}/exercises').get_json()
+    gym_db.close()
+    assert second['count'] > first['count']
+    assert any(ex['equipment'] == 'Barbell' for ex in second['exercises'])
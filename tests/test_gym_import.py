@@ -0,0 +1,58 @@
+import json
+import sqlite3
+
+import pytest
+
+from gym_import import import_file
+
+GYMS = [
+    {'name': 'Iron Works', 'location': 'Springfield', 'equipment': [
+        {'name': 'Barbell', 'category': 'Free Weights', 'quantity': 4},
+        {'name': 'Squat Rack', 'category': 'Racks', 'quantity': 2},
+    ]},
+    {'name': 'Peak Fitness', 'location': 'Riverside', 'equipment': [
+        {'name': 'Dumbbells', 'category': 'Free Weights', 'quantity': 10},
+    ]},
+    # The same gym again, in a later batch, with one more piece of equipment
+    {'name': 'Iron Works', 'location': 'Springfield', 'equipment': [
+        {'name': 'Barbell', 'category': 'Free Weights', 'quantity': 4},
+        {'name': 'Rowing Machine', 'category': 'Cardio', 'quantity': 1},
+    ]},
+    {'name': '', 'equipment': []},
+]
+
+@pytest.fixture
+def gyms_file(tmp_path):
+    path = tmp_path / 'gyms.jsonl'
+    path.write_text('\n'.join(json.dumps(gym) for gym in GYMS) + '\n')
+    return str(path)
+
+def counts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return tuple(conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in ('gyms', 'equipment'))
+    finally:
+        conn.close()
+
+def test_dry_run_counts_match_a_real_run(tmp_path, gyms_file):
+    db_path = str(tmp_path / 'gyms.db')
+    dry = import_file(gyms_file, db_path=db_path, batch_size=1, dry_run=True).as_dict()
+    assert counts(db_path) == (0, 0)
+
+    real = import_file(gyms_file, db_path=db_path, batch_size=1).as_dict()
+    assert dry == real
+    # The repeated gym in the third batch merges into the first instead of counting as new twice
+    assert real['gyms_inserted'] == 2
+    assert real['gyms_matched'] == 1
+    assert real['equipment_inserted'] == 4
+    assert real['invalid'] == 1
+    assert counts(db_path) == (2, 4)
+
+def test_importing_again_adds_nothing(tmp_path, gyms_file):
+    db_path = str(tmp_path / 'gyms.db')
+    import_file(gyms_file, db_path=db_path)
+    again = import_file(gyms_file, db_path=db_path)
+    assert again.gyms_inserted == 0
+    assert again.equipment_inserted == 0
+    assert again.equipment_updated == 0
+    assert counts(db_path) == (2, 4)
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import job_queue
+from job_queue import JobQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'), max_workers=2)
+    yield queue
+    queue.shutdown()
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.005)
+    raise AssertionError(f'job {job_id} still {job["status"]}')
+
+def test_submit_returns_before_the_job_finishes(queue):
+    release = threading.Event()
+    job_id = queue.submit('test', lambda: release.wait(5) and {'ok': True}, {})
+    assert queue.get(job_id)['status'] in ('queued', 'running')
+    release.set()
+    job = wait_for(queue, job_id)
+    assert job['status'] == 'done'
+    assert job['result'] == {'ok': True}
+
+def test_params_are_passed_and_stored(queue):
+    job_id = queue.submit('test', lambda a, b: {'sum': a + b}, {'a': 2, 'b': 3})
+    job = wait_for(queue, job_id)
+    assert job['params'] == {'a': 2, 'b': 3}
+    assert job['result'] == {'sum': 5}
+
+def test_failures_are_recorded(queue):
+    def fail():
+        raise ValueError('no provider')
+    job = wait_for(queue, queue.submit('test', fail, {}))
+    assert job['status'] == 'failed'
+    assert job['error'] == 'no provider'
+
+def insert_job(path, job_id, status, owner=None, heartbeat_at=None, created_at=None):
+    conn = sqlite3.connect(path)
+    conn.execute('INSERT INTO jobs (id, kind, status, params, created_at, owner, heartbeat_at) '
+                 "VALUES (?, 'test', ?, '{}', ?, ?, ?)",
+                 (job_id, status, time.time() if created_at is None else created_at, owner, heartbeat_at))
+    conn.commit()
+    conn.close()
+
+def test_unfinished_jobs_of_a_dead_process_fail_on_restart(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    JobQueue(path).shutdown()
+    # No owner (an older row), an exited pid on this boot, and a previous boot
+    insert_job(path, 'j1', 'running')
+    insert_job(path, 'j2', 'running', owner=f'{job_queue._boot_id()}:999999999', heartbeat_at=time.time())
+    insert_job(path, 'j3', 'queued', owner='old-boot:1', heartbeat_at=time.time())
+    queue = JobQueue(path)
+    jobs = [queue.get(job_id) for job_id in ('j1', 'j2', 'j3')]
+    queue.shutdown()
+    assert {job['status'] for job in jobs} == {'failed'}
+    assert jobs[0]['error'] == 'Interrupted by a server restart'
+
+def test_jobs_of_a_live_sibling_process_are_left_running(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    JobQueue(path).shutdown()
+    sibling = f'{job_queue._boot_id()}:{os.getppid()}'
+    insert_job(path, 'j1', 'running', owner=sibling, heartbeat_at=time.time())
+    queue = JobQueue(path)
+    assert queue.get('j1')['status'] == 'running'
+    queue.shutdown()
+
+def test_silent_owner_fails_only_without_a_boot_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, '_boot_id', lambda: '')
+    path = str(tmp_path / 'jobs.db')
+    JobQueue(path).shutdown()
+    insert_job(path, 'fresh', 'running', owner=':1', heartbeat_at=time.time())
+    insert_job(path, 'stale', 'running', owner=':1', heartbeat_at=time.time() - job_queue.STALE_AFTER - 1)
+    queue = JobQueue(path)
+    statuses = {job_id: queue.get(job_id)['status'] for job_id in ('fresh', 'stale')}
+    queue.shutdown()
+    assert statuses == {'fresh': 'running', 'stale': 'failed'}
+
+def test_heartbeat_refreshes_own_unfinished_jobs(queue):
+    release = threading.Event()
+    job_id = queue.submit('test', lambda: release.wait(5) and {}, {})
+    queue.conn.execute('UPDATE jobs SET heartbeat_at = 0 WHERE id = ?', (job_id,))
+    queue.conn.commit()
+    queue._heartbeat()
+    assert queue.get(job_id)['heartbeat_at'] > 0
+    assert queue.get(job_id)['owner'] == queue.owner
+    release.set()
+    wait_for(queue, job_id)
+
+def test_old_finished_jobs_are_purged_at_startup(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    JobQueue(path).shutdown()
+    insert_job(path, 'old', 'done', created_at=time.time() - job_queue.RETENTION - 1)
+    insert_job(path, 'recent', 'done')
+    queue = JobQueue(path)
+    assert queue.get('old') is None
+    assert queue.get('recent') is not None
+    queue.shutdown()
+
+def test_new_workout_queues_a_job_and_polls_to_done(client):
+    response = client.post('/workout/new', data={
+        'model_provider': 'local',
+        'gym_id': 'none',
+        'workout_description': 'Leg day for strength',
+    }, headers={'Accept': 'application/json'})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    deadline = time.monotonic() + 5
+    while True:
+        job = client.get(f'/api/jobs/{job_id}').get_json()
+        if job['status'] in ('done', 'failed') or time.monotonic() > deadline:
+            break
+        time.sleep(0.005)
+    assert job['status'] == 'done'
+    assert job['result']['exercises']
+
+def test_unknown_job_is_404(client):
+    response = client.get('/api/jobs/does-not-exist')
+    assert response.status_code == 404
+    assert response.get_json()['success'] is False
@@ -0,0 +1,128 @@
+import time
+
+import pytest
+
+from llm_dispatch import LLMDispatcher, LLMUnavailableError
+
+def attempts(behaviour):
+    """An attempt function that runs ``behaviour[provider]()`` and returns its value."""
+    return lambda provider: behaviour[provider]()
+
+def fail():
+    raise ValueError('no key')
+
+def sleep_then(seconds, value):
+    def run():
+        time.sleep(seconds)
+        return value
+    return run
+
+def test_primary_answer_wins():
+    dispatcher = LLMDispatcher(timeout=5)
+    result = dispatcher.call(['openai', 'claude'], attempts({'openai': lambda: 'a', 'claude': lambda: 'b'}))
+    assert result == ('a', 'openai')
+    assert dispatcher.stats()['winners'] == [{'requested': 'openai', 'winner': 'openai', 'path': 'primary', 'count': 1}]
+
+def test_fails_over_on_error_and_records_latency():
+    dispatcher = LLMDispatcher(timeout=5)
+    result = dispatcher.call(['openai', 'claude'], attempts({'openai': fail, 'claude': lambda: 'b'}))
+    assert result == ('b', 'claude')
+    stats = dispatcher.stats()
+    assert stats['winners'][0]['path'] == 'failover'
+    # The failed attempt's latency is sampled too, not only the winner's
+    assert stats['providers']['openai']['outcomes'] == {'error': 1}
+    assert len(dispatcher._stats['openai'].latencies) == 1
+
+def test_fails_over_on_timeout():
+    dispatcher = LLMDispatcher(timeout=0.05)
+    result = dispatcher.call(['openai', 'claude'],
+                             attempts({'openai': sleep_then(0.5, 'a'), 'claude': lambda: 'b'}))
+    assert result == ('b', 'claude')
+    # The abandoned attempt records how long it had run, at least the timeout
+    assert dispatcher._stats['openai'].latencies[0] >= 0.05
+
+def test_hedges_a_slow_primary():
+    dispatcher = LLMDispatcher(timeout=5, hedge=True, default_hedge_delay=0.05)
+    result = dispatcher.call(['openai', 'claude'],
+                             attempts({'openai': sleep_then(0.5, 'a'), 'claude': lambda: 'b'}))
+    assert result == ('b', 'claude')
+    stats = dispatcher.stats()
+    assert stats['winners'][0]['path'] == 'hedge'
+    assert stats['providers']['openai']['outcomes'] == {'lost': 1}
+    assert dispatcher._stats['openai'].latencies[0] >= 0.05
+
+def test_no_hedge_without_the_flag():
+    dispatcher = LLMDispatcher(timeout=5, default_hedge_delay=0.01)
+    started = []
+    def attempt(provider):
+        started.append(provider)
+        time.sleep(0.05)
+        return provider
+    assert dispatcher.call(['openai', 'claude'], attempt) == ('openai', 'openai')
+    assert started == ['openai']
+
+def test_every_provider_failing_raises():
+    dispatcher = LLMDispatcher(timeout=5)
+    with pytest.raises(LLMUnavailableError) as raised:
+        dispatcher.call(['openai', 'claude'], attempts({'openai': fail, 'claude': fail}))
+    assert set(raised.value.errors) == {'openai', 'claude'}
+
+def test_win_without_the_requested_provider_is_a_failover():
+    dispatcher = LLMDispatcher(timeout=5, hedge=True, default_hedge_delay=0.01)
+    assert dispatcher.call(['claude'], attempts({'claude': lambda: 'b'}), requested='openai') == ('b', 'claude')
+    assert dispatcher.stats()['winners'] == [{'requested': 'openai', 'winner': 'claude', 'path': 'failover',
+                                              'count': 1}]
+
+class FakePrediction:
+    def __init__(self, title):
+        self.title = title
+        self.description = ''
+        self.exercises = [{'name': 'Squat'}]
+        self.sets_and_reps = []
+        self.rest_times = []
+        self.notes = ''
+
+class FakeProviders:
+    """Stands in for run_workout_generator; providers in ``failing`` raise."""
+
+    def __init__(self):
+        self.failing = set()
+        self.called = []
+
+    def __call__(self, provider, description, gym_equipment):
+        self.called.append(provider)
+        if provider in self.failing:
+            raise ValueError(f'{provider} is down')
+        return FakePrediction(f'from {provider}')
+
+@pytest.fixture
+def providers(app_module, monkeypatch):
+    """Both providers configured, with generation answered by a FakeProviders."""
+    fake = FakeProviders()
+    monkeypatch.setattr(app_module, 'configured_providers', lambda: ['openai', 'claude'])
+    monkeypatch.setattr(app_module, 'run_workout_generator', fake)
+    monkeypatch.setattr(app_module, 'LOCAL_PLANNER', 'off')
+    monkeypatch.setattr(app_module, 'llm_dispatcher', LLMDispatcher(timeout=5))
+    return fake
+
+def test_failover_plan_is_cached_under_the_model_that_wrote_it(app_module, providers):
+    description = f'Plan cache key test {time.time()}'
+    providers.failing = {'openai'}
+    assert app_module.generate_workout_plan('openai', description, [])['title'] == 'from claude'
+    cache, models = app_module.plan_cache, app_module.PROVIDER_MODELS
+    assert cache.get(cache.make_key(description, [], models['claude']))['title'] == 'from claude'
+    assert cache.get(cache.make_key(description, [], models['openai'])) is None
+
+    # Once openai is back, its own plan is generated and then cached, rather than claude's served
+    providers.failing = set()
+    assert app_module.generate_workout_plan('openai', description, [])['title'] == 'from openai'
+    assert app_module.generate_workout_plan('openai', description, [])['title'] == 'from openai'
+    assert providers.called == ['openai', 'claude', 'openai']
+
+def test_failover_skips_providers_without_keys(app_module, providers, monkeypatch):
+    monkeypatch.setattr(app_module, 'configured_providers', lambda: ['claude'])
+    description = f'Unconfigured provider test {time.time()}'
+    assert app_module.generate_workout_plan('openai', description, [])['title'] == 'from claude'
+    assert providers.called == ['claude']
+    assert app_module.llm_dispatcher.stats()['winners'] == [
+        {'requested': 'openai', 'winner': 'claude', 'path': 'failover', 'count': 1}]
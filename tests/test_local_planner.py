@@ -0,0 +1,28 @@
+import pytest
+
+from equipment_index import canonical_equipment
+
+@pytest.fixture
+def planner(app_module):
+    return app_module.local_planner
+
+def picks(planner, description):
+    return planner.plan(description)['exercises']
+
+def test_named_muscle_outranks_requested_equipment(planner):
+    exercises = picks(planner, 'Back and biceps with cables')
+    arms = [ex['name'] for ex in exercises if ex['muscle_group'] == 'Arms']
+    assert arms
+    # Biceps were asked for: curls in any equipment before a cable tricep move
+    assert all('curl' in name.lower() for name in arms)
+
+def test_requested_equipment_still_narrows_other_groups(planner):
+    exercises = picks(planner, 'Back and biceps with cables')
+    back = [ex for ex in exercises if ex['muscle_group'] == 'Back']
+    assert back
+    assert all(canonical_equipment(ex['equipment']) in (canonical_equipment('Cable Machine'), None) for ex in back)
+
+def test_named_muscle_comes_first_in_its_group(planner):
+    exercises = picks(planner, 'Chest and triceps hypertrophy')
+    arms = [ex['name'].lower() for ex in exercises if ex['muscle_group'] == 'Arms']
+    assert arms and not any('curl' in name for name in arms)
@@ -0,0 +1,52 @@
+import sqlite3
+import time
+
+import pytest
+
+import metrics
+
+SLOW_QUERY = 'SELECT slow(n) FROM numbers'
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'timed.db'), factory=metrics.TimedConnection)
+    conn.execute('CREATE TABLE numbers (n INTEGER)')
+    conn.executemany('INSERT INTO numbers VALUES (?)', [(n,) for n in range(10)])
+    conn.commit()
+    # Each row costs 10 ms while SQLite steps to it, i.e. during the fetch rather than the execute
+    conn.create_function('slow', 1, lambda n: time.sleep(0.01) or n)
+    yield conn
+    conn.close()
+
+def observed(label):
+    """``(total seconds, observations)`` recorded so far for a timed.db statement label."""
+    series = metrics.SQL_LATENCY._series.get(('timed', label))
+    return (series[1], series[2]) if series else (0.0, 0)
+
+@pytest.mark.parametrize('read', [
+    lambda cursor: cursor.fetchall(),
+    lambda cursor: list(cursor),
+    lambda cursor: [cursor.fetchone() for _ in range(11)],
+    lambda cursor: [cursor.fetchmany(4) for _ in range(3)],
+])
+def test_fetches_are_timed_once_per_statement(conn, read):
+    label = metrics.statement_label(SLOW_QUERY)
+    total_before, count_before = observed(label)
+    rows = read(conn.execute(SLOW_QUERY))
+    assert rows
+    total, count = observed(label)
+    assert count == count_before + 1
+    assert total - total_before >= 0.09
+
+def test_dropped_cursor_is_observed(conn):
+    label = metrics.statement_label(SLOW_QUERY)
+    _, count_before = observed(label)
+    assert conn.execute(SLOW_QUERY).fetchone() == (0,)
+    assert observed(label)[1] == count_before + 1
+
+def test_writes_are_observed_at_execute(conn):
+    label = metrics.statement_label('INSERT INTO numbers VALUES (?)')
+    _, count_before = observed(label)
+    conn.execute('INSERT INTO numbers VALUES (?)', (10,))
+    conn.executemany('INSERT INTO numbers VALUES (?)', [(11,), (12,)])
+    assert observed(label)[1] == count_before + 2
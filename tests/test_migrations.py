@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+import migrations
+
+def latest(schema):
+    return migrations.MIGRATIONS[schema][-1][0]
+
+def indexes(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA index_list({table})')}
+
+@pytest.mark.parametrize('schema', sorted(migrations.MIGRATIONS))
+def test_migrating_twice_is_a_no_op(tmp_path, schema):
+    conn = sqlite3.connect(str(tmp_path / f'{schema}.db'))
+    assert migrations.migrate(conn, schema) == latest(schema)
+    applied = conn.execute('SELECT version FROM schema_version ORDER BY version').fetchall()
+    assert migrations.migrate(conn, schema) == latest(schema)
+    assert conn.execute('SELECT version FROM schema_version ORDER BY version').fetchall() == applied
+    assert [v for v, in applied] == [version for version, _, _ in migrations.MIGRATIONS[schema]]
+    conn.close()
+
+def test_legacy_database_is_upgraded_in_place(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'workouts.db'))
+    # The tables as the app created them before migrations existed
+    conn.execute('CREATE TABLE workouts (id INTEGER PRIMARY KEY, title TEXT NOT NULL, description TEXT, '
+                 'date TEXT NOT NULL, gym_id INTEGER, workout_data TEXT NOT NULL)')
+    conn.execute('CREATE TABLE workout_logs (id INTEGER PRIMARY KEY, workout_id INTEGER NOT NULL, '
+                 'exercise_name TEXT NOT NULL, set_number INTEGER NOT NULL, reps INTEGER, weight REAL, '
+                 'rest_time INTEGER, notes TEXT, timestamp TEXT NOT NULL)')
+    conn.execute("INSERT INTO workouts VALUES (1, 'Old', NULL, '2024-01-01 10:00:00', NULL, '{}')")
+    conn.execute("INSERT INTO workout_logs VALUES (1, 1, 'Squat', 1, 5, 100, NULL, NULL, '2024-01-01 10:05:00')")
+    conn.commit()
+
+    assert migrations.migrate(conn, 'workouts') == latest('workouts')
+    assert conn.execute('SELECT title FROM workouts').fetchall() == [('Old',)]
+    assert conn.execute('SELECT exercise_name, client_id FROM workout_logs').fetchall() == [('Squat', None)]
+    assert {'idx_workout_logs_workout', 'idx_workout_logs_client_id'} <= indexes(conn, 'workout_logs')
+    assert 'idx_workouts_date' in indexes(conn, 'workouts')
+    conn.close()
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    monkeypatch.setitem(migrations.MIGRATIONS, 'broken', [
+        (1, 'Create a table', ['CREATE TABLE t (n INTEGER)']),
+        (2, 'Half-apply a change', ['CREATE TABLE u (n INTEGER)', 'NOT VALID SQL']),
+    ])
+    conn = sqlite3.connect(str(tmp_path / 'broken.db'))
+    with pytest.raises(sqlite3.OperationalError):
+        migrations.migrate(conn, 'broken')
+    assert migrations.current_version(conn) == 1
+    tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 't' in tables and 'u' not in tables
+    conn.close()
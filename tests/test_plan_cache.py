@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from plan_cache import PlanCache
+
+GYM = [{'name': 'Barbell', 'category': 'Free Weights', 'quantity': 2},
+       {'name': 'Dumbbells', 'category': 'Free Weights', 'quantity': 10}]
+PLAN = {'title': 'Leg Day', 'exercises': [{'name': 'Squat'}]}
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PlanCache(str(tmp_path / 'plan_cache.db'))
+    yield cache
+    cache.close()
+
+def test_key_ignores_case_punctuation_and_equipment_order(cache):
+    key = cache.make_key('Leg day, for STRENGTH!', GYM, 'openai/gpt-4o-mini')
+    assert cache.make_key('leg day for strength', list(reversed(GYM)), 'openai/gpt-4o-mini') == key
+
+@pytest.mark.parametrize('change', [
+    lambda c: c.make_key('arm day for strength', GYM, 'openai/gpt-4o-mini'),
+    lambda c: c.make_key('leg day for strength', GYM[:1], 'openai/gpt-4o-mini'),
+    lambda c: c.make_key('leg day for strength', GYM, 'anthropic/claude-3-opus-20240229'),
+])
+def test_key_changes_with_request_equipment_and_model(cache, change):
+    assert change(cache) != cache.make_key('leg day for strength', GYM, 'openai/gpt-4o-mini')
+
+def test_key_changes_with_prompt_version(tmp_path, cache):
+    other = PlanCache(str(tmp_path / 'other.db'), prompt_version=cache.prompt_version + 1)
+    assert other.make_key('leg day', GYM, 'm') != cache.make_key('leg day', GYM, 'm')
+    other.close()
+
+def test_put_then_get(cache):
+    key = cache.make_key('leg day', GYM, 'm')
+    assert cache.get(key) is None
+    cache.put(key, PLAN)
+    assert cache.get(key) == PLAN
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+def test_expired_entries_miss(tmp_path):
+    cache = PlanCache(str(tmp_path / 'ttl.db'), ttl_seconds=0)
+    key = cache.make_key('leg day', GYM, 'm')
+    cache.put(key, PLAN)
+    time.sleep(0.01)
+    assert cache.get(key) is None
+    cache.close()
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = PlanCache(str(tmp_path / 'lru.db'), max_entries=2)
+    cache.put('a', PLAN)
+    time.sleep(0.01)
+    cache.put('b', PLAN)
+    time.sleep(0.01)
+    assert cache.get('a') == PLAN
+    time.sleep(0.01)
+    cache.put('c', PLAN)
+    assert cache.get('b') is None
+    assert cache.get('a') == PLAN and cache.get('c') == PLAN
+    cache.close()
@@ -0,0 +1,58 @@
+import json
+import sqlite3
+
+import migrations
+import plan_storage
+
+PLAN = {
+    'title': 'Chest Day',
+    'description': 'Pressing focus',
+    'exercises': [
+        {'id': 3, 'name': 'Bench Press', 'muscle_group': 'Chest', 'equipment': 'Barbell', 'sets': 4, 'reps': '8-12',
+         'tempo': '3-1-1'},
+        {'name': 'Push-Up', 'muscle_group': 'Chest', 'equipment': 'Bodyweight', 'sets': 3, 'reps': 15},
+    ],
+    'sets_and_reps': ['4 sets of 8-12'],
+    'rest_times': ['90 seconds between sets'],
+    'notes': 'Warm up first.',
+}
+
+def test_saved_plan_round_trips_through_workout_exercises(app_module, tmp_path):
+    tracker = app_module.WorkoutTracker(str(tmp_path / 'workouts.db'))
+    workout_id = tracker.save_workout(PLAN['title'], PLAN['description'], None, PLAN, archive_raw=False)
+    workout = tracker.get_workout(workout_id)
+    rows = tracker.conn.execute('SELECT name, reps, extra FROM workout_exercises WHERE workout_id = ? ORDER BY position',
+                                (workout_id,)).fetchall()
+    raw = tracker.conn.execute('SELECT workout_data FROM workouts WHERE id = ?', (workout_id,)).fetchone()[0]
+    tracker.close()
+
+    assert workout['workout_data'] == PLAN
+    # Untyped reps keep "8-12" and 15 as they were; unknown keys land in extra
+    assert [tuple(row) for row in rows] == [('Bench Press', '8-12', '{"tempo": "3-1-1"}'), ('Push-Up', 15, None)]
+    assert raw == '{}'
+
+def test_migration_backfills_old_workouts(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'workouts.db'))
+    conn.row_factory = sqlite3.Row
+    migrations.migrate(conn, 'workouts')
+    conn.execute("INSERT INTO workouts (id, title, date, workout_data) VALUES (1, 'Old', '2024-01-01', ?)",
+                 (json.dumps(PLAN),))
+    conn.execute("INSERT INTO workouts (id, title, date, workout_data) VALUES (2, 'Broken', '2024-01-02', 'not json')")
+    conn.commit()
+
+    plan_storage.backfill(conn)
+    conn.commit()
+
+    normalized = dict(conn.execute('SELECT id, plan_normalized FROM workouts').fetchall())
+    assert normalized == {1: 1, 2: 0}
+    names = [row[0] for row in conn.execute('SELECT name FROM workout_exercises WHERE workout_id = 1 ORDER BY position')]
+    assert names == ['Bench Press', 'Push-Up']
+    conn.close()
+
+def test_unparsed_workouts_fall_back_to_the_raw_json(app_module, tmp_path):
+    tracker = app_module.WorkoutTracker(str(tmp_path / 'workouts.db'))
+    tracker.conn.execute("INSERT INTO workouts (id, title, date, workout_data) VALUES (1, 'Raw', '2024-01-01', ?)",
+                         (json.dumps(PLAN),))
+    tracker.conn.commit()
+    assert tracker.get_workout(1)['workout_data'] == PLAN
+    tracker.close()
@@ -0,0 +1,44 @@
+import threading
+
+from program_registry import ProgramRegistry
+
+class StubLM:
+    def __init__(self, model):
+        self.model = model
+
+class StubProgram:
+    def save(self, path):
+        pass
+
+    def load(self, path):
+        pass
+
+def test_compiles_once_per_key(tmp_path):
+    compiled = []
+    def compile_program(lm):
+        compiled.append(lm.model)
+        return StubProgram()
+    registry = ProgramRegistry('test', StubProgram, compile_program, artifact_dir=str(tmp_path))
+
+    lm = StubLM('openai/gpt-4o-mini')
+    assert registry.get('openai', lm) is registry.get('OpenAI', lm)
+    assert compiled == ['openai/gpt-4o-mini']
+
+def test_slow_compile_does_not_block_other_providers(tmp_path):
+    release = threading.Event()
+    def compile_program(lm):
+        if lm.model == 'slow/model':
+            assert release.wait(5)
+        return StubProgram()
+    registry = ProgramRegistry('test', StubProgram, compile_program, artifact_dir=str(tmp_path))
+
+    slow = threading.Thread(target=registry.get, args=('claude', StubLM('slow/model')))
+    slow.start()
+    try:
+        done = threading.Event()
+        fast = threading.Thread(target=lambda: (registry.get('openai', StubLM('fast/model')), done.set()))
+        fast.start()
+        assert done.wait(2), 'compile for another provider was blocked'
+    finally:
+        release.set()
+        slow.join(5)
@@ -0,0 +1,70 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import migrations
+import progress_analytics
+from progress_analytics import LogArrays, ProgressReport, get_log_arrays, progress_report, warm_progress_report
+
+@pytest.fixture
+def logs_db(tmp_path):
+    path = str(tmp_path / 'workouts.db')
+    conn = sqlite3.connect(path)
+    migrations.migrate(conn, 'workouts')
+    conn.close()
+    return path
+
+def log(path, *rows):
+    """Insert ``(workout_id, exercise_name, reps, weight, timestamp)`` sets."""
+    conn = sqlite3.connect(path)
+    conn.executemany('INSERT INTO workout_logs (workout_id, exercise_name, set_number, reps, weight, timestamp) '
+                     'VALUES (?, ?, 1, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+def test_new_sets_are_appended(logs_db):
+    log(logs_db, (1, 'Squat', 5, 100, '2025-06-02 10:00:00'))
+    first = get_log_arrays(logs_db)
+    assert len(first) == 1
+    log(logs_db, (2, 'Squat', 5, 105, '2025-06-04 10:00:00'), (2, 'Bench Press', 5, 80, '2025-06-04 10:00:00'))
+    second = get_log_arrays(logs_db)
+    assert list(second.ids) == [1, 2, 3]
+    assert second.names == ['Squat', 'Bench Press']
+    assert get_log_arrays(logs_db) is second
+
+def test_rebuilt_database_is_reloaded(logs_db):
+    log(logs_db, (1, 'Squat', 5, 100, '2025-06-02 10:00:00'), (1, 'Squat', 5, 100, '2025-06-02 10:05:00'))
+    assert len(get_log_arrays(logs_db)) == 2
+    conn = sqlite3.connect(logs_db)
+    conn.execute('DELETE FROM workout_logs')
+    conn.commit()
+    conn.close()
+    log(logs_db, (1, 'Deadlift', 5, 140, '2025-06-03 10:00:00'))
+    arrays = get_log_arrays(logs_db)
+    # The new row reuses id 1, so the stale history is dropped rather than topped up
+    assert len(arrays) == 1
+    assert arrays.names == ['Deadlift']
+
+def test_weeks_start_on_monday():
+    # 2025-06-01 is a Sunday, 2025-06-02 a Monday
+    days = np.array([np.datetime64(day, 'D').astype(np.int64) for day in ('2025-06-01', '2025-06-02', '2025-06-08')],
+                    dtype=np.float64)
+    logs = LogArrays(np.arange(1, 4), np.arange(1, 4), np.zeros(3, np.int32), np.full(3, 5.0),
+                     np.full(3, 100.0), days, ['Squat'])
+    weeks = ProgressReport(logs).weekly_volume(weeks=2)
+    assert weeks == [
+        {'week_of': '2025-05-26', 'volume_load': 500.0, 'sets': 1},
+        {'week_of': '2025-06-02', 'volume_load': 1000.0, 'sets': 2},
+    ]
+
+def test_warm_up_builds_the_report(logs_db):
+    log(logs_db, (1, 'Squat', 5, 100, '2025-06-02 10:00:00'))
+    warm_progress_report(logs_db).join(timeout=10)
+    cached = progress_analytics._reports[(logs_db, 'epley')][1]
+    assert progress_report(logs_db) is cached
+    assert cached.total_sets == 1
+
+def test_warm_up_skips_a_missing_database(tmp_path):
+    warm_progress_report(str(tmp_path / 'missing.db')).join(timeout=10)
+    assert not (tmp_path / 'missing.db').exists()
@@ -0,0 +1,74 @@
+from equipment_index import EquipmentIndex
+from prompt_packer import EXERCISE_HEADER, PromptPacker, estimate_tokens
+
+GYM = [
+    {'name': 'Dumbbells', 'category': 'Free Weights', 'quantity': 10, 'description': None},
+    {'name': 'Bench', 'category': 'Free Weights', 'quantity': 2, 'description': 'Adjustable'},
+    {'name': 'Treadmill', 'category': 'Cardio', 'quantity': 1, 'description': None},
+]
+
+EXERCISES = [
+    {'id': 1, 'name': 'Barbell Squat', 'muscle_group': 'Legs', 'equipment': 'Barbell'},
+    {'id': 2, 'name': 'Goblet Squat', 'muscle_group': 'Legs', 'equipment': 'Dumbbell'},
+    {'id': 3, 'name': 'Lunge', 'muscle_group': 'Legs', 'equipment': 'Dumbbells'},
+    {'id': 4, 'name': 'Push-Up', 'muscle_group': 'Chest', 'equipment': 'Bodyweight'},
+    {'id': 5, 'name': 'Dumbbell Press', 'muscle_group': 'Chest', 'equipment': 'Dumbbells'},
+]
+
+def test_usable_exercises_come_first_interleaved_by_group():
+    ranked = PromptPacker().rank_exercises(EXERCISES, GYM)
+    assert [ex['id'] for ex in ranked] == [2, 4, 3, 5, 1]
+
+def test_unknown_gym_keeps_retrieval_order_within_groups():
+    assert [ex['id'] for ex in PromptPacker().rank_exercises(EXERCISES, [])] == [1, 4, 2, 5, 3]
+
+def test_equipment_used_by_candidates_comes_first():
+    ranked = PromptPacker().rank_equipment(list(reversed(GYM)), EXERCISES)
+    assert [item['name'] for item in ranked] == ['Dumbbells', 'Treadmill', 'Bench']
+
+def test_tables_are_compact():
+    packed = PromptPacker().pack(EXERCISES, GYM)
+    assert packed.equipment == 'Free Weights: Dumbbells x10, Bench x2 (Adjustable)\nCardio: Treadmill'
+    assert packed.exercises.splitlines()[:2] == [EXERCISE_HEADER, '2|Goblet Squat|Legs|Dumbbell']
+    assert packed.tokens_saved > 0
+    assert packed.stats()['exercises_dropped'] == 0
+
+def test_cells_cannot_break_the_table():
+    assert PromptPacker.format_exercise({'id': 1, 'name': 'A|B\nC', 'muscle_group': None}) == '1|A/B C||'
+
+def test_small_budget_trims_the_lowest_ranked_rows():
+    packed = PromptPacker(token_budget=40).pack(EXERCISES, GYM)
+    assert 0 < len(packed.kept_exercises) < len(EXERCISES)
+    assert packed.kept_exercises == PromptPacker().rank_exercises(EXERCISES, GYM)[:len(packed.kept_exercises)]
+    assert packed.dropped_exercises == len(EXERCISES) - len(packed.kept_exercises)
+    assert sum(packed.packed_tokens.values()) <= 40 + estimate_tokens(EXERCISE_HEADER)
+
+def test_equipment_is_capped_at_its_share():
+    gym = [{'name': f'Machine {i}', 'category': 'Machines', 'quantity': 1} for i in range(100)]
+    packed = PromptPacker(token_budget=200, equipment_share=0.3).pack(EXERCISES, gym)
+    assert packed.dropped_equipment > 0
+    assert packed.equipment.endswith(f'(+{packed.dropped_equipment} more items not listed)')
+    assert estimate_tokens(packed.equipment) <= 60 + 10
+
+def test_empty_context():
+    packed = PromptPacker().pack([], [])
+    assert (packed.exercises, packed.equipment) == ('', '')
+
+def test_usable_follows_the_gym_filter_vocabulary():
+    gym = [{'name': 'Lat Pulldown Machine', 'category': 'Machines'}, {'name': 'Power Rack', 'category': 'Racks'}]
+    exercises = [
+        {'id': 1, 'name': 'Cable Row', 'muscle_group': 'Back', 'equipment': 'Cable Machine'},
+        {'id': 2, 'name': 'Chin-Up', 'muscle_group': 'Back', 'equipment': 'Pull-Up Bar'},
+        {'id': 3, 'name': 'Bar Hang', 'muscle_group': 'Back', 'equipment': 'Bar'},
+        {'id': 4, 'name': 'Plank', 'muscle_group': 'Core', 'equipment': 'Bodyweight'},
+    ]
+    assert PromptPacker.usable(exercises, gym) == [True, True, False, True]
+
+    index = EquipmentIndex(exercises)
+    doable = index.doable(index.availability(item['name'] for item in gym))
+    assert PromptPacker.usable(exercises, gym) == list(doable)
+
+def test_equipment_relevance_uses_what_an_item_provides():
+    gym = [{'name': 'Treadmill'}, {'name': 'Olympic Barbell'}]
+    exercises = [{'id': 1, 'name': 'Plate Pinch', 'muscle_group': 'Arms', 'equipment': 'Weight Plate'}]
+    assert [item['name'] for item in PromptPacker().rank_equipment(gym, exercises)] == ['Olympic Barbell', 'Treadmill']
@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+
+import migrations
+from read_cache import ReadCache
+
+@pytest.fixture
+def gyms_db(tmp_path):
+    path = str(tmp_path / 'gyms.db')
+    conn = sqlite3.connect(path)
+    migrations.migrate(conn, 'gyms')
+    conn.execute("INSERT INTO gyms (name) VALUES ('Home')")
+    conn.commit()
+    yield path, conn
+    conn.close()
+
+class Loader:
+    def __init__(self, conn):
+        self.conn = conn
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [{'name': name} for name, in self.conn.execute('SELECT name FROM gyms ORDER BY id')]
+
+def test_second_read_is_a_hit(gyms_db):
+    path, conn = gyms_db
+    cache, loader = ReadCache(), Loader(conn)
+    assert cache.get(conn, path, 'gyms', 'all', loader) == [{'name': 'Home'}]
+    assert cache.get(conn, path, 'gyms', 'all', loader) == [{'name': 'Home'}]
+    assert loader.calls == 1
+    assert cache.stats()['by_generation']['gyms']['hit'] == 1
+
+def test_write_from_another_connection_makes_the_entry_stale(gyms_db):
+    path, conn = gyms_db
+    cache, loader = ReadCache(), Loader(conn)
+    cache.get(conn, path, 'gyms', 'all', loader)
+
+    other = sqlite3.connect(path)
+    other.execute("INSERT INTO gyms (name) VALUES ('Work')")
+    other.commit()
+    other.close()
+
+    assert cache.get(conn, path, 'gyms', 'all', loader) == [{'name': 'Home'}, {'name': 'Work'}]
+    assert cache.stats()['by_generation']['gyms']['stale'] == 1
+
+def test_other_generations_are_untouched(gyms_db):
+    path, conn = gyms_db
+    cache, loader = ReadCache(), Loader(conn)
+    cache.get(conn, path, 'equipment', 'all', loader)
+    conn.execute("UPDATE gyms SET name = 'Renamed'")
+    conn.commit()
+    assert cache.get(conn, path, 'equipment', 'all', loader) == [{'name': 'Home'}]
+    assert loader.calls == 1
+
+def test_reads_inside_a_transaction_bypass_the_cache(gyms_db):
+    path, conn = gyms_db
+    cache, loader = ReadCache(), Loader(conn)
+    conn.execute("INSERT INTO gyms (name) VALUES ('Uncommitted')")
+    assert len(cache.get(conn, path, 'gyms', 'all', loader)) == 2
+    conn.rollback()
+    assert cache.get(conn, path, 'gyms', 'all', loader) == [{'name': 'Home'}]
+    assert loader.calls == 2
+    assert cache.stats()['by_generation']['gyms']['uncached'] == 1
+
+def test_unknown_generation_is_not_cached(gyms_db):
+    path, conn = gyms_db
+    cache, loader = ReadCache(), Loader(conn)
+    cache.get(conn, path, 'nope', 'all', loader)
+    cache.get(conn, path, 'nope', 'all', loader)
+    assert loader.calls == 2
+
+def test_least_recently_used_entry_is_evicted(gyms_db):
+    path, conn = gyms_db
+    cache = ReadCache(max_entries=2)
+    loaders = {key: Loader(conn) for key in 'abc'}
+    for key in 'ab':
+        cache.get(conn, path, 'gyms', key, loaders[key])
+    cache.get(conn, path, 'gyms', 'a', loaders['a'])
+    cache.get(conn, path, 'gyms', 'c', loaders['c'])
+    cache.get(conn, path, 'gyms', 'a', loaders['a'])
+    cache.get(conn, path, 'gyms', 'b', loaders['b'])
+    assert (loaders['a'].calls, loaders['b'].calls) == (1, 2)
+    assert cache.stats()['evictions'] == 2
+
+def test_callers_get_copies(gyms_db):
+    path, conn = gyms_db
+    cache = ReadCache()
+    cache.get(conn, path, 'gyms', 'all', Loader(conn))[0]['name'] = 'Changed'
+    assert cache.get(conn, path, 'gyms', 'all', Loader(conn)) == [{'name': 'Home'}]
+
+def test_gym_reads_see_new_equipment(app_module, tmp_path):
+    gym_db = app_module.GymDB(str(tmp_path / 'gyms.db'))
+    gym_id = gym_db.add_gym('Cached Gym')
+    assert gym_db.get_gym_equipment(gym_id) == []
+    gym_db.add_equipment(gym_id, 'Rack', 'Racks')
+    assert [item['name'] for item in gym_db.get_gym_equipment(gym_id)] == ['Rack']
+    assert gym_db.get_gym(gym_id)['name'] == 'Cached Gym'
+    gym_db.close()
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import semantic_index
+from semantic_index import build_index, find_similar_exercises, tokenize
+
+EXERCISES = [
+    {'id': 1, 'name': 'Romanian Deadlift', 'muscle_group': 'Legs', 'equipment': 'Barbell'},
+    {'id': 2, 'name': 'Glute Bridge', 'muscle_group': 'Legs', 'equipment': 'Bodyweight'},
+    {'id': 3, 'name': 'Barbell Row', 'muscle_group': 'Back', 'equipment': 'Barbell'},
+    {'id': 4, 'name': 'Dumbbell Curl', 'muscle_group': 'Arms', 'equipment': 'Dumbbells'},
+    {'id': 5, 'name': 'Bench Press', 'muscle_group': 'Chest', 'equipment': 'Barbell'},
+    {'id': 6, 'name': 'Plank', 'muscle_group': 'Core', 'equipment': 'Bodyweight'},
+]
+
+@pytest.fixture(autouse=True)
+def no_faiss(monkeypatch):
+    # Exercise the numpy search path whether or not faiss is installed
+    monkeypatch.setattr(semantic_index, 'faiss', None)
+
+def test_tokenize_stems_and_joins_phrases():
+    assert tokenize('Pulling movements for the posterior chain') == \
+        ['pull', 'movement', 'for', 'the', 'posterior_chain']
+    assert tokenize('Lateral raises, bench presses') == ['lateral', 'raise', 'bench', 'press']
+
+def test_embeddings_are_unit_length_and_deterministic():
+    embedder = semantic_index.HashingEmbedder()
+    vector = embedder.embed('dumbbell curl')
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+    assert np.array_equal(vector, semantic_index.HashingEmbedder().embed('dumbbell curl'))
+    assert not embedder.embed('').any()
+
+def test_search_finds_exercises_by_concept(tmp_path):
+    index = build_index(EXERCISES, str(tmp_path / 'vectors'))
+    assert index.search('posterior chain', k=2)[0][0] in {1, 2}
+    assert index.search('pulling movements', k=2)[0][0] in {3, 4}
+    assert index.search('anything', k=0) == []
+
+def test_rebuild_only_embeds_changed_exercises(tmp_path):
+    index_dir = str(tmp_path / 'vectors')
+    first = build_index(EXERCISES, index_dir)
+    assert first.manifest['embedded'] == len(EXERCISES)
+    assert build_index(EXERCISES, index_dir).path == first.path
+
+    changed = EXERCISES[:-1] + [{'id': 6, 'name': 'Side Plank', 'muscle_group': 'Core', 'equipment': 'Bodyweight'}]
+    second = build_index(changed, index_dir)
+    assert (second.manifest['embedded'], second.manifest['reused']) == (1, len(EXERCISES) - 1)
+    # The old generation is dropped once CURRENT points at the new one
+    assert [entry for entry in os.listdir(index_dir) if entry.startswith('gen-')] == [os.path.basename(second.path)]
+
+def test_inverted_lists_match_an_exhaustive_scan(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    words = ['curl', 'row', 'press', 'squat', 'lunge', 'plank', 'fly', 'dip', 'raise', 'bridge']
+    exercises = [{'id': i, 'name': f'{rng.choice(words)} {rng.choice(words)} {i}', 'muscle_group': 'Legs',
+                  'equipment': 'Cable'} for i in range(400)]
+    flat = build_index(exercises, str(tmp_path / 'flat'))
+
+    monkeypatch.setattr(semantic_index, 'IVF_MIN_VECTORS', 100)
+    monkeypatch.setattr(semantic_index, 'VECTORS_PER_LIST', 50)
+    monkeypatch.setattr(semantic_index, 'NPROBE', 8)
+    ivf = build_index(exercises, str(tmp_path / 'ivf'))
+    assert ivf.manifest['nlist'] == 8 and flat.manifest['nlist'] == 0
+
+    # Probing every list has to give the same answer as no lists at all
+    assert ivf.search('squat press', k=5) == flat.search('squat press', k=5)
+
+def test_find_similar_exercises_drops_weak_matches(tmp_path):
+    db_path = str(tmp_path / 'exercises.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE exercises (id INTEGER PRIMARY KEY, name TEXT, muscle_group TEXT, equipment TEXT)')
+    conn.executemany('INSERT INTO exercises VALUES (:id, :name, :muscle_group, :equipment)', EXERCISES)
+    conn.commit()
+    conn.close()
+
+    index_dir = str(tmp_path / 'vectors')
+    found = find_similar_exercises('hinge for the posterior chain', k=3, db_path=db_path, index_dir=index_dir)
+    assert found and found[0]['name'] in {'Romanian Deadlift', 'Glute Bridge'}
+    assert find_similar_exercises('zzqx', db_path=db_path, index_dir=index_dir) == []
+
+def test_module_imports_without_fcntl():
+    # Windows has no fcntl; the module (and so app.py) must still import there
+    code = "import sys; sys.modules['fcntl'] = None; import semantic_index"
+    subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(semantic_index.__file__), check=True)
+
+def test_search_failure_is_logged_once(app_module, monkeypatch, caplog):
+    def unavailable(description):
+        raise OSError('index missing')
+    monkeypatch.setattr(app_module, 'find_similar_exercises', unavailable)
+    monkeypatch.setattr(app_module, '_semantic_search_warned', False)
+    generator = app_module.WorkoutGenerator.__new__(app_module.WorkoutGenerator)
+    for _ in range(3):
+        assert generator.find_exercises_for_workout('something fun')
+    assert [r.getMessage() for r in caplog.records] == ['Semantic exercise search unavailable: index missing']
@@ -0,0 +1,111 @@
+import secrets
+import time
+
+import pytest
+from flask import Flask, session
+
+import db
+from session_store import MemorySessionStore, ServerSideSessionInterface, SQLiteSessionStore
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        yield MemorySessionStore()
+    else:
+        yield SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+        db.close_connections()
+
+@pytest.fixture
+def interface(store):
+    return ServerSideSessionInterface(store)
+
+@pytest.fixture
+def client(interface):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.session_interface = interface
+
+    @app.route('/set/<value>')
+    def set_value(value):
+        session['value'] = value
+        return 'ok'
+
+    @app.route('/get')
+    def get_value():
+        return session.get('value', '')
+
+    @app.route('/clear')
+    def clear():
+        session.clear()
+        return 'ok'
+
+    return app.test_client()
+
+def session_cookie(client):
+    cookie = client.get_cookie('session')
+    return cookie.value if cookie else None
+
+def test_cookie_carries_only_an_id(client, store):
+    value = secrets.token_hex(100)
+    client.get(f'/set/{value}')
+    sid = session_cookie(client)
+    assert len(sid) == 43
+    data, _, cookie_bytes = store.load(sid)
+    assert value.encode() in data
+    # A signed cookie would have carried the data itself
+    assert cookie_bytes > len(value)
+    assert client.get('/get').data == value.encode()
+
+def test_unchanged_session_is_not_rewritten(client):
+    client.get('/set/abc')
+    response = client.get('/get')
+    assert 'Set-Cookie' not in response.headers
+
+def test_cleared_session_is_deleted_on_both_sides(client, store):
+    client.get('/set/abc')
+    sid = session_cookie(client)
+    client.get('/clear')
+    assert store.load(sid) is None
+    assert session_cookie(client) is None
+
+def test_unknown_id_starts_a_new_session(client):
+    client.set_cookie('session', 'forged')
+    assert client.get('/get').data == b''
+    client.get('/set/x')
+    assert session_cookie(client) != 'forged'
+
+def test_empty_session_sets_no_cookie(client):
+    client.get('/get')
+    assert session_cookie(client) is None
+
+def test_sweep_removes_only_expired_sessions(store):
+    now = time.time()
+    store.save('old', b'{}', now - 1, 0)
+    store.save('live', b'{}', now + 60, 0)
+    assert store.load('old') is None
+    assert store.sweep(now) == 1
+    assert store.load('live') is not None
+
+def test_touch_extends_expiry(store):
+    store.save('sid', b'{}', time.time() + 1, 0)
+    store.touch('sid', time.time() + 3600)
+    assert store.load('sid')[1] > time.time() + 3000
+
+def test_sqlite_rows_are_keyed_by_a_hash_of_the_id(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+    store.save('secret-id', b'{}', time.time() + 60, 0)
+    [key] = [row[0] for row in db.get_connection(store.db_path).execute('SELECT id FROM sessions')]
+    assert key != 'secret-id' and len(key) == 64
+    db.close_connections()
+
+def test_stats_count_bytes_saved(client, interface):
+    client.get('/set/abc')
+    client.get('/get')
+    stats = interface.stats()
+    assert stats['requests_with_session'] == 1
+    assert stats['cookie_bytes_saved'] > 0
+
+def test_app_reports_its_session_backend(app_module):
+    response = app_module.app.test_client().get('/api/session_store/stats')
+    assert response.status_code == 200
+    assert response.json['backend'] == type(app_module.session_interface.store).__name__
@@ -0,0 +1,85 @@
+import pytest
+
+PLAN = {'title': 'Test', 'description': 'Test plan', 'exercises': [{'name': 'Squat', 'sets': 3, 'reps': 5}]}
+
+@pytest.fixture
+def workout_id(app_module):
+    tracker = app_module.WorkoutTracker()
+    try:
+        return tracker.save_workout(PLAN['title'], PLAN['description'], None, PLAN)
+    finally:
+        tracker.close()
+
+def logs_for(app_module, workout_id):
+    tracker = app_module.WorkoutTracker()
+    try:
+        return tracker.get_workout_logs(workout_id)
+    finally:
+        tracker.close()
+
+def test_log_set_writes_a_row(client, app_module, workout_id):
+    response = client.post('/api/log_set', json={
+        'workout_id': workout_id, 'exercise_name': 'Squat', 'set_number': 1, 'reps': '5', 'weight': '100',
+    })
+    assert response.status_code == 200
+    assert response.json['log_id']
+    [log] = logs_for(app_module, workout_id)
+    assert (log['reps'], log['weight']) == (5, 100.0)
+
+@pytest.mark.parametrize('body, error', [
+    ({'set_number': 1}, 'exercise_name'),
+    ({'exercise_name': None, 'set_number': 1}, 'exercise_name'),
+    ({'exercise_name': 'Squat'}, 'set_number'),
+    ({'exercise_name': 'Squat', 'set_number': 1, 'reps': 'five'}, 'reps'),
+    ({'exercise_name': 'Squat', 'set_number': 1, 'weight': 'heavy'}, 'weight'),
+])
+def test_log_set_rejects_invalid_sets(client, app_module, workout_id, body, error):
+    response = client.post('/api/log_set', json=dict(body, workout_id=workout_id))
+    assert response.status_code == 400
+    assert error in response.json['error']
+    assert logs_for(app_module, workout_id) == []
+
+def test_log_set_requires_workout_id(client):
+    response = client.post('/api/log_set', json={'exercise_name': 'Squat', 'set_number': 1})
+    assert response.status_code == 400
+    assert 'workout_id' in response.json['error']
+
+def test_log_sets_rejects_a_batch_with_an_invalid_set(client, app_module, workout_id):
+    response = client.post('/api/log_sets', json={'sets': [
+        {'workout_id': workout_id, 'exercise_name': 'Squat', 'set_number': 1},
+        {'workout_id': workout_id, 'exercise_name': '', 'set_number': 2},
+    ]})
+    assert response.status_code == 400
+    assert response.json['error'].startswith('Set 1:')
+    assert logs_for(app_module, workout_id) == []
+
+def test_log_exercise_sets_returns_ids_and_skips_repeated_client_ids(app_module, workout_id):
+    tracker = app_module.WorkoutTracker()
+    try:
+        sets = [
+            {'workout_id': workout_id, 'exercise_name': 'Squat', 'set_number': 1, 'client_id': 'a'},
+            {'workout_id': workout_id, 'exercise_name': 'Squat', 'set_number': 2, 'client_id': 'b'},
+            {'workout_id': workout_id, 'exercise_name': 'Squat', 'set_number': 2, 'client_id': 'b'},
+            {'workout_id': workout_id, 'exercise_name': 'Squat', 'set_number': 3},
+        ]
+        log_ids = tracker.log_exercise_sets(sets, with_ids=True)
+        assert log_ids[2] is None
+        assert tracker.log_exercise_sets(sets[:2], with_ids=True) == [None, None]
+    finally:
+        tracker.close()
+    logs = {log['id']: log['set_number'] for log in logs_for(app_module, workout_id)}
+    assert logs == {log_ids[0]: 1, log_ids[1]: 2, log_ids[3]: 3}
+
+def test_log_sets_reports_duplicates(client, app_module, workout_id):
+    body = {'sets': [
+        {'workout_id': workout_id, 'exercise_name': 'Squat', 'set_number': n, 'client_id': f'retry-{n}'}
+        for n in (1, 2, 3)
+    ]}
+    assert client.post('/api/log_sets', json=body).json == {'success': True, 'logged': 3, 'duplicates': 0}
+    assert client.post('/api/log_sets', json=body).json == {'success': True, 'logged': 0, 'duplicates': 3}
+    assert len(logs_for(app_module, workout_id)) == 3
+
+def test_start_page_renders_the_finish_error_box(client, workout_id):
+    response = client.get(f'/workout/{workout_id}/start')
+    assert response.status_code == 200
+    assert response.data.count(b'id="finish-error"') == 1
@@ -0,0 +1,52 @@
+import pytest
+
+from equipment_index import CANONICAL_EQUIPMENT, canonical_equipment
+from term_extractor import TermExtractor
+
+GROUPS = ['Chest', 'Back', 'Legs', 'Shoulders', 'Arms', 'Core']
+EQUIPMENT = ['Barbell', 'Dumbbells', 'Cable Machine', 'Smith Machine', 'Machine', 'Pull-Up Bar', 'Bodyweight']
+
+@pytest.fixture(scope='module')
+def extractor():
+    return TermExtractor(GROUPS, EQUIPMENT)
+
+@pytest.mark.parametrize('text, groups, equipment', [
+    ('Glutes and hamstrings with cables', ['Legs'], ['Cable Machine']),
+    ('quick dumbell arm day', ['Arms'], ['Dumbbells']),
+    ('CHEST and back, barbells only', ['Chest', 'Back'], ['Barbell']),
+    ('pullup bar and pull-up bars', [], ['Pull-Up Bar']),
+])
+def test_synonyms_and_plurals_map_to_the_catalog(extractor, text, groups, equipment):
+    assert extractor.extract(text) == (groups, equipment)
+
+def test_longest_phrase_wins(extractor):
+    assert extractor.extract('smith machine squats') == ([], ['Smith Machine'])
+    assert extractor.extract('any machine') == ([], ['Machine'])
+
+def test_words_only_match_whole(extractor):
+    assert extractor.extract('improve my score and backpack carry') == ([], [])
+
+def test_upper_body_names_several_groups(extractor):
+    assert extractor.extract('upper body') == (['Chest', 'Back', 'Shoulders', 'Arms'], [])
+
+def test_synonyms_for_missing_catalog_values_are_ignored():
+    extractor = TermExtractor(['Legs'], ['Barbell'])
+    assert extractor.extract('abs with cables and glutes') == (['Legs'], [])
+
+def test_empty_text(extractor):
+    assert extractor.extract('') == ([], [])
+    assert extractor.extract(None) == ([], [])
+
+@pytest.mark.parametrize('text, equipment', [
+    ('lat pulldown machine and a pulley', ['Cable Machine']),
+    ('calisthenics, no equipment', ['Bodyweight']),
+    ('none of the machines', ['Machine']),
+])
+def test_equipment_words_come_from_the_equipment_vocabulary(extractor, text, equipment):
+    assert extractor.extract(text)[1] == equipment
+
+def test_every_equipment_alias_maps_to_its_canonical_catalog_value(extractor):
+    for item in EQUIPMENT:
+        canonical = canonical_equipment(item)
+        for alias in CANONICAL_EQUIPMENT.get(canonical, ()):
+            assert item in extractor.extract(alias)[1], alias
@@ -0,0 +1,47 @@
+import base64
+
+import pytest
+
+@pytest.fixture
+def tracker(app_module, tmp_path):
+    tracker = app_module.WorkoutTracker(str(tmp_path / 'workouts.db'))
+    # Three workouts share a date, so the id has to break ties
+    dates = ['2025-06-01 09:00:00', '2025-06-02 09:00:00', '2025-06-02 09:00:00',
+             '2025-06-02 09:00:00', '2025-06-03 09:00:00']
+    tracker.conn.executemany(
+        "INSERT INTO workouts (id, title, date, workout_data) VALUES (?, ?, ?, '{\"big\": \"blob\"}')",
+        [(i, f'Workout {i}', date) for i, date in enumerate(dates, 1)])
+    tracker.conn.commit()
+    yield tracker
+    tracker.close()
+
+def test_pages_cover_every_workout_once_newest_first(tracker):
+    seen, cursor = [], None
+    while True:
+        workouts, cursor = tracker.get_workout_page(page_size=2, cursor=cursor)
+        seen.extend(w['id'] for w in workouts)
+        if cursor is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+
+def test_last_page_has_no_cursor(tracker):
+    workouts, cursor = tracker.get_workout_page(page_size=5)
+    assert len(workouts) == 5
+    assert cursor is None
+
+def test_pages_leave_out_workout_data(tracker):
+    workouts, _ = tracker.get_workout_page(page_size=1)
+    assert set(workouts[0]) == {'id', 'title', 'description', 'date', 'gym_id'}
+
+@pytest.mark.parametrize('cursor', ['not base64!', base64.urlsafe_b64encode(b'no separator').decode(),
+                                    base64.urlsafe_b64encode(b'2025-06-01|abc').decode()])
+def test_bad_cursor_raises(tracker, cursor):
+    with pytest.raises(ValueError):
+        tracker.get_workout_page(cursor=cursor)
+
+def test_history_page_rejects_a_bad_cursor(client):
+    response = client.get('/workouts?cursor=not-a-cursor')
+    assert response.status_code == 400
+
+def test_history_page_renders(client):
+    assert client.get('/workouts?page_size=5').status_code == 200
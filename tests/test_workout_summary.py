@@ -0,0 +1,72 @@
+import pytest
+
+from summary_cache import SummaryCache
+
+PLAN = {'title': 'Summary', 'description': 'Summary plan', 'exercises': [{'name': 'Squat', 'sets': 3, 'reps': 5}]}
+
+@pytest.fixture
+def workout_id(app_module):
+    tracker = app_module.WorkoutTracker()
+    try:
+        return tracker.save_workout(PLAN['title'], PLAN['description'], None, PLAN)
+    finally:
+        tracker.close()
+
+def log_set(client, workout_id, set_number):
+    response = client.post('/api/log_set', json={'workout_id': workout_id, 'exercise_name': 'Squat',
+                                                  'set_number': set_number, 'reps': 5})
+    assert response.status_code == 200
+
+def test_unfinished_workout_is_never_cached(client, workout_id):
+    response = client.get(f'/workout/{workout_id}/summary')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert response.headers.get('ETag') is None
+
+def test_finished_workout_revalidates_with_304(client, workout_id):
+    log_set(client, workout_id, 1)
+    assert client.post(f'/api/workout/{workout_id}/finish').status_code == 200
+
+    first = client.get(f'/workout/{workout_id}/summary')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    etag = first.headers['ETag']
+
+    repeat = client.get(f'/workout/{workout_id}/summary', headers={'If-None-Match': etag})
+    assert repeat.status_code == 304
+    assert repeat.data == b''
+    assert repeat.headers['ETag'] == etag
+
+def test_late_set_changes_the_etag(client, workout_id):
+    client.post(f'/api/workout/{workout_id}/finish')
+    etag = client.get(f'/workout/{workout_id}/summary').headers['ETag']
+
+    log_set(client, workout_id, 1)
+    response = client.get(f'/workout/{workout_id}/summary', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert b'Squat' in response.data
+
+def test_missing_workout(client):
+    assert client.get('/workout/999999/summary').status_code == 404
+    assert client.post('/api/workout/999999/finish').status_code == 404
+
+def test_cache_serves_each_version_once():
+    cache = SummaryCache(max_entries=2)
+    assert cache.get(1, 0) is None
+    cache.put(1, 0, b'page')
+    assert cache.get(1, 0) == b'page'
+    assert cache.get(1, 1) is None
+    cache.put(2, 0, b'two')
+    cache.put(3, 0, b'three')
+    assert cache.get(1, 0) is None
+    cache.invalidate([3])
+    assert cache.get(3, 0) is None
+    assert cache.stats()['entries'] == 1
+
+def test_template_change_changes_the_etag(tmp_path):
+    template = tmp_path / 'summary.html'
+    template.write_text('v1')
+    before = SummaryCache([str(template)]).etag(1, 0)
+    template.write_text('v2')
+    assert SummaryCache([str(template)]).etag(1, 0) != before
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from write_behind import GroupCommitWriter
+
+def test_lone_row_commits_without_waiting():
+    writer = GroupCommitWriter(lambda rows: [row['n'] for row in rows])
+    try:
+        start = time.perf_counter()
+        assert writer.submit({'n': 1}).result(timeout=5) == 1
+        assert time.perf_counter() - start < 0.05
+    finally:
+        writer.close()
+
+def test_bad_row_fails_only_its_own_caller():
+    entered = threading.Event()
+    release = threading.Event()
+    groups = []
+    committed = []
+
+    def write_batch(rows):
+        if rows[0].get('block'):
+            entered.set()
+            release.wait(5)
+        groups.append(len(rows))
+        if any(row.get('exercise_name') is None for row in rows):
+            raise ValueError('exercise_name is required')
+        committed.extend(rows)
+        return [row['exercise_name'] for row in rows]
+
+    writer = GroupCommitWriter(write_batch)
+    try:
+        # Hold the writer on a first group so the next four queue up together
+        blocker = writer.submit({'exercise_name': 'Warmup', 'block': True})
+        assert entered.wait(5)
+        futures = [writer.submit({'exercise_name': name}) for name in ('Squat', None, 'Bench', 'Row')]
+        release.set()
+
+        assert blocker.result(timeout=5) == 'Warmup'
+        assert futures[0].result(timeout=5) == 'Squat'
+        with pytest.raises(ValueError):
+            futures[1].result(timeout=5)
+        assert futures[2].result(timeout=5) == 'Bench'
+        assert futures[3].result(timeout=5) == 'Row'
+        assert groups[:2] == [1, 4]
+        assert [row['exercise_name'] for row in committed] == ['Warmup', 'Squat', 'Bench', 'Row']
+        assert writer.stats()['groups_retried'] == 1
+    finally:
+        writer.close()
+
+def test_submit_many_commits_as_one_unit():
+    entered = threading.Event()
+    release = threading.Event()
+    groups = []
+
+    def write_batch(rows):
+        if rows[0].get('block'):
+            entered.set()
+            release.wait(5)
+        groups.append([row['n'] for row in rows])
+        if any(row.get('bad') for row in rows):
+            raise ValueError('bad row')
+        return [row['n'] * 10 for row in rows]
+
+    writer = GroupCommitWriter(write_batch, max_batch=3)
+    try:
+        writer.submit({'n': 0, 'block': True})
+        assert entered.wait(5)
+        batch = writer.submit_many([{'n': 1}, {'n': 2}, {'n': 3}, {'n': 4}])
+        single = writer.submit({'n': 5})
+        failing = writer.submit_many([{'n': 6}, {'n': 7, 'bad': True}])
+        release.set()
+
+        # Larger than max_batch, but never split across groups
+        assert batch.result(timeout=5) == [10, 20, 30, 40]
+        assert single.result(timeout=5) == 50
+        with pytest.raises(ValueError):
+            failing.result(timeout=5)
+        assert [1, 2, 3, 4] in groups
+        assert [6] not in groups and [7] not in groups
+    finally:
+        writer.close()
@@ -1,14 +1,27 @@
 import sqlite3
 import argparse
+import csv
 import dspy
 from dspy.teleprompt import BootstrapFewShot
+import json
 import os
 import re
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Set
+import db
+from program_registry import ProgramRegistry
+from equipment_index import get_equipment_index
+from exercise_index import get_exercise_index
+from semantic_index import find_similar_exercises
+from term_extractor import extract_terms
+from prompt_packer import PromptPacker
 
 class ExerciseDB:
     def __init__(self, db_path='data/exercises.db'):
         """Initialize the database connection."""
+        self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
@@ -43,84 +56,34 @@ class ExerciseDB:
     def find_exercises_for_workout(self, description):
         """Find exercises that match the workout description."""
         # Extract potential muscle groups and equipment from description
-        muscle_groups = self.extract_muscle_groups(description)
-        equipment = self.extract_equipment(description)
+        muscle_groups, equipment = extract_terms(description, self.db_path)
         
-        # Build query based on extracted terms
-        params = []
-        conditions = []
-        
-        if muscle_groups:
-            placeholders = ', '.join(['?'] * len(muscle_groups))
-            conditions.append(f"muscle_group IN ({placeholders})")
-            params.extend(muscle_groups)
-        
-        if equipment:
-            placeholders = ', '.join(['?'] * len(equipment))
-            conditions.append(f"equipment IN ({placeholders})")
-            params.extend(equipment)
-        
-        # If no specific conditions, return a diverse set
-        if not conditions:
-            # Get a variety of exercises across different muscle groups
+        # If no specific terms, look for exercises close in meaning ("posterior chain day")
+        if not muscle_groups and not equipment:
+            try:
+                similar = find_similar_exercises(description, db_path=self.db_path)
+            except OSError as e:
+                print(f"Semantic exercise search unavailable: {e}")
+                similar = []
+            if similar:
+                return similar
+            # Otherwise get a variety of exercises across different muscle groups
             return self.get_diverse_exercise_set()
         
-        # Execute the query
-        query = f"SELECT * FROM exercises WHERE {' OR '.join(conditions)}"
-        self.cursor.execute(query, params)
-        return [dict(row) for row in self.cursor.fetchall()]
+        # Look up matches in the in-memory catalog index
+        return get_exercise_index(self.db_path).find(muscle_groups, equipment)
     
     def get_diverse_exercise_set(self, limit_per_group=3):
         """Get a diverse set of exercises covering different muscle groups."""
-        # Get distinct muscle groups
-        self.cursor.execute("SELECT DISTINCT muscle_group FROM exercises")
-        muscle_groups = [row[0] for row in self.cursor.fetchall()]
-        
-        # Get exercises for each muscle group
-        results = []
-        for group in muscle_groups:
-            self.cursor.execute(
-                "SELECT * FROM exercises WHERE muscle_group = ? LIMIT ?", 
-                (group, limit_per_group)
-            )
-            results.extend([dict(row) for row in self.cursor.fetchall()])
-        
-        return results
+        return get_exercise_index(self.db_path).diverse_set(limit_per_group)
     
     def extract_muscle_groups(self, description):
-        """Extract potential muscle groups from a description."""
-        common_muscle_groups = [
-            "Chest", "Back", "Legs", "Shoulders", "Arms", 
-            "Biceps", "Triceps", "Abs", "Core", "Glutes", 
-            "Quads", "Hamstrings", "Calves"
-        ]
-        
-        # Find mentioned muscle groups
-        found_groups = []
-        description_lower = description.lower()
-        
-        for group in common_muscle_groups:
-            if group.lower() in description_lower:
-                found_groups.append(group)
-        
-        return found_groups
+        """Extract catalog muscle groups (including synonyms like "glutes") from a description."""
+        return extract_terms(description, self.db_path)[0]
     
     def extract_equipment(self, description):
-        """Extract potential equipment from a description."""
-        common_equipment = [
-            "Barbell", "Dumbbells", "Machine", "Cable", "Bodyweight",
-            "Kettlebell", "Resistance Band", "Smith Machine", "TRX"
-        ]
-        
-        # Find mentioned equipment
-        found_equipment = []
-        description_lower = description.lower()
-        
-        for equip in common_equipment:
-            if equip.lower() in description_lower:
-                found_equipment.append(equip)
-        
-        return found_equipment
+        """Extract catalog equipment (including synonyms like "cables") from a description."""
+        return extract_terms(description, self.db_path)[1]
     
     def close(self):
         """Close the database connection."""
@@ -133,13 +96,10 @@ class Exercise(dspy.Signature):
     muscle_group: str = dspy.OutputField()
     equipment: str = dspy.OutputField()
 
-class WorkoutRequest(dspy.Signature):
-    """A request for a workout."""
-    description: str = dspy.InputField()
-    available_exercises: List[Dict[str, Any]] = dspy.InputField()
-
-class WorkoutPlan(dspy.Signature):
-    """A workout plan with exercises."""
+class GenerateWorkout(dspy.Signature):
+    """Design a workout plan for the request from the available exercises."""
+    request: str = dspy.InputField(desc="What the user asked for")
+    available_exercises: str = dspy.InputField(desc="Candidate exercises as an id|name|muscle_group|equipment table")
     title: str = dspy.OutputField()
     description: str = dspy.OutputField()
     exercises: List[Dict[str, Any]] = dspy.OutputField()
@@ -151,24 +111,34 @@ class WorkoutGenerator(dspy.Module):
     
     def __init__(self):
         super().__init__()
-        self.generate_workout = dspy.ChainOfThought(
-            WorkoutRequest, WorkoutPlan
-        )
+        self.generate_workout = dspy.ChainOfThought(GenerateWorkout)
         self.exercise_db = ExerciseDB()
+        self.packer = PromptPacker()
     
-    def forward(self, description: str) -> WorkoutPlan:
-        """Generate a workout plan based on user description."""
+    def forward(self, description: str, gym_equipment: Optional[List[Dict]] = None) -> dspy.Prediction:
+        """Generate a workout plan based on user description, limited to a gym's equipment if given."""
         # Find relevant exercises using direct database query
         relevant_exercises = self.exercise_db.find_exercises_for_workout(description)
+        relevant_exercises = self.filter_for_gym(relevant_exercises, gym_equipment)
+        
+        # Fit the candidates into the prompt budget as a compact table
+        packed = self.packer.pack(relevant_exercises, gym_equipment)
         
         # Generate the workout plan
-        workout_request = WorkoutRequest(
-            description=description,
-            available_exercises=relevant_exercises
+        workout_plan = self.generate_workout(
+            request=description,
+            available_exercises=packed.exercises
         )
-        workout_plan = self.generate_workout(workout_request)
         
         return workout_plan
+    
+    def filter_for_gym(self, exercises, gym_equipment):
+        """Drop exercises the gym has no equipment for (unless that would drop them all)."""
+        if not gym_equipment:
+            return exercises
+        equipment_index = get_equipment_index(self.exercise_db.db_path)
+        available = equipment_index.availability(item['name'] for item in gym_equipment)
+        return equipment_index.filter(exercises, available) or exercises
 
 def configure_lm(provider='openai'):
     """Configure the language model based on provider."""
@@ -195,88 +165,271 @@ def configure_lm(provider='openai'):
             return dspy.LM('openai/gpt-4o-mini', api_key=api_key)
 
 def bootstrap_examples():
-    """Create examples for bootstrapping."""
+    """Create examples for bootstrapping.
+    
+    Inputs are what ``WorkoutGenerator.forward`` takes; the expected plan
+    fields are only there for the metric and for reference.
+    """
     examples = [
         dspy.Example(
-            x=WorkoutRequest(
-                description="I want a quick full body workout with dumbbells",
-                available_exercises=[
-                    {"id": 1, "name": "Dumbbell Squat", "muscle_group": "Legs", "equipment": "Dumbbells"},
-                    {"id": 2, "name": "Dumbbell Bench Press", "muscle_group": "Chest", "equipment": "Dumbbells"},
-                    {"id": 3, "name": "Dumbbell Row", "muscle_group": "Back", "equipment": "Dumbbells"},
-                    {"id": 4, "name": "Lateral Raise", "muscle_group": "Shoulders", "equipment": "Dumbbells"},
-                    {"id": 5, "name": "Bicep Curl", "muscle_group": "Arms", "equipment": "Dumbbells"},
-                    {"id": 6, "name": "Overhead Tricep Extension", "muscle_group": "Arms", "equipment": "Dumbbells"},
-                ]
-            ),
-            y=WorkoutPlan(
-                title="Quick Full Body Dumbbell Workout",
-                description="A time-efficient full body workout using only dumbbells, perfect for building strength and endurance.",
-                exercises=[
-                    {"name": "Dumbbell Squat", "muscle_group": "Legs", "equipment": "Dumbbells"},
-                    {"name": "Dumbbell Bench Press", "muscle_group": "Chest", "equipment": "Dumbbells"},
-                    {"name": "Dumbbell Row", "muscle_group": "Back", "equipment": "Dumbbells"},
-                    {"name": "Lateral Raise", "muscle_group": "Shoulders", "equipment": "Dumbbells"},
-                    {"name": "Bicep Curl", "muscle_group": "Arms", "equipment": "Dumbbells"},
-                    {"name": "Overhead Tricep Extension", "muscle_group": "Arms", "equipment": "Dumbbells"},
-                ],
-                sets_and_reps=["3 sets of 12 reps for each exercise", "Rest 60 seconds between sets", "Complete as a circuit for additional cardio benefit"],
-                notes="Start with a 5-minute warm-up. Use a weight that challenges you by the last rep. Focus on proper form rather than heavy weight."
-            )
-        ),
+            description="I want a quick full body workout with dumbbells",
+            title="Quick Full Body Dumbbell Workout",
+            exercises=[
+                {"name": "Dumbbell Squat", "muscle_group": "Legs", "equipment": "Dumbbells"},
+                {"name": "Dumbbell Bench Press", "muscle_group": "Chest", "equipment": "Dumbbells"},
+                {"name": "Dumbbell Row", "muscle_group": "Back", "equipment": "Dumbbells"},
+                {"name": "Lateral Raise", "muscle_group": "Shoulders", "equipment": "Dumbbells"},
+                {"name": "Bicep Curl", "muscle_group": "Arms", "equipment": "Dumbbells"},
+                {"name": "Overhead Tricep Extension", "muscle_group": "Arms", "equipment": "Dumbbells"},
+            ],
+            sets_and_reps=["3 sets of 12 reps for each exercise", "Rest 60 seconds between sets", "Complete as a circuit for additional cardio benefit"],
+            notes="Start with a 5-minute warm-up. Use a weight that challenges you by the last rep. Focus on proper form rather than heavy weight."
+        ).with_inputs('description'),
         dspy.Example(
-            x=WorkoutRequest(
-                description="Help me design a chest and triceps workout for hypertrophy",
-                available_exercises=[
-                    {"id": 1, "name": "Bench Press", "muscle_group": "Chest", "equipment": "Barbell"},
-                    {"id": 2, "name": "Incline Bench Press", "muscle_group": "Chest", "equipment": "Barbell"},
-                    {"id": 3, "name": "Dumbbell Fly", "muscle_group": "Chest", "equipment": "Dumbbells"},
-                    {"id": 4, "name": "Cable Crossover", "muscle_group": "Chest", "equipment": "Cable Machine"},
-                    {"id": 5, "name": "Skull Crusher", "muscle_group": "Arms", "equipment": "EZ Bar"},
-                    {"id": 6, "name": "Tricep Extension", "muscle_group": "Arms", "equipment": "Cable Machine"},
-                    {"id": 7, "name": "Close-Grip Bench Press", "muscle_group": "Arms", "equipment": "Barbell"},
-                ]
-            ),
-            y=WorkoutPlan(
-                title="Chest and Triceps Hypertrophy Workout",
-                description="A targeted workout for chest and triceps with emphasis on muscular growth (hypertrophy).",
-                exercises=[
-                    {"name": "Bench Press", "muscle_group": "Chest", "equipment": "Barbell"},
-                    {"name": "Incline Bench Press", "muscle_group": "Chest", "equipment": "Barbell"},
-                    {"name": "Dumbbell Fly", "muscle_group": "Chest", "equipment": "Dumbbells"},
-                    {"name": "Cable Crossover", "muscle_group": "Chest", "equipment": "Cable Machine"},
-                    {"name": "Skull Crusher", "muscle_group": "Arms", "equipment": "EZ Bar"},
-                    {"name": "Tricep Extension", "muscle_group": "Arms", "equipment": "Cable Machine"},
-                    {"name": "Close-Grip Bench Press", "muscle_group": "Arms", "equipment": "Barbell"},
-                ],
-                sets_and_reps=["4 sets of 8-12 reps for each exercise", "Rest 90-120 seconds between sets", "Increase weight once you can complete 12 reps with good form"],
-                notes="For hypertrophy, aim for moderate weight with higher volume. Focus on the mind-muscle connection and consider techniques like drop sets or supersets for advanced stimulus."
-            )
-        )
+            description="Help me design a chest and triceps workout for hypertrophy",
+            title="Chest and Triceps Hypertrophy Workout",
+            exercises=[
+                {"name": "Bench Press", "muscle_group": "Chest", "equipment": "Barbell"},
+                {"name": "Incline Bench Press", "muscle_group": "Chest", "equipment": "Barbell"},
+                {"name": "Dumbbell Fly", "muscle_group": "Chest", "equipment": "Dumbbells"},
+                {"name": "Cable Crossover", "muscle_group": "Chest", "equipment": "Cable Machine"},
+                {"name": "Skull Crusher", "muscle_group": "Arms", "equipment": "EZ Bar"},
+                {"name": "Tricep Extension", "muscle_group": "Arms", "equipment": "Cable Machine"},
+                {"name": "Close-Grip Bench Press", "muscle_group": "Arms", "equipment": "Barbell"},
+            ],
+            sets_and_reps=["4 sets of 8-12 reps for each exercise", "Rest 90-120 seconds between sets", "Increase weight once you can complete 12 reps with good form"],
+            notes="For hypertrophy, aim for moderate weight with higher volume. Focus on the mind-muscle connection and consider techniques like drop sets or supersets for advanced stimulus."
+        ).with_inputs('description')
     ]
     return examples
 
+def plan_is_complete(example, prediction, trace=None):
+    """Bootstrap metric: keep a trace only if it produced a titled plan with exercises."""
+    return bool(getattr(prediction, 'title', None)) and bool(getattr(prediction, 'exercises', None))
+
+def compile_workout_generator(lm):
+    """Compile a WorkoutGenerator against the bootstrap examples using the given LM."""
+    with dspy.settings.context(lm=lm):
+        # Demos come only from bootstrapped traces; the raw examples don't match the predictor's fields
+        teleprompter = BootstrapFewShot(metric=plan_is_complete, max_bootstrapped_demos=2, max_labeled_demos=0)
+        return teleprompter.compile(WorkoutGenerator(), trainset=bootstrap_examples())
+
+program_registry = ProgramRegistry('cli_workout_generator', WorkoutGenerator, compile_workout_generator)
+
+# Default generations per minute for --batch, kept under each provider's usual rate limits
+PROVIDER_RATE_LIMITS = {'openai': 60, 'claude': 30}
+
+class RateLimiter:
+    """Token bucket shared by the batch workers; ``acquire`` blocks until a call is allowed."""
+    
+    def __init__(self, per_minute: float, burst: int = 1):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        if not self.interval:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.interval
+            time.sleep(wait)
+
+def read_batch_requests(path):
+    """Read ``{'id', 'description', 'gym_id'}`` requests from a JSONL or CSV file.
+    
+    Each line (or CSV row) needs a description and may carry a gym_id and an
+    id; rows without an id are numbered by their position in the file.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    
+    requests = []
+    seen = set()
+    for number, row in enumerate(rows, 1):
+        description = (row.get('description') or '').strip()
+        if not description:
+            raise ValueError(f"{path}: request {number} has no description")
+        request_id = str(row.get('id') or number)
+        if request_id in seen:
+            raise ValueError(f"{path}: duplicate request id {request_id}")
+        seen.add(request_id)
+        gym_id = row.get('gym_id')
+        requests.append({
+            'id': request_id,
+            'description': description,
+            'gym_id': int(gym_id) if gym_id not in (None, '') else None,
+        })
+    return requests
+
+def completed_request_ids(output_path) -> Set[str]:
+    """Ids already generated successfully in ``output_path``.
+    
+    A line cut short by an interrupted run is trimmed so appended results
+    start on a fresh line. Failed requests are not counted and get retried.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            f.truncate(end)
+    
+    done = set()
+    for line in data[:end].splitlines():
+        try:
+            result = json.loads(line)
+        except ValueError:
+            continue
+        if result.get('status') == 'ok':
+            done.add(str(result['id']))
+    return done
+
+def load_gym_equipment(gym_ids, gyms_db_path='data/gyms.db') -> Dict[int, List[Dict]]:
+    """Equipment for each gym id that exists in gyms.db."""
+    if not gym_ids or not os.path.exists(gyms_db_path):
+        return {}
+    conn = db.open_connection(gyms_db_path)
+    try:
+        equipment = {}
+        for gym_id in gym_ids:
+            if conn.execute('SELECT 1 FROM gyms WHERE id = ?', (gym_id,)).fetchone():
+                rows = conn.execute('SELECT * FROM equipment WHERE gym_id = ? ORDER BY category, name', (gym_id,))
+                equipment[gym_id] = [dict(row) for row in rows]
+        return equipment
+    finally:
+        conn.close()
+
+def plan_to_dict(workout_plan) -> Dict:
+    return {
+        'title': workout_plan.title,
+        'description': workout_plan.description,
+        'exercises': workout_plan.exercises,
+        'sets_and_reps': workout_plan.sets_and_reps,
+        'notes': workout_plan.notes,
+    }
+
+def run_batch(workout_generator, requests, output_path, workers=4, rate_limiter=None,
+              resume=False, gyms_db_path='data/gyms.db'):
+    """Generate a plan for every request, appending one JSON line per result as it finishes.
+    
+    All workers share the one compiled ``workout_generator``. With ``resume``
+    the requests already in ``output_path`` are skipped. Returns the number
+    of successes and failures in this run.
+    """
+    done = completed_request_ids(output_path) if resume else set()
+    pending = [r for r in requests if r['id'] not in done]
+    if done:
+        print(f"Resuming: {len(requests) - len(pending)} of {len(requests)} plans already generated")
+    
+    gym_equipment = load_gym_equipment({r['gym_id'] for r in pending if r['gym_id'] is not None}, gyms_db_path)
+    
+    def generate(request):
+        started = time.monotonic()
+        result = {'id': request['id'], 'description': request['description'], 'gym_id': request['gym_id']}
+        try:
+            if request['gym_id'] is not None and request['gym_id'] not in gym_equipment:
+                raise ValueError(f"Gym {request['gym_id']} not found")
+            if rate_limiter:
+                rate_limiter.acquire()
+            workout_plan = workout_generator(request['description'], gym_equipment.get(request['gym_id']))
+            result.update(status='ok', plan=plan_to_dict(workout_plan))
+        except Exception as e:
+            result.update(status='error', error=f"{type(e).__name__}: {e}")
+        result['seconds'] = round(time.monotonic() - started, 3)
+        return result
+    
+    succeeded = failed = 0
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+    try:
+        with open(output_path, 'a' if resume else 'w', encoding='utf-8') as out:
+            futures = [executor.submit(generate, request) for request in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                # Only this thread writes, and each result is on disk before the next
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+                os.fsync(out.fileno())
+                if result['status'] == 'ok':
+                    succeeded += 1
+                else:
+                    failed += 1
+                    print(f"Request {result['id']} failed: {result['error']}")
+                print(f"[{succeeded + failed}/{len(pending)}] {result['id']} {result['status']} "
+                      f"({result['seconds']:.1f}s)")
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {succeeded + failed} plans; rerun with --resume to continue")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    return succeeded, failed
+
+def print_workout_plan(workout_plan):
+    """Display a workout plan in the terminal."""
+    print("\n" + "="*50)
+    print(f"🏋️ {workout_plan.title} 🏋️")
+    print("="*50)
+    print(f"\n📝 Description: {workout_plan.description}\n")
+    
+    print("📋 Exercises:")
+    for i, exercise in enumerate(workout_plan.exercises, 1):
+        print(f"  {i}. {exercise['name']} ({exercise['muscle_group']} - {exercise['equipment']})")
+    
+    print("\n⚙️ Sets & Reps:")
+    for instruction in workout_plan.sets_and_reps:
+        print(f"  • {instruction}")
+    
+    print(f"\n📌 Notes: {workout_plan.notes}")
+    print("\n" + "="*50)
+
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Generate workouts using LLMs and direct database queries")
     parser.add_argument('--provider', type=str, default='openai', choices=['openai', 'claude'],
                         help='LLM provider to use (openai or claude)')
+    parser.add_argument('--rebuild-program', action='store_true',
+                        help='Recompile the workout program instead of loading the saved artifact')
+    parser.add_argument('--batch', metavar='INPUT',
+                        help='JSONL or CSV file of requests (description, optional gym_id and id) to generate in bulk')
+    parser.add_argument('--output', default='batch_plans.jsonl',
+                        help='JSONL file the batch results are written to')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip requests already generated in --output and append the rest')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent generations in batch mode')
+    parser.add_argument('--rate-limit', type=float,
+                        help='Generations per minute in batch mode (default: 60 for openai, 30 for claude, 0 for none)')
+    parser.add_argument('--gyms-db', default='data/gyms.db', help='Gym database used to resolve gym_id')
     args = parser.parse_args()
     
+    # Read the batch first so a bad input file fails before compiling anything
+    requests = read_batch_requests(args.batch) if args.batch else None
+    
     # Configure the language model
-    dspy.settings.configure(lm=configure_lm(args.provider))
+    lm = configure_lm(args.provider)
+    dspy.settings.configure(lm=lm)
     
-    # Create the workout generator
-    workout_generator = WorkoutGenerator()
+    # Load the compiled generator from data/programs, compiling it if needed
+    workout_generator = program_registry.get(args.provider, lm, rebuild=args.rebuild_program)
     
-    # Bootstrap with examples for better performance
-    examples = bootstrap_examples()
-    teleprompter = BootstrapFewShot(metric=dspy.evaluate.answer_exact_match)
-    workout_generator = teleprompter.compile(
-        workout_generator,
-        trainset=examples,
-        num_bootstrapped_examples=2
-    )
+    if requests is not None:
+        rate = PROVIDER_RATE_LIMITS[args.provider] if args.rate_limit is None else args.rate_limit
+        succeeded, failed = run_batch(workout_generator, requests, args.output, workers=max(1, args.workers),
+                                      rate_limiter=RateLimiter(rate) if rate > 0 else None,
+                                      resume=args.resume, gyms_db_path=args.gyms_db)
+        print(f"Generated {succeeded} plans ({failed} failed) into {args.output}")
+        return
     
     # Get user input
     print("\n=== Workout Generator ===")
@@ -288,24 +441,10 @@ def main():
         workout_plan = workout_generator(user_input)
         
         # Display the workout plan
-        print("\n" + "="*50)
-        print(f"🏋️ {workout_plan.title} 🏋️")
-        print("="*50)
-        print(f"\n📝 Description: {workout_plan.description}\n")
-        
-        print("📋 Exercises:")
-        for i, exercise in enumerate(workout_plan.exercises, 1):
-            print(f"  {i}. {exercise['name']} ({exercise['muscle_group']} - {exercise['equipment']})")
-        
-        print("\n⚙️ Sets & Reps:")
-        for instruction in workout_plan.sets_and_reps:
-            print(f"  • {instruction}")
-        
-        print(f"\n📌 Notes: {workout_plan.notes}")
-        print("\n" + "="*50)
+        print_workout_plan(workout_plan)
         
     except Exception as e:
         print(f"Error generating workout plan: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
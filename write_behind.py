@@ -0,0 +1,168 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+_FLUSH = object()
+_STOP = object()
+
+class GroupCommitWriter:
+    """Collect row writes from many threads and commit them in groups on one thread.
+
+    Callers get a Future that resolves once their row's transaction has
+    committed. Rows queued together with ``submit_many`` form one unit that
+    is always committed, or fails, in a single transaction.
+
+    The writer never waits for a group to fill: it commits whatever has
+    queued (up to ``max_batch`` rows) as soon as it is free, so a lone row
+    on an idle writer is committed straight away, and rows only group up
+    while a previous commit is running. Each fsync is shared by every row
+    in the group and only one thread ever holds the SQLite write lock. If
+    a group fails, its units are retried one at a time so each caller only
+    sees its own error.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Dict]], List], max_batch: int = 50,
+                 name: str = 'group-commit-writer'):
+        """Start the writer thread.
+
+        ``write_batch`` is called on the writer thread with a list of rows and
+        must commit them in a single transaction (rolling back on error),
+        returning one result per row.
+        """
+        self.write_batch = write_batch
+        self.max_batch = max_batch
+        self.batches_committed = 0
+        self.rows_committed = 0
+        self.groups_retried = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, row: Dict) -> Future:
+        """Queue a row and return a Future resolving to its write result."""
+        if self._closed:
+            raise RuntimeError('GroupCommitWriter is closed')
+        future = Future()
+        self._queue.put(([row], future, True))
+        return future
+
+    def submit_many(self, rows: List[Dict]) -> Future:
+        """Queue rows as one unit and return a Future resolving to their results, in order.
+
+        The unit is never split across groups: its rows commit together or
+        not at all.
+        """
+        if self._closed:
+            raise RuntimeError('GroupCommitWriter is closed')
+        future = Future()
+        if not rows:
+            future.set_result([])
+            return future
+        self._queue.put((list(rows), future, False))
+        return future
+
+    def flush(self, timeout: float = None):
+        """Block until every row queued before this call has been committed."""
+        future = Future()
+        self._queue.put((_FLUSH, future, None))
+        future.result(timeout=timeout)
+
+    def close(self, timeout: float = 10):
+        """Commit everything still queued and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((_STOP, None, None))
+        self._thread.join(timeout=timeout)
+
+    def _run(self):
+        """Writer loop: gather a group, commit it, acknowledge its callers."""
+        while True:
+            unit = self._queue.get()
+            if unit[0] is _STOP:
+                return
+            if unit[0] is _FLUSH:
+                unit[1].set_result(None)
+                continue
+
+            batch = [unit]
+            rows = len(unit[0])
+            markers = []
+            stop = False
+            # Take only what queued while the last group was committing
+            while rows < self.max_batch:
+                try:
+                    unit = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if unit[0] is _STOP:
+                    stop = True
+                    break
+                if unit[0] is _FLUSH:
+                    # Acknowledge flushes only after this group commits
+                    markers.append(unit[1])
+                    break
+                batch.append(unit)
+                rows += len(unit[0])
+
+            self._commit(batch)
+            for marker in markers:
+                marker.set_result(None)
+            if stop:
+                self._drain()
+                return
+
+    def _drain(self):
+        """Commit whatever is left in the queue during shutdown."""
+        batch, rows = [], 0
+        while True:
+            try:
+                unit = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if unit[0] is _FLUSH:
+                unit[1].set_result(None)
+            elif unit[0] is not _STOP:
+                batch.append(unit)
+                rows += len(unit[0])
+                if rows >= self.max_batch:
+                    self._commit(batch)
+                    batch, rows = [], 0
+        if batch:
+            self._commit(batch)
+
+    def _commit(self, batch):
+        """Write one group of units and resolve their futures."""
+        try:
+            results = self.write_batch([row for rows, _, _ in batch for row in rows])
+        except Exception as e:
+            if len(batch) > 1:
+                # One bad unit rolled the group back; find it by writing the units separately
+                self.groups_retried += 1
+                for unit in batch:
+                    self._commit([unit])
+                return
+            traceback.print_exc()
+            batch[0][1].set_exception(e)
+            return
+
+        self.batches_committed += 1
+        position = 0
+        for rows, future, single in batch:
+            unit_results = results[position:position + len(rows)]
+            position += len(rows)
+            future.set_result(unit_results[0] if single else unit_results)
+        self.rows_committed += position
+
+    def stats(self) -> Dict:
+        """Counters describing how well writes are being grouped."""
+        return {
+            'batches_committed': self.batches_committed,
+            'rows_committed': self.rows_committed,
+            'avg_batch_size': self.rows_committed / self.batches_committed if self.batches_committed else 0.0,
+            'groups_retried': self.groups_retried,
+            'queued': self._queue.qsize(),
+        }